@@ -3,29 +3,44 @@ Flask Backend API for Data Analyst Automation Tool
 Exposes all existing backend functions as REST API endpoints
 """
 import io
+import json
 import os
 import secrets
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
 
-import pandas as pd
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import base64
+import hashlib
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend for server
-import matplotlib.pyplot as plt
 
 from src.loaders import detect_and_load
 from src.profiling import compute_overview
 from src.cleaning import auto_clean
-from src.eda import generate_eda
-from src.insights import generate_insights
-from src.exports import export_excel_with_summary, export_powerbi_csv, export_powerbi_bundle, export_pdf_report
-from src.nlqa import answer_question
+from src.eda import EDA_STEPS, generate_eda
+from src.insights import generate_insights, generate_insights_full
+from src.figures import figure_to_png_bytes
+from src.exports import write_excel_with_summary, iter_powerbi_bundle, iter_tableau_bundle, normalize_export_formats, export_pdf_report, ExportBlocks, PDF_IMAGE_QUALITY, PDF_VECTOR_CHARTS
+from src.nlqa import answer_question, answer_questions, intent_stats, question_key, uses_full_data
+from src.jobs import ExportJobs, artifact_key, dataset_fingerprint
+from src.cache import LRUCache
+from src.cube import build_cube
+from src.sql import SQLDatabase, SQLError
+from src.sessions import SessionStore
+from src.ratelimit import RateLimiter
 
 app = Flask(__name__)
+# Client addresses come from X-Forwarded-For as set by this many reverse proxies in
+# front of the app (1 on the hosted deployments); use 0 when serving clients directly
+PROXY_HOPS = int(os.environ.get('PROXY_HOPS', '1'))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS, x_host=PROXY_HOPS)
 
 # Get allowed origins from environment variable or use defaults
 # Include common development ports (3000, 3001) for React apps
@@ -36,68 +51,355 @@ CORS(app, resources={
     r"/api/*": {
         "origins": allowed_origins,
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "X-Session-ID", "x-session-id"]
+        "allow_headers": ["Content-Type", "X-Session-ID", "x-session-id"],
+        "expose_headers": ["X-Session-ID"]
     }
 })
 
 # Session management
-sessions = {}
 SESSION_TIMEOUT = 8 * 60 * 60  # 8 hours
+# Per-version caches rebuilt from the data on demand; dropped when the data changes
+# and when a session is spilled
+DERIVED_SESSION_KEYS = ('export_blocks', 'fingerprints', 'qa_cubes', 'sql_db')
+# Sessions are shared by all worker processes through files under SESSION_DIR; each
+# worker keeps recently used ones in memory up to the budget
+sessions = SessionStore(
+    os.environ.get('SESSION_DIR', os.path.join(tempfile.gettempdir(), 'analysis_sessions')),
+    max_bytes=int(os.environ.get('SESSION_MEMORY_MB', '1024')) * 1024 * 1024,
+    timeout=SESSION_TIMEOUT,
+    derived=DERIVED_SESSION_KEYS
+)
 
-# Rate limiting
-request_counts = {}
+# Rate limiting: token buckets per client shared by all workers, refilling at
+# RATE_LIMIT_PER_SECOND up to RATE_LIMIT_BURST; routes cost 1 token unless listed below
+rate_limiter = RateLimiter(
+    os.environ.get('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'analysis_ratelimit.sqlite')),
+    rate=float(os.environ.get('RATE_LIMIT_PER_SECOND', '10')),
+    burst=float(os.environ.get('RATE_LIMIT_BURST', '10')),
+    max_keys=int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+)
+ROUTE_COSTS = {
+    'upload_file': 3,
+    'clean_data': 2,
+    'generate_eda_charts': 5,
+    'stream_eda_charts': 5,
+    'answer_qa_batch': 3,
+    'get_insights': 2,
+    'export_excel': 5,
+    'export_powerbi': 5,
+    'export_tableau': 5,
+    'export_pdf': 5,
+    'submit_export_job': 5,
+}
 
+# Background export jobs; records and cached artifacts are shared on disk by all workers
+export_jobs = ExportJobs(
+    os.environ.get('EXPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'analysis_exports')),
+    max_workers=int(os.environ.get('EXPORT_WORKERS', '2')),
+    max_cache_bytes=int(os.environ.get('EXPORT_CACHE_MB', '2048')) * 1024 * 1024
+)
 
-def get_session_id():
-    """Get or create session ID from request"""
+# Rendered Q&A answers keyed by dataset fingerprint and canonical question
+qa_cache = LRUCache(max_bytes=int(os.environ.get('QA_CACHE_MB', '64')) * 1024 * 1024)
+# Q&A charts by id: the pending chart until first requested, then its PNG bytes
+qa_charts = LRUCache(max_bytes=int(os.environ.get('QA_CHART_CACHE_MB', '64')) * 1024 * 1024)
+# Budget charged for a chart not rendered yet, about one PNG, on top of the data
+# its draw closure holds
+QA_PENDING_CHART_BYTES = 64 * 1024
+# Each chart id is also recorded in the session under this prefix with the question
+# that drew it, so a worker that never answered the question can redraw the chart
+QA_CHART_KEY = 'qa_chart:'
+QA_SESSION_CHARTS = int(os.environ.get('QA_SESSION_CHARTS', '256'))
+QA_BATCH_MAX = int(os.environ.get('QA_BATCH_MAX', '200'))
+QA_WORKERS = int(os.environ.get('QA_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Ad-hoc SQL: rows per page by default, the most a page may hold, and a per-query time limit
+SQL_PAGE_ROWS = 1000
+SQL_MAX_ROWS = int(os.environ.get('SQL_MAX_ROWS', '10000'))
+SQL_TIMEOUT = float(os.environ.get('SQL_TIMEOUT', '10'))
+
+
+@app.teardown_request
+def settle_sessions(exc):
+    """Save the sessions a request changed and keep local copies within budget"""
+    sessions.settle()
+
+
+# Routes browsers load directly (EventSource, <img>), which cannot send headers;
+# these also take the session id as ?session_id=
+QUERY_SESSION_ENDPOINTS = {'stream_eda_charts', 'get_qa_chart'}
+
+
+def _requested_session_id():
+    """Session ID the client sent, or '' if none"""
     # Try multiple header name variations (case-insensitive)
     session_id = request.headers.get('X-Session-ID') or request.headers.get('x-session-id')
-    if not session_id or session_id.strip() == '':
-        # Generate a new session ID if not provided
-        session_id = secrets.token_hex(32)
-    return session_id
+    if not session_id and request.endpoint in QUERY_SESSION_ENDPOINTS:
+        session_id = request.args.get('session_id')
+    return (session_id or '').strip()
+
+
+def get_session_id():
+    """Session ID of this request, as resolved by check_session"""
+    return g.get('session_id') or _requested_session_id() or secrets.token_hex(32)
 
 
 def check_session(f):
     """Decorator to check session validity"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        session_id = get_session_id()
-        if session_id not in sessions:
+        session_id = _requested_session_id()
+        if not session_id or session_id not in sessions:
+            # Only ids this server issued are accepted; anything else starts a new
+            # session, whose id the response returns in X-Session-ID
+            session_id = secrets.token_hex(32)
             sessions[session_id] = {
                 'login_time': time.time(),
                 'token': secrets.token_hex(32)
             }
-        else:
-            if time.time() - sessions[session_id]['login_time'] > SESSION_TIMEOUT:
-                return jsonify({'error': 'Session expired'}), 401
+        elif time.time() - sessions[session_id]['login_time'] > SESSION_TIMEOUT:
+            return jsonify({'error': 'Session expired'}), 401
+        g.session_id = session_id
         return f(*args, **kwargs)
     return decorated_function
 
 
+@app.after_request
+def send_session_id(response):
+    """Tell the client which session the request used, including one just issued"""
+    if g.get('session_id'):
+        response.headers.setdefault('X-Session-ID', g.session_id)
+    return response
+
+
+def _rate_limit_key():
+    """Client the request is charged to: its address, plus its session id once that session exists"""
+    # Runs before check_session, so requests without a session, or with an id the
+    # server never issued, are charged to the address; that includes every session
+    # they create
+    session_id = _requested_session_id()
+    if session_id and session_id in sessions:
+        return f'addr:{request.remote_addr}:session:{session_id}'
+    return f'addr:{request.remote_addr}'
+
+
 def check_rate_limit(f):
-    """Decorator for rate limiting"""
+    """Decorator for rate limiting; goes above check_session so refused requests create no session"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        session_id = get_session_id()
-        current_time = time.time()
-        
-        if session_id not in request_counts:
-            request_counts[session_id] = {'count': 0, 'last_time': current_time}
-        
-        req_info = request_counts[session_id]
-        if current_time - req_info['last_time'] < 1:
-            req_info['count'] += 1
-            if req_info['count'] > 10:
-                return jsonify({'error': 'Too many requests'}), 429
-        else:
-            req_info['count'] = 1
-            req_info['last_time'] = current_time
+        try:
+            allowed, retry_after = rate_limiter.allow(_rate_limit_key(), ROUTE_COSTS.get(f.__name__, 1))
+        except Exception as e:
+            # An unavailable limiter store should not take the API down with it
+            app.logger.warning("Rate limiter error: %s", e)
+            allowed = True
+        if not allowed:
+            response = jsonify({'error': 'Too many requests'})
+            response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+            return response, 429
         
         return f(*args, **kwargs)
     return decorated_function
 
 
+DEFAULT_CHART_SELECTIONS = {
+    'basic_plots': True,
+    'scatter_plots': True,
+    'time_series': True,
+    'correlation': True,
+    'categorical': True,
+    'all_plots': False
+}
+
+
+def _chart_selected(title, chart_selections):
+    """Return True if a chart title matches the requested chart types"""
+    if chart_selections.get('all_plots', False):
+        return True
+    if chart_selections.get('basic_plots') and any(kw in title for kw in ["Distribution", "Boxplot", "Violin"]):
+        return True
+    if chart_selections.get('scatter_plots') and "Scatter" in title:
+        return True
+    if chart_selections.get('time_series') and "Time Series" in title:
+        return True
+    if chart_selections.get('correlation') and any(kw in title for kw in ["Correlation", "Pair Plot"]):
+        return True
+    if chart_selections.get('categorical') and "Categorical Analysis" in title:
+        return True
+    return False
+
+
+def _figure_to_data_uri(fig):
+    """Render a figure to a base64 PNG data URI"""
+    img_base64 = base64.b64encode(figure_to_png_bytes(fig, dpi=100)).decode('utf-8')
+    return f'data:image/png;base64,{img_base64}'
+
+
+def _bump_data_version(session):
+    """Mark the session's data as changed so per-version caches are rebuilt"""
+    session['data_version'] = session.get('data_version', 0) + 1
+    # Not closed here: a download in progress may still be reading the old blocks
+    for key in DERIVED_SESSION_KEYS:
+        session.pop(key, None)
+
+
+def _fingerprint(session, key):
+    """Content fingerprint of session[key], computed once per dataset version"""
+    fingerprints = session.setdefault('fingerprints', {})
+    df = session[key]
+    cached = fingerprints.get(key)
+    if cached is None or cached[0] is not df:
+        cached = (df, dataset_fingerprint(df))
+        fingerprints[key] = cached
+    return cached[1]
+
+
+def _qa_cube(session, key):
+    """Q&A aggregate cube over the full session[key], built once per dataset version"""
+    cubes = session.setdefault('qa_cubes', {})
+    df = session[key]
+    cached = cubes.get(key)
+    if cached is None or cached[0] is not df:
+        cached = (df, build_cube(df))
+        cubes[key] = cached
+    return cached[1]
+
+
+def _sql_database(session):
+    """SQL database over the session's frames, loaded once per dataset version.
+
+    Tables df and clean_df hold the uploaded and cleaned data; the view data is
+    whichever of them Q&A would use.
+    """
+    frames = {key: session[key] for key in ('df', 'clean_df') if key in session}
+    cached = session.get('sql_db')
+    if cached is None or cached[0].keys() != frames.keys() or any(cached[0][key] is not df for key, df in frames.items()):
+        data = 'clean_df' if 'clean_df' in frames else 'df'
+        cached = (frames, SQLDatabase(frames, aliases={'data': data}))
+        session['sql_db'] = cached
+    return cached[1]
+
+
+def _chart_id(cache_key):
+    """Stable chart id for an answer cache key"""
+    return hashlib.blake2b(repr(cache_key).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _chart_png(chart_id):
+    """PNG of a stored Q&A chart, rendered on first request; None once evicted"""
+    entry = qa_charts.get(chart_id)
+    if entry is None or isinstance(entry, bytes):
+        return entry
+    png = figure_to_png_bytes(entry.figure(), dpi=100)
+    qa_charts.put(chart_id, png, len(png))
+    return png
+
+
+def _remember_charts(session, source, payloads, questions):
+    """Record the question behind each payload's chart so any worker can redraw it"""
+    for payload, question in zip(payloads, questions):
+        if payload.get('chart') is not None:
+            session[QA_CHART_KEY + payload['chart']['id']] = (source, question)
+    # Keys keep insertion order, so the oldest charts are forgotten first
+    keys = [key for key in session if key.startswith(QA_CHART_KEY)]
+    for key in keys[:max(len(keys) - QA_SESSION_CHARTS, 0)]:
+        del session[key]
+
+
+def _redraw_chart(session, chart_id):
+    """Answer again the question recorded for chart_id; False if the data has changed since"""
+    recorded = session.get(QA_CHART_KEY + chart_id)
+    if recorded is None or recorded[0] not in session:
+        return False
+    source, question = recorded
+    cache_key = (_fingerprint(session, source), question_key(question))
+    if _chart_id(cache_key) != chart_id:
+        return False
+    result, size = _qa_payload(_answer(session, source, question), chart_id)
+    qa_cache.put(cache_key, result, size)
+    return result['chart'] is not None
+
+
+def _answer(session, source, question):
+    """Answer one question over session[source]"""
+    # Aggregates of the full data answer sales, trend and count questions and
+    # filtered aggregates scan it directly; everything else is answered from a
+    # sample on large datasets
+    qa_df = session[source]
+    cube = _qa_cube(session, source)
+    if len(qa_df) > 50000 and not uses_full_data(question):
+        qa_df = qa_df.sample(n=min(10000, len(qa_df)), random_state=42)
+        print(f"Sampling large dataset: {len(qa_df)} rows")
+    return answer_question(qa_df, question, cube=cube)
+
+
+def _chart_available(payload):
+    """Whether a cached answer's chart (if any) can still be served"""
+    return payload.get('chart') is None or qa_charts.get(payload['chart']['id']) is not None
+
+
+def _qa_response(payload, render):
+    """Cached answer as sent to the client; figure holds the inline PNG only when asked to render"""
+    result = dict(payload, figure=None)
+    if render and payload.get('chart') is not None:
+        result['figure'] = _png_data_uri(_chart_png(payload['chart']['id']))
+    return result
+
+
+def _png_data_uri(png):
+    return None if png is None else 'data:image/png;base64,' + base64.b64encode(png).decode('utf-8')
+
+
+def _qa_payload(qa, chart_id):
+    """JSON-ready answer plus its approximate size for the answer cache.
+
+    The chart is stored unrendered under chart_id and only described in the payload.
+    """
+    result = {
+        'message': qa.message or '',
+        'table': None,
+        'chart': None,
+    }
+    size = len(result['message'])
+    
+    if qa.table is not None:
+        result['table'] = qa.table.to_dict('records')
+        size += int(qa.table.memory_usage(deep=True).sum())
+    
+    if qa.chart is not None:
+        qa_charts.put(chart_id, qa.chart, QA_PENDING_CHART_BYTES + qa.chart.nbytes)
+        result['chart'] = dict(qa.chart.describe(), id=chart_id, url=f'/api/qa/charts/{chart_id}')
+        size += 256
+    return result, size
+
+
+def _export_blocks(session, export_df):
+    """Encoded data blocks shared by every export of this dataset version"""
+    blocks = session.get('export_blocks')
+    if blocks is None or blocks.df is not export_df:
+        blocks = ExportBlocks(export_df)
+        session['export_blocks'] = blocks
+    return blocks
+
+
+def _iter_file(path, chunk_size=1 << 20):
+    """Stream a file from disk in fixed-size chunks"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _remove_file(path):
+    """Delete a temporary export file once its response has been sent"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -105,8 +407,8 @@ def health():
 
 
 @app.route('/api/upload', methods=['POST'])
-@check_session
 @check_rate_limit
+@check_session
 def upload_file():
     """Upload and load dataset"""
     try:
@@ -161,6 +463,7 @@ def upload_file():
             sessions[session_id]['df'] = df
             sessions[session_id]['filename'] = file.filename
             sessions[session_id]['meta'] = meta
+            _bump_data_version(sessions[session_id])
             print(f"Upload - Successfully stored data in session {session_id}")
             print(f"Upload - Session now has keys: {list(sessions[session_id].keys())}")
         except KeyError as ke:
@@ -198,8 +501,8 @@ def upload_file():
 
 
 @app.route('/api/overview', methods=['GET'])
-@check_session
 @check_rate_limit
+@check_session
 def get_overview():
     """Get data overview"""
     try:
@@ -241,8 +544,8 @@ def get_overview():
 
 
 @app.route('/api/clean', methods=['POST'])
-@check_session
 @check_rate_limit
+@check_session
 def clean_data():
     """Clean the dataset"""
     try:
@@ -258,6 +561,7 @@ def clean_data():
         # Store cleaned dataframe
         sessions[session_id]['clean_df'] = clean_df
         sessions[session_id]['cleaning_report'] = cleaning_report
+        _bump_data_version(sessions[session_id])
         
         # Return preview of cleaned data (first 50 rows)
         preview = clean_df.head(50).to_dict('records')
@@ -277,8 +581,8 @@ def clean_data():
 
 
 @app.route('/api/eda', methods=['POST'])
-@check_session
 @check_rate_limit
+@check_session
 def generate_eda_charts():
     """Generate EDA charts"""
     try:
@@ -289,15 +593,8 @@ def generate_eda_charts():
         clean_df = sessions[session_id]['clean_df']
         
         # Get chart type selections from request
-        data = request.get_json() or {}
-        chart_selections = data.get('chart_selections', {
-            'basic_plots': True,
-            'scatter_plots': True,
-            'time_series': True,
-            'correlation': True,
-            'categorical': True,
-            'all_plots': False
-        })
+        data = request.get_json(silent=True) or {}
+        chart_selections = data.get('chart_selections', DEFAULT_CHART_SELECTIONS)
         
         # Sample for large datasets
         if len(clean_df) > 50000:
@@ -309,34 +606,15 @@ def generate_eda_charts():
         figs, eda_meta = generate_eda(sample_df)
         
         # Filter charts based on selections
-        filtered_figs = []
-        if chart_selections.get('all_plots', False):
-            filtered_figs = figs
-        else:
-            for title, fig in figs:
-                if chart_selections.get('basic_plots') and any(kw in title for kw in ["Distribution", "Boxplot", "Violin"]):
-                    filtered_figs.append((title, fig))
-                elif chart_selections.get('scatter_plots') and "Scatter" in title:
-                    filtered_figs.append((title, fig))
-                elif chart_selections.get('time_series') and "Time Series" in title:
-                    filtered_figs.append((title, fig))
-                elif chart_selections.get('correlation') and any(kw in title for kw in ["Correlation", "Pair Plot"]):
-                    filtered_figs.append((title, fig))
-                elif chart_selections.get('categorical') and "Categorical Analysis" in title:
-                    filtered_figs.append((title, fig))
+        filtered_figs = [(title, fig) for title, fig in figs if _chart_selected(title, chart_selections)]
         
         # Convert figures to base64 images
         charts = []
         for title, fig in filtered_figs:
-            img_buffer = io.BytesIO()
-            fig.savefig(img_buffer, format='png', bbox_inches='tight', dpi=100)
-            img_buffer.seek(0)
-            img_base64 = base64.b64encode(img_buffer.read()).decode('utf-8')
             charts.append({
                 'title': title,
-                'image': f'data:image/png;base64,{img_base64}'
+                'image': _figure_to_data_uri(fig)
             })
-            plt.close(fig)
         
         sessions[session_id]['charts'] = filtered_figs
         
@@ -353,9 +631,88 @@ def generate_eda_charts():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/qa', methods=['POST'])
+@app.route('/api/eda/stream', methods=['GET', 'POST'])
+@check_rate_limit
 @check_session
+def stream_eda_charts():
+    """Stream EDA charts as NDJSON (or server-sent events) while they render"""
+    session_id = get_session_id()
+    if 'clean_df' not in sessions.get(session_id, {}):
+        return jsonify({'error': 'Data must be cleaned first'}), 400
+    
+    clean_df = sessions[session_id]['clean_df']
+    
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        chart_selections = data.get('chart_selections', DEFAULT_CHART_SELECTIONS)
+    else:
+        # e.g. ?charts=basic_plots,time_series&session_id=... for EventSource clients
+        requested = request.args.get('charts')
+        if requested:
+            chart_selections = {key: True for key in requested.split(',') if key}
+        else:
+            chart_selections = DEFAULT_CHART_SELECTIONS
+    
+    use_sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+    
+    # Sample for large datasets
+    if len(clean_df) > 50000:
+        sample_df = clean_df.sample(n=min(10000, len(clean_df)), random_state=42)
+    else:
+        sample_df = clean_df
+    
+    def encode(event, payload):
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        payload = dict(payload, event=event)
+        return json.dumps(payload) + "\n"
+    
+    def generate():
+        started = time.time()
+        steps = [step for step, _ in EDA_STEPS]
+        kept_figs = []
+        yield encode('start', {'session_id': session_id, 'steps': steps})
+        try:
+            for step_index, (step, builder) in enumerate(EDA_STEPS):
+                for title, fig in builder(sample_df):
+                    if not _chart_selected(title, chart_selections):
+                        continue
+                    chart = {
+                        'index': len(kept_figs),
+                        'title': title,
+                        'image': _figure_to_data_uri(fig)
+                    }
+                    kept_figs.append((title, fig))
+                    yield encode('chart', chart)
+                # Sent for every step, including ones that drew no charts
+                yield encode('progress', {
+                    'step': step,
+                    'step_index': step_index,
+                    'total_steps': len(steps),
+                    'charts_sent': len(kept_figs),
+                    'elapsed': round(time.time() - started, 3)
+                })
+            sessions[session_id]['charts'] = kept_figs
+            yield encode('done', {
+                'count': len(kept_figs),
+                'elapsed': round(time.time() - started, 3)
+            })
+        except Exception as e:
+            import traceback
+            print(f"EDA stream error: {traceback.format_exc()}")
+            yield encode('error', {'error': str(e)})
+    
+    mimetype = 'text/event-stream' if use_sse else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['X-Session-ID'] = session_id
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/api/qa', methods=['POST'])
 @check_rate_limit
+@check_session
 def answer_qa():
     """Answer natural language questions"""
     try:
@@ -364,10 +721,10 @@ def answer_qa():
         
         # Use cleaned data if available, otherwise use original data
         if 'clean_df' in sessions.get(session_id, {}):
-            qa_df = sessions[session_id]['clean_df']
+            source = 'clean_df'
             print("Using cleaned data for Q&A")
         elif 'df' in sessions.get(session_id, {}):
-            qa_df = sessions[session_id]['df']
+            source = 'df'
             print("Using original data for Q&A (not cleaned yet)")
         else:
             return jsonify({'error': 'No dataset loaded. Please upload a file first.'}), 400
@@ -377,51 +734,236 @@ def answer_qa():
             return jsonify({'error': 'No request data provided'}), 400
             
         question = data.get('question', '')
+        # Charts are rendered on request to /api/qa/charts/<id>; render=true inlines it
+        render = bool(data.get('render', False))
         
         if not question:
             return jsonify({'error': 'No question provided'}), 400
         
-        # Sample for large datasets
-        if len(qa_df) > 50000:
-            qa_df = qa_df.sample(n=min(10000, len(qa_df)), random_state=42)
-            print(f"Sampling large dataset: {len(qa_df)} rows")
+        session = sessions[session_id]
+        # Answers depend only on the data and the canonical question, so sessions
+        # holding the same data share them and rephrased questions hit too
+        cache_key = (_fingerprint(session, source), question_key(question))
+        cached = qa_cache.get(cache_key)
+        if cached is not None and _chart_available(cached):
+            print(f"Q&A cache hit: {cache_key[1]}")
+            _remember_charts(session, source, [cached], [question])
+            response = jsonify(dict(_qa_response(cached, render), session_id=session_id))
+            response.headers['X-Session-ID'] = session_id
+            response.headers['X-Cache'] = 'HIT'
+            return response
         
         # Answer question
         print(f"Processing question: {question}")
-        qa = answer_question(qa_df, question)
-        print(f"Q&A result - message: {bool(qa.message)}, table: {qa.table is not None}, figure: {qa.figure is not None}")
+        qa = _answer(session, source, question)
+        print(f"Q&A result - message: {bool(qa.message)}, table: {qa.table is not None}, chart: {qa.chart is not None}")
         
-        result = {
-            'message': qa.message or '',
-            'table': None,
-            'figure': None,
+        result, size = _qa_payload(qa, _chart_id(cache_key))
+        qa_cache.put(cache_key, result, size)
+        _remember_charts(session, source, [result], [question])
+        response = jsonify(dict(_qa_response(result, render), session_id=session_id))
+        response.headers['X-Session-ID'] = session_id
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"Q&A error: {error_details}")
+        return jsonify({'error': str(e), 'details': error_details}), 500
+
+
+@app.route('/api/qa/batch', methods=['POST'])
+@check_rate_limit
+@check_session
+def answer_qa_batch():
+    """Answer a list of questions in one request, in order, with per-question timing"""
+    try:
+        started = time.perf_counter()
+        session_id = get_session_id()
+        session = sessions.get(session_id, {})
+        if 'clean_df' in session:
+            source = 'clean_df'
+        elif 'df' in session:
+            source = 'df'
+        else:
+            return jsonify({'error': 'No dataset loaded. Please upload a file first.'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        questions = data.get('questions')
+        if not isinstance(questions, list) or not questions or not all(isinstance(q, str) and q.strip() for q in questions):
+            return jsonify({'error': 'questions must be a non-empty list of strings'}), 400
+        if len(questions) > QA_BATCH_MAX:
+            return jsonify({'error': f'At most {QA_BATCH_MAX} questions per batch'}), 400
+        render = bool(data.get('render', False))
+        
+        fingerprint = _fingerprint(session, source)
+        cache_keys = [(fingerprint, question_key(q)) for q in questions]
+        payloads = [qa_cache.get(key) for key in cache_keys]
+        payloads = [p if p is not None and _chart_available(p) else None for p in payloads]
+        timings = [0.0] * len(questions)
+        missing = [i for i, payload in enumerate(payloads) if payload is None]
+        print(f"Q&A batch - {len(questions)} questions, {len(questions) - len(missing)} cached")
+        
+        if missing:
+            qa_df = session[source]
+            cube = _qa_cube(session, source)
+            # One sample for the whole batch; full-data intents still see every row
+            sample = qa_df.sample(n=10000, random_state=42) if len(qa_df) > 50000 else None
+            answers = answer_questions(qa_df, [questions[i] for i in missing], cube=cube, sample=sample, max_workers=QA_WORKERS)
+            for i, (qa, seconds) in zip(missing, answers):
+                payload, size = _qa_payload(qa, _chart_id(cache_keys[i]))
+                if qa.error is None:
+                    qa_cache.put(cache_keys[i], payload, size)
+                else:
+                    # Only this question failed; report it like /api/qa would and retry next time
+                    payload['error'] = qa.error
+                payloads[i] = payload
+                timings[i] = seconds
+        _remember_charts(session, source, payloads, questions)
+        
+        responses = [_qa_response(payload, False) for payload in payloads]
+        if render:
+            # Only charts cost anything to inline, so only those go to the pool, each
+            # once: repeated questions share a chart id and so one Figure
+            chart_ids = list(dict.fromkeys(p['chart']['id'] for p in payloads if p.get('chart') is not None))
+            
+            def render_chart(chart_id):
+                start = time.perf_counter()
+                png = _chart_png(chart_id)
+                return png, time.perf_counter() - start
+            
+            with ThreadPoolExecutor(max_workers=QA_WORKERS) as pool:
+                rendered = dict(zip(chart_ids, pool.map(render_chart, chart_ids)))
+            for i, (payload, response) in enumerate(zip(payloads, responses)):
+                if payload.get('chart') is not None:
+                    png, seconds = rendered[payload['chart']['id']]
+                    response['figure'] = _png_data_uri(png)
+                    timings[i] += seconds
+        
+        missed = set(missing)
+        results = [
+            dict(payload, question=q, elapsed_ms=round(seconds * 1000, 3), cached=i not in missed)
+            for i, (q, payload, seconds) in enumerate(zip(questions, responses, timings))
+        ]
+        response = jsonify({
+            'results': results,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
             'session_id': session_id
-        }
+        })
+        response.headers['X-Session-ID'] = session_id
+        return response
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"Q&A batch error: {error_details}")
+        return jsonify({'error': str(e), 'details': error_details}), 500
+
+
+@app.route('/api/qa/charts/<chart_id>', methods=['GET'])
+@check_rate_limit
+@check_session
+def get_qa_chart(chart_id):
+    """PNG of a Q&A answer's chart, rendered on first request and cached"""
+    try:
+        # Ids derive from the data fingerprint and question, so a chart never changes
+        if chart_id in request.if_none_match:
+            return Response(status=304)
+        png = _chart_png(chart_id)
+        # Answered by another worker, or evicted here: redraw from the session's record
+        if png is None and _redraw_chart(sessions.get(get_session_id(), {}), chart_id):
+            png = _chart_png(chart_id)
+        if png is None:
+            return jsonify({'error': 'Chart expired; ask the question again'}), 404
+        response = Response(png, mimetype='image/png')
+        response.set_etag(chart_id)
+        response.headers['Cache-Control'] = 'private, max-age=86400, immutable'
+        return response
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"Q&A chart error: {error_details}")
+        return jsonify({'error': str(e), 'details': error_details}), 500
+
+
+@app.route('/api/qa/stats', methods=['GET'])
+@check_rate_limit
+def qa_stats():
+    """Per-intent Q&A call counts and timings for this worker"""
+    return jsonify({'intents': intent_stats(), 'cache': qa_cache.stats(), 'charts': qa_charts.stats()})
+
+
+@app.route('/api/sql', methods=['POST'])
+@check_rate_limit
+@check_session
+def run_sql():
+    """Run a read-only SQL query over the session's data, one page at a time"""
+    try:
+        session_id = get_session_id()
+        session = sessions.get(session_id, {})
+        if 'df' not in session and 'clean_df' not in session:
+            return jsonify({'error': 'No dataset loaded. Please upload a file first.'}), 400
         
-        if qa.table is not None:
-            result['table'] = qa.table.to_dict('records')
+        data = request.get_json(silent=True) or {}
+        sql = data.get('sql', '')
+        if not isinstance(sql, str) or not sql.strip():
+            return jsonify({'error': 'No SQL query provided'}), 400
+        try:
+            limit = int(data.get('limit', SQL_PAGE_ROWS))
+            offset = int(data.get('offset', 0))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+        limit = min(limit, SQL_MAX_ROWS)
         
-        if qa.figure is not None:
-            img_buffer = io.BytesIO()
-            qa.figure.savefig(img_buffer, format='png', bbox_inches='tight', dpi=100)
-            img_buffer.seek(0)
-            img_base64 = base64.b64encode(img_buffer.read()).decode('utf-8')
-            result['figure'] = f'data:image/png;base64,{img_base64}'
-            plt.close(qa.figure)
+        started = time.perf_counter()
+        db = _sql_database(session)
+        try:
+            columns, rows, has_more = db.query(sql, limit=limit, offset=offset, timeout=SQL_TIMEOUT)
+        except SQLError as e:
+            return jsonify({'error': str(e)}), 400
         
-        response = jsonify(result)
+        response = jsonify({
+            'columns': columns,
+            'rows': [list(row) for row in rows],
+            'offset': offset,
+            'limit': limit,
+            'has_more': has_more,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+            'session_id': session_id
+        })
         response.headers['X-Session-ID'] = session_id
         return response
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"Q&A error: {error_details}")
+        print(f"SQL error: {error_details}")
         return jsonify({'error': str(e), 'details': error_details}), 500
 
 
-@app.route('/api/insights', methods=['GET'])
+@app.route('/api/sql/tables', methods=['GET'])
+@check_rate_limit
 @check_session
+def sql_tables():
+    """Tables available to /api/sql with their column names and SQL types"""
+    try:
+        session_id = get_session_id()
+        session = sessions.get(session_id, {})
+        if 'df' not in session and 'clean_df' not in session:
+            return jsonify({'error': 'No dataset loaded. Please upload a file first.'}), 400
+        db = _sql_database(session)
+        tables = {name: [{'name': col, 'type': sql_type} for col, sql_type in columns] for name, columns in db.columns.items()}
+        return jsonify({'tables': tables, 'session_id': session_id})
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"SQL tables error: {error_details}")
+        return jsonify({'error': str(e), 'details': error_details}), 500
+
+
+@app.route('/api/insights', methods=['GET'])
 @check_rate_limit
+@check_session
 def get_insights():
     """Generate insights"""
     try:
@@ -438,12 +980,19 @@ def get_insights():
         else:
             return jsonify({'error': 'No dataset loaded. Please upload a file first.'}), 400
         
-        # Sample for large datasets
+        # Large datasets: exact single-pass accumulators over all rows by default,
+        # or the old 10k-row sample with ?mode=sample
+        mode = request.args.get('mode', 'full')
         if len(insights_df) > 50000:
-            insights_df = insights_df.sample(n=min(10000, len(insights_df)), random_state=42)
-            print(f"Sampling large dataset: {len(insights_df)} rows")
-        
-        insights_text = generate_insights(insights_df)
+            if mode == 'sample':
+                insights_df = insights_df.sample(n=min(10000, len(insights_df)), random_state=42)
+                print(f"Sampling large dataset: {len(insights_df)} rows")
+                insights_text = generate_insights(insights_df)
+            else:
+                print(f"Streaming insights over all {len(insights_df)} rows")
+                insights_text = generate_insights_full(insights_df)
+        else:
+            insights_text = generate_insights(insights_df)
         
         sessions[session_id]['insights'] = insights_text
         
@@ -463,8 +1012,8 @@ def get_insights():
 
 
 @app.route('/api/export/excel', methods=['GET'])
-@check_session
 @check_rate_limit
+@check_session
 def export_excel():
     """Export Excel report"""
     try:
@@ -498,17 +1047,28 @@ def export_excel():
         base_name = os.path.splitext(filename)[0]
         charts = sessions[session_id].get('charts', [])
         
-        excel_bytes = export_excel_with_summary(
-            export_df, overview, cleaning_report, insights_text,
-            file_basename=base_name, figs=charts
-        )
-        
-        return send_file(
-            io.BytesIO(excel_bytes),
+        # Write to a temp file in constant memory and stream it from disk
+        fd, excel_path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            write_excel_with_summary(
+                excel_path, export_df, overview, cleaning_report, insights_text,
+                file_basename=base_name, figs=charts
+            )
+        except Exception:
+            _remove_file(excel_path)
+            raise
+        download_name = f"{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        response = Response(
+            _iter_file(excel_path),
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f"{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            headers={
+                'Content-Disposition': f'attachment; filename="{download_name}"',
+                'Content-Length': str(os.path.getsize(excel_path)),
+            }
         )
+        response.call_on_close(lambda: _remove_file(excel_path))
+        return response
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -517,8 +1077,8 @@ def export_excel():
 
 
 @app.route('/api/export/powerbi', methods=['GET'])
-@check_session
 @check_rate_limit
+@check_session
 def export_powerbi():
     """Export Power BI bundle"""
     try:
@@ -547,13 +1107,18 @@ def export_powerbi():
         filename = sessions[session_id].get('filename', 'dataset')
         base_name = os.path.splitext(filename)[0]
         
-        powerbi_bytes = export_powerbi_bundle(export_df, figs=charts)
+        # ?formats=csv,parquet,arrow selects the data files in the bundle (default: csv)
+        try:
+            formats = normalize_export_formats(request.args.get('formats', 'csv').split(','))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return send_file(
-            io.BytesIO(powerbi_bytes),
+        # Stream the ZIP as it is built; the CSV is encoded in row batches
+        download_name = f"{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(
+            iter_powerbi_bundle(export_df, figs=charts, formats=formats, blocks=_export_blocks(sessions[session_id], export_df)),
             mimetype='application/zip',
-            as_attachment=True,
-            download_name=f"{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+            headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
         )
     except Exception as e:
         import traceback
@@ -562,9 +1127,58 @@ def export_powerbi():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/export/pdf', methods=['GET'])
+@app.route('/api/export/tableau', methods=['GET'])
+@check_rate_limit
 @check_session
+def export_tableau():
+    """Export Tableau bundle"""
+    try:
+        session_id = get_session_id()
+        print(f"Tableau export request - Session ID: {session_id}")
+        
+        if session_id not in sessions:
+            error_msg = f'Session not found. Session ID: {session_id}'
+            print(f"ERROR: {error_msg}")
+            return jsonify({'error': error_msg}), 400
+        
+        # Use cleaned data if available, otherwise use original data
+        if 'clean_df' in sessions[session_id]:
+            export_df = sessions[session_id]['clean_df']
+            print("Using cleaned data for Tableau export")
+        elif 'df' in sessions[session_id]:
+            export_df = sessions[session_id]['df']
+            print("Using original data for Tableau export (not cleaned yet)")
+        else:
+            error_msg = 'No dataset loaded. Please upload a file first.'
+            print(f"ERROR: {error_msg}")
+            return jsonify({'error': error_msg}), 400
+        
+        charts = sessions[session_id].get('charts', [])
+        filename = sessions[session_id].get('filename', 'dataset')
+        base_name = os.path.splitext(filename)[0]
+        
+        # ?formats=csv,parquet,arrow selects the data files in the bundle (default: csv)
+        try:
+            formats = normalize_export_formats(request.args.get('formats', 'csv').split(','))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        download_name = f"{base_name}_tableau_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(
+            iter_tableau_bundle(export_df, figs=charts, formats=formats, blocks=_export_blocks(sessions[session_id], export_df)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+        )
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"Tableau export error: {error_details}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/export/pdf', methods=['GET'])
 @check_rate_limit
+@check_session
 def export_pdf():
     """Export PDF report"""
     try:
@@ -597,7 +1211,14 @@ def export_pdf():
         base_name = os.path.splitext(filename)[0]
         charts = sessions[session_id].get('charts', [])
         
-        pdf_bytes = export_pdf_report(base_name, overview, cleaning_report, insights_text, figs=charts)
+        # ?quality=lossless|standard|compact, ?dpi=N and ?vector=1 control chart encoding
+        try:
+            pdf_bytes = export_pdf_report(
+                base_name, overview, cleaning_report, insights_text, figs=charts,
+                **_pdf_options(request.args)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return send_file(
             io.BytesIO(pdf_bytes),
@@ -612,6 +1233,171 @@ def export_pdf():
         return jsonify({'error': str(e)}), 500
 
 
+EXPORT_KINDS = {
+    'excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'powerbi': ('.zip', 'application/zip'),
+    'tableau': ('.zip', 'application/zip'),
+    'pdf': ('.pdf', 'application/pdf'),
+}
+
+
+def _pdf_options(params):
+    """PDF chart options from request args or a JSON body"""
+    dpi = params.get('dpi')
+    if dpi not in (None, ''):
+        try:
+            dpi = int(dpi)
+        except (TypeError, ValueError):
+            raise ValueError(f"dpi must be an integer, got {dpi!r}")
+    vector = params.get('vector', False)
+    if isinstance(vector, str):
+        vector = vector.lower() in ('1', 'true', 'yes')
+    if vector and not PDF_VECTOR_CHARTS:
+        raise ValueError("Vector charts are unavailable: svglib is not installed")
+    return {
+        'image_quality': params.get('quality', 'standard'),
+        'dpi': dpi or None,
+        'vector_charts': bool(vector),
+    }
+
+
+def _write_export(kind, path, progress, export_df, cleaning_report, insights_text, base_name, charts, formats, pdf_options=None, blocks=None):
+    """Build one export artifact at path (runs on the export worker pool)"""
+    if kind == 'excel':
+        overview = compute_overview(export_df)
+        write_excel_with_summary(
+            path, export_df, overview, cleaning_report, insights_text,
+            file_basename=base_name, figs=charts, progress=progress
+        )
+        return
+    if kind == 'pdf':
+        overview = compute_overview(export_df)
+        pdf_bytes = export_pdf_report(base_name, overview, cleaning_report, insights_text, figs=charts, **(pdf_options or {}))
+        with open(path, 'wb') as f:
+            f.write(pdf_bytes)
+        return
+    bundle = iter_powerbi_bundle if kind == 'powerbi' else iter_tableau_bundle
+    with open(path, 'wb') as f:
+        for piece in bundle(export_df, figs=charts, formats=formats, blocks=blocks):
+            f.write(piece)
+
+
+def _job_response(job):
+    """Public view of an export job record"""
+    body = {
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'cached': job['cached'],
+        'error': job['error'],
+    }
+    if job['status'] == 'done':
+        body['download_url'] = f"/api/export/jobs/{job['id']}/download"
+    return body
+
+
+@app.route('/api/export/jobs', methods=['POST'])
+@check_rate_limit
+@check_session
+def submit_export_job():
+    """Start a background export; poll /api/export/jobs/<job_id> and download when done"""
+    try:
+        session_id = get_session_id()
+        data = request.get_json(silent=True) or {}
+        kind = data.get('kind', '')
+        if kind not in EXPORT_KINDS:
+            return jsonify({'error': f"Unknown export kind '{kind}'. Choose from {', '.join(EXPORT_KINDS)}"}), 400
+        
+        if 'clean_df' in sessions[session_id]:
+            export_source = 'clean_df'
+            cleaning_report = sessions[session_id].get('cleaning_report', {})
+        elif 'df' in sessions[session_id]:
+            export_source = 'df'
+            cleaning_report = {}
+        else:
+            return jsonify({'error': 'No dataset loaded. Please upload a file first.'}), 400
+        export_df = sessions[session_id][export_source]
+        
+        formats = []
+        if kind in ('powerbi', 'tableau'):
+            try:
+                formats = normalize_export_formats(data.get('formats') or ['csv'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        pdf_options = None
+        if kind == 'pdf':
+            try:
+                pdf_options = _pdf_options(data)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if pdf_options['image_quality'] not in PDF_IMAGE_QUALITY:
+                return jsonify({'error': f"Unsupported image quality: {pdf_options['image_quality']}"}), 400
+        
+        insights_text = sessions[session_id].get('insights', '')
+        filename = sessions[session_id].get('filename', 'dataset')
+        base_name = os.path.splitext(filename)[0]
+        charts = list(sessions[session_id].get('charts', []))
+        
+        # Everything the artifact depends on besides the data itself goes into the cache key
+        options = {
+            'formats': formats,
+            'pdf': pdf_options,
+            'base_name': base_name,
+            'insights': insights_text,
+            'cleaning_report': str(cleaning_report),
+            'charts': [title for title, _ in charts],
+        }
+        key = artifact_key(_fingerprint(sessions[session_id], export_source), kind, options)
+        extension, mimetype = EXPORT_KINDS[kind]
+        suffix = '_tableau' if kind == 'tableau' else ''
+        download_name = f"{base_name}{suffix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+        
+        blocks = _export_blocks(sessions[session_id], export_df)
+        
+        def build(path, progress):
+            _write_export(kind, path, progress, export_df, cleaning_report, insights_text, base_name, charts, formats, pdf_options, blocks)
+        
+        try:
+            job = export_jobs.submit(session_id, kind, key, extension, download_name, mimetype, build)
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 429
+        print(f"Export job {job['id']} ({kind}) submitted - cached: {job['cached']}")
+        return jsonify(_job_response(job)), 202
+    except Exception as e:
+        import traceback
+        print(f"Export job submit error: {traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/export/jobs/<job_id>', methods=['GET'])
+@check_rate_limit
+@check_session
+def export_job_status(job_id):
+    """Status and progress of a background export"""
+    job = export_jobs.get(job_id)
+    if job is None or job['owner'] != get_session_id():
+        return jsonify({'error': 'Export job not found'}), 404
+    return jsonify(_job_response(job))
+
+
+@app.route('/api/export/jobs/<job_id>/download', methods=['GET'])
+@check_rate_limit
+@check_session
+def export_job_download(job_id):
+    """Download the artifact of a finished export job"""
+    job = export_jobs.get(job_id)
+    if job is None or job['owner'] != get_session_id():
+        return jsonify({'error': 'Export job not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Export job is {job['status']}", **_job_response(job)}), 409
+    path = export_jobs.artifact_path(job['key'], job['extension'])
+    if not os.path.exists(path):
+        return jsonify({'error': 'Export artifact has expired, please submit the export again'}), 410
+    return send_file(path, mimetype=job['mimetype'], as_attachment=True, download_name=job['filename'])
+
+
 # Global error handler
 @app.errorhandler(Exception)
 def handle_exception(e):
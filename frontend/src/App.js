@@ -374,6 +374,11 @@ function App() {
                       setLoading(false);
                     }
                   }}
+                  onLoadChart={async (chart) => {
+                    // Charts are rendered on demand, after the answer text is shown
+                    const blob = await apiRequest('GET', chart.url.replace(/^\/api/, ''), null, { responseType: 'blob' });
+                    return URL.createObjectURL(blob);
+                  }}
                   loading={loading}
                 />
 
@@ -1,6 +1,6 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 
-const ChatWithData = ({ onAskQuestion, loading }) => {
+const ChatWithData = ({ onAskQuestion, onLoadChart, loading }) => {
   const [question, setQuestion] = useState('');
   const [answer, setAnswer] = useState(null);
   const [asking, setAsking] = useState(false);
@@ -13,6 +13,11 @@ const ChatWithData = ({ onAskQuestion, loading }) => {
     try {
       const result = await onAskQuestion(question);
       setAnswer(result);
+      if (result && result.chart && !result.figure && onLoadChart) {
+        onLoadChart(result.chart)
+          .then((figure) => setAnswer((current) => (current === result ? { ...result, figure } : current)))
+          .catch((err) => console.error('Chart load error:', err));
+      }
     } catch (err) {
       setAnswer({ error: 'Failed to get answer' });
     } finally {
@@ -20,6 +25,12 @@ const ChatWithData = ({ onAskQuestion, loading }) => {
     }
   };
 
+  // Release the previous chart image when a new answer replaces it
+  const figure = answer && answer.figure;
+  useEffect(() => () => {
+    if (figure && figure.startsWith('blob:')) URL.revokeObjectURL(figure);
+  }, [figure]);
+
   return (
     <div className="section-card">
       <h2>💬 Chat with Your Data</h2>
@@ -95,7 +106,7 @@ const ChatWithData = ({ onAskQuestion, loading }) => {
 
               {answer.figure && (
                 <div className="chart-container">
-                  <img src={answer.figure} alt="Q&A Chart" />
+                  <img src={answer.figure} alt={answer.chart?.title || 'Q&A Chart'} />
                 </div>
               )}
             </>
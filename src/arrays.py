@@ -0,0 +1,19 @@
+from typing import List, Optional, Sequence
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+
+def numeric_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> List[str]:
+	if columns is not None:
+		return list(columns)
+	# Same selection as select_dtypes(include=[np.number]) without copying the frame
+	return [col for col, dtype in df.dtypes.items() if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)]
+
+
+def float_block(df: pd.DataFrame, cols: Sequence[str]) -> np.ndarray:
+	"""Column-major float64 copy of df[cols] with NaN for missing; each column is one contiguous run."""
+	block = np.empty((len(df), len(cols)), dtype=np.float64, order="F")
+	for j, col in enumerate(cols):
+		block[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+	return block
@@ -0,0 +1,151 @@
+from typing import List, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_object_dtype, is_string_dtype
+
+
+MEASURES = ("cramers_v", "mutual_info")
+
+
+class FactorizedColumns:
+	"""Categorical columns encoded once as integer codes.
+
+	codes has shape (rows, columns) in column-major int32; column j uses codes
+	0..levels[j] - 1 for its values and levels[j] itself for missing.
+	"""
+
+	def __init__(self, columns: Sequence[str], codes: np.ndarray, levels: np.ndarray):
+		self.columns = list(columns)
+		self.codes = codes
+		self.levels = levels
+
+
+def categorical_columns(df: pd.DataFrame) -> List[str]:
+	return [
+		col for col, dtype in df.dtypes.items()
+		if is_object_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype) or is_string_dtype(dtype) or is_bool_dtype(dtype)
+	]
+
+
+def factorize_columns(
+	df: pd.DataFrame,
+	columns: Optional[Sequence[str]] = None,
+	max_levels: int = 50,
+	max_unique_ratio: float = 0.5,
+) -> FactorizedColumns:
+	"""Factorize categorical columns, capping each at max_levels codes.
+
+	Levels beyond the max_levels - 1 most frequent share one "other" code. Columns with
+	a single level, or that look like identifiers (more than max_unique_ratio of rows
+	distinct), are left out.
+	"""
+	cols = list(columns) if columns is not None else categorical_columns(df)
+	n = len(df)
+	kept, code_arrays, levels = [], [], []
+	for col in cols:
+		codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+		k = len(uniques)
+		if k < 2 or (n and k > max_unique_ratio * n and k > max_levels):
+			continue
+		if k > max_levels:
+			freq = np.bincount(codes[codes >= 0], minlength=k)
+			top = np.argsort(-freq, kind="stable")[: max_levels - 1]
+			remap = np.full(k, max_levels - 1, dtype=np.int64)
+			remap[top] = np.arange(max_levels - 1)
+			codes = np.where(codes >= 0, remap[codes], -1)
+			k = max_levels
+		kept.append(col)
+		code_arrays.append(codes)
+		levels.append(k)
+	codes = np.empty((n, len(kept)), dtype=np.int32, order="F")
+	for j, (arr, k) in enumerate(zip(code_arrays, levels)):
+		codes[:, j] = np.where(arr >= 0, arr, k)
+	return FactorizedColumns(kept, codes, np.asarray(levels, dtype=np.int64))
+
+
+def _contingency_tables(fc: FactorizedColumns, global_codes: np.ndarray, offsets: np.ndarray, a: int, start: int, stop: int) -> np.ndarray:
+	"""Contingency tables of column a against columns start..stop-1 with one bincount.
+
+	global_codes holds every column's codes shifted by offsets so that the group's
+	codes are disjoint; one add and one bincount give all tables side by side.
+	Returns an array of shape (stop - start, levels[a], max level in group), zero-padded,
+	with missing values dropped.
+	"""
+	ka = int(fc.levels[a])
+	width = int(offsets[stop] - offsets[start])
+	row_base = fc.codes[:, a].astype(np.intp) * width - offsets[start]
+	idx = np.add(global_codes[:, start:stop], row_base[:, None], order="F")
+	counts = np.bincount(idx.ravel(order="K"), minlength=(ka + 1) * width).reshape(ka + 1, width)
+	# Drop the missing row, then gather each column's block into a padded layout,
+	# pointing padding at an all-zero column
+	counts = np.concatenate([counts[:ka], np.zeros((ka, 1), dtype=counts.dtype)], axis=1)
+	levels = fc.levels[start:stop]
+	kmax = int(levels.max())
+	pos = np.arange(kmax)
+	gather = (offsets[start:stop] - offsets[start])[:, None] + pos
+	gather = np.where(pos < levels[:, None], gather, width)
+	return counts[:, gather].transpose(1, 0, 2).astype(np.float64)
+
+
+def _measure(tables: np.ndarray, measure: str) -> np.ndarray:
+	n = tables.sum(axis=(1, 2))
+	rows = tables.sum(axis=2)
+	cols = tables.sum(axis=1)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		if measure == "cramers_v":
+			expected = rows[:, :, None] * cols[:, None, :] / n[:, None, None]
+			chi2 = np.where(expected > 0, (tables - expected) ** 2 / expected, 0.0).sum(axis=(1, 2))
+			k = np.minimum((rows > 0).sum(axis=1), (cols > 0).sum(axis=1))
+			value = np.sqrt(chi2 / n / (k - 1))
+			value[(k < 2) | (n == 0)] = np.nan
+			return np.clip(value, 0.0, 1.0)
+		if measure == "mutual_info":
+			# Normalized by sqrt(H(a) * H(b)) so that values lie in [0, 1]
+			p = tables / n[:, None, None]
+			pr = rows / n[:, None]
+			pc = cols / n[:, None]
+			ratio = p / (pr[:, :, None] * pc[:, None, :])
+			mi = np.where(p > 0, p * np.log(ratio), 0.0).sum(axis=(1, 2))
+			hr = -np.where(pr > 0, pr * np.log(pr), 0.0).sum(axis=1)
+			hc = -np.where(pc > 0, pc * np.log(pc), 0.0).sum(axis=1)
+			value = mi / np.sqrt(hr * hc)
+			value[~(hr > 0) | ~(hc > 0)] = np.nan
+			return np.clip(value, 0.0, 1.0)
+	raise ValueError(f"Unsupported association measure: {measure}")
+
+
+def rank_associations(
+	df: pd.DataFrame,
+	measure: str = "cramers_v",
+	k: int = 5,
+	min_value: float = 0.0,
+	columns: Optional[Sequence[str]] = None,
+	max_levels: int = 50,
+	max_cells: int = 16_000_000,
+	factorized: Optional[FactorizedColumns] = None,
+) -> List[Tuple[str, str, float]]:
+	"""Top-k categorical column pairs by Cramér's V or normalized mutual information.
+
+	Every column is factorized once; for each column, the tables against all later
+	columns come from a single bincount over at most max_cells index values.
+	"""
+	fc = factorized if factorized is not None else factorize_columns(df, columns, max_levels)
+	p = len(fc.columns)
+	pairs: List[Tuple[int, int, float]] = []
+	if p < 2 or k <= 0:
+		return []
+	# Each column occupies levels + 1 slots (the extra one for missing)
+	offsets = np.concatenate([[0], np.cumsum(fc.levels + 1)]).astype(np.int64)
+	global_codes = fc.codes + offsets[:-1].astype(fc.codes.dtype)
+	group_width = max(1, max_cells // max(fc.codes.shape[0], 1))
+	for a in range(p - 1):
+		for start in range(a + 1, p, group_width):
+			stop = min(start + group_width, p)
+			values = _measure(_contingency_tables(fc, global_codes, offsets, a, start, stop), measure)
+			keep = np.flatnonzero(np.isfinite(values) & (values >= min_value))
+			pairs.extend((a, start + int(j), float(values[j])) for j in keep)
+		if len(pairs) > 4 * k:
+			pairs.sort(key=lambda x: -x[2])
+			del pairs[k:]
+	pairs.sort(key=lambda x: -x[2])
+	return [(fc.columns[a], fc.columns[b], v) for a, b, v in pairs[:k]]
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+	"""Thread-safe LRU cache bounded by entry count and by an approximate byte budget.
+
+	Callers pass each value's size; the least recently used entries are evicted until
+	both limits hold. A value larger than the whole budget is not stored.
+	"""
+
+	def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+		self._bytes = 0
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key: Hashable) -> Optional[Any]:
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			self._data.move_to_end(key)
+			self.hits += 1
+			return entry[0]
+
+	def put(self, key: Hashable, value: Any, size: int) -> None:
+		with self._lock:
+			old = self._data.pop(key, None)
+			if old is not None:
+				self._bytes -= old[1]
+			if size > self.max_bytes:
+				return
+			self._data[key] = (value, size)
+			self._bytes += size
+			while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+				_, (_, evicted) = self._data.popitem(last=False)
+				self._bytes -= evicted
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+			self._bytes = 0
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {"entries": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,220 @@
+import warnings
+from typing import List, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+from src.arrays import float_block, numeric_columns
+
+
+METHODS = ("pearson", "spearman")
+
+
+def _prepare(df: pd.DataFrame, cols: Sequence[str], method: str) -> np.ndarray:
+	if method == "pearson":
+		return float_block(df, cols)
+	if method == "spearman":
+		# Spearman = Pearson on average ranks; NaNs stay NaN
+		block = np.empty((len(df), len(cols)), dtype=np.float64, order="F")
+		for j, col in enumerate(cols):
+			block[:, j] = df[col].rank(method="average").to_numpy(dtype=np.float64, na_value=np.nan)
+		return block
+	raise ValueError(f"Unsupported correlation method: {method}")
+
+
+def _standardize(block: np.ndarray) -> np.ndarray:
+	"""Scale complete columns so that Z.T @ Z is their correlation matrix; constant columns become NaN."""
+	centered = block - block.mean(axis=0)
+	norms = np.sqrt(np.einsum("ij,ij->j", centered, centered))
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return centered / np.where(norms > 0, norms, np.nan)
+
+
+def _column_block(df: pd.DataFrame, cols: Sequence[str], method: str) -> Tuple[np.ndarray, bool]:
+	"""One block of columns ready for correlation, and whether it has no missing values.
+
+	Complete blocks are standardized; others are only mean-shifted for numerical
+	stability, which does not change their correlations.
+	"""
+	block = _prepare(df, cols, method)
+	if not np.isnan(block).any():
+		return _standardize(block), True
+	with warnings.catch_warnings():
+		warnings.simplefilter("ignore", RuntimeWarning)
+		return block - np.nanmean(block, axis=0), False
+
+
+def _pairwise_block(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+	"""Pearson correlation of every column of x with every column of y over pairwise-complete rows.
+
+	Inputs are mean-shifted with NaNs; all sums come from six matrix products.
+	"""
+	mx, my = ~np.isnan(x), ~np.isnan(y)
+	x0, y0 = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+	mx, my = mx.astype(np.float64), my.astype(np.float64)
+	n = mx.T @ my
+	sx = x0.T @ my
+	sy = mx.T @ y0
+	sxx = (x0 * x0).T @ my
+	syy = mx.T @ (y0 * y0)
+	sxy = x0.T @ y0
+	with np.errstate(divide="ignore", invalid="ignore"):
+		cov = n * sxy - sx * sy
+		var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+		r = cov / np.sqrt(var)
+	r[(n < 2) | ~(var > 0)] = np.nan
+	return np.clip(r, -1.0, 1.0)
+
+
+class _TopK:
+	"""Keeps the k largest |r| pairs seen so far using argpartition."""
+
+	def __init__(self, k: int, min_abs: float):
+		self.k = k
+		self.min_abs = min_abs
+		self.rows = np.empty(0, dtype=np.int64)
+		self.cols = np.empty(0, dtype=np.int64)
+		self.values = np.empty(0, dtype=np.float64)
+
+	def offer(self, corr: np.ndarray, row_offset: int, col_offset: int, upper_only: bool) -> None:
+		absolute = np.abs(corr)
+		keep = np.isfinite(absolute) & (absolute >= self.min_abs)
+		if upper_only:
+			keep &= np.triu(np.ones(corr.shape, dtype=bool), k=1)
+		flat = np.flatnonzero(keep)
+		if flat.size == 0:
+			return
+		if flat.size > self.k:
+			flat = flat[np.argpartition(-absolute.ravel()[flat], self.k - 1)[: self.k]]
+		r, c = np.unravel_index(flat, corr.shape)
+		self.rows = np.concatenate([self.rows, r + row_offset])
+		self.cols = np.concatenate([self.cols, c + col_offset])
+		self.values = np.concatenate([self.values, corr.ravel()[flat]])
+		if self.values.size > self.k:
+			sel = np.argpartition(-np.abs(self.values), self.k - 1)[: self.k]
+			self.rows, self.cols, self.values = self.rows[sel], self.cols[sel], self.values[sel]
+
+	def result(self, cols: Sequence[str]) -> List[Tuple[str, str, float]]:
+		# Strongest first; ties keep column order like a row-major scan of the matrix
+		order = np.lexsort((self.cols, self.rows, -np.abs(self.values)))
+		return [(cols[self.rows[i]], cols[self.cols[i]], float(self.values[i])) for i in order]
+
+
+def top_correlations(
+	df: pd.DataFrame,
+	k: int = 5,
+	method: str = "pearson",
+	min_abs: float = 0.0,
+	columns: Optional[Sequence[str]] = None,
+	block_size: int = 256,
+) -> List[Tuple[str, str, float]]:
+	"""The k most strongly correlated numeric column pairs as (col_a, col_b, r), strongest first.
+
+	Only the upper triangle is computed, block_size columns at a time: each block is
+	converted and standardized on its own and only the running top-k survives each
+	block pair, so memory is O(n * block_size + block_size^2) rather than
+	O(n * p + p^2). Missing values are handled pairwise, like DataFrame.corr. For
+	spearman each column is ranked once over all of its non-missing values and the
+	ranks are then correlated pairwise, i.e. df.rank().corr(); DataFrame.corr
+	re-ranks every pair over its complete rows instead, so the two only agree
+	when there are no missing values.
+	"""
+	cols = numeric_columns(df, columns)
+	p = len(cols)
+	top = _TopK(k, min_abs)
+	if p < 2 or k <= 0:
+		return []
+	for i in range(0, p, block_size):
+		left, left_complete = _column_block(df, cols[i:i + block_size], method)
+		for j in range(i, p, block_size):
+			if j == i:
+				right, right_complete = left, left_complete
+			else:
+				right, right_complete = _column_block(df, cols[j:j + block_size], method)
+			if left_complete and right_complete:
+				corr = np.clip(left.T @ right, -1.0, 1.0)
+			else:
+				# Standardizing a complete block does not change pairwise correlations
+				corr = _pairwise_block(left, right)
+			top.offer(corr, i, j, upper_only=(i == j))
+	return top.result(cols)
+
+
+class CoMomentAccumulator:
+	"""Mergeable pairwise means and co-moments for streaming Pearson correlation.
+
+	Every column pair keeps its own count, means and sums of squared deviations over
+	the rows where both columns are present, like DataFrame.corr, so a sparse or
+	all-missing column only affects its own pairs. Chunks are folded in with Chan et
+	al.'s pairwise update, so accumulators built on separate chunks (or workers) can
+	be merged exactly. Entry [i, j] of each matrix describes column i within pair (i, j).
+	State is four p x p matrices (32 bytes per column pair), so keep p bounded.
+	"""
+
+	def __init__(self, columns: Sequence[str]):
+		self.columns = list(columns)
+		p = len(self.columns)
+		self.n = np.zeros((p, p), dtype=np.int64)
+		self.mean = np.zeros((p, p))
+		self.m2 = np.zeros((p, p))
+		self.comoment = np.zeros((p, p))
+
+	def update(self, chunk: pd.DataFrame) -> "CoMomentAccumulator":
+		return self.update_block(float_block(chunk, self.columns))
+
+	def update_block(self, block: np.ndarray) -> "CoMomentAccumulator":
+		if block.shape[0] == 0:
+			return self
+		other = CoMomentAccumulator(self.columns)
+		present = ~np.isnan(block)
+		if present.all():
+			mean = block.mean(axis=0)
+			centered = block - mean
+			other.n[:] = block.shape[0]
+			other.mean[:] = mean[:, None]
+			other.m2[:] = np.einsum("ij,ij->j", centered, centered)[:, None]
+			other.comoment = centered.T @ centered
+			return self.merge(other)
+		with warnings.catch_warnings():
+			# Columns that are all-NaN in this chunk are masked out by n == 0
+			warnings.simplefilter("ignore", RuntimeWarning)
+			shift = np.nan_to_num(np.nanmean(block, axis=0))
+		# Shifted by column means for numerical stability; missing values contribute nothing
+		x = np.where(present, block - shift, 0.0)
+		mask = present.astype(np.float64)
+		n = mask.T @ mask
+		sums = x.T @ mask
+		with np.errstate(divide="ignore", invalid="ignore"):
+			means = np.where(n > 0, sums / n, 0.0)
+		other.n = n.astype(np.int64)
+		other.mean = np.where(n > 0, means + shift[:, None], 0.0)
+		other.m2 = np.maximum((x * x).T @ mask - sums * means, 0.0)
+		other.comoment = x.T @ x - sums * means.T
+		return self.merge(other)
+
+	def merge(self, other: "CoMomentAccumulator") -> "CoMomentAccumulator":
+		n = self.n + other.n
+		with np.errstate(divide="ignore", invalid="ignore"):
+			delta = other.mean - self.mean
+			weight = np.where(n > 0, other.n / n, 0.0)
+			factor = np.where(n > 0, self.n * other.n / n, 0.0)
+		self.comoment = self.comoment + other.comoment + delta * delta.T * factor
+		self.m2 = self.m2 + other.m2 + delta ** 2 * factor
+		self.mean = self.mean + delta * weight
+		self.n = n
+		return self
+
+	def covariance(self, ddof: int = 1) -> np.ndarray:
+		with np.errstate(divide="ignore", invalid="ignore"):
+			return np.where(self.n > ddof, self.comoment / (self.n - ddof), np.nan)
+
+	def correlation(self) -> np.ndarray:
+		denominator = self.m2 * self.m2.T
+		with np.errstate(divide="ignore", invalid="ignore"):
+			corr = self.comoment / np.sqrt(denominator)
+		corr[(self.n < 2) | ~(denominator > 0)] = np.nan
+		return np.clip(corr, -1.0, 1.0)
+
+	def top_correlations(self, k: int = 5, min_abs: float = 0.0) -> List[Tuple[str, str, float]]:
+		top = _TopK(k, min_abs)
+		if len(self.columns) >= 2 and k > 0:
+			top.offer(self.correlation(), 0, 0, upper_only=True)
+		return top.result(self.columns)
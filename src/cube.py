@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Sequence
+import pandas as pd
+import numpy as np
+from src.schema import schema_index
+from src.timeseries import bucket_dates, choose_granularity
+
+
+# How each statistic combines when groups are merged into coarser ones
+STATS = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+# Time grains kept by the cube, finest first; "hour" only when the data spans a few weeks
+CUBE_GRAINS = ("hour", "day", "week", "month", "year")
+
+# (grain, finer grain it is rolled up from); weeks straddle months, so both come from days
+_ROLLUPS = (("day", "hour"), ("week", "day"), ("month", "day"), ("year", "month"))
+
+
+class Aggregates:
+	"""Row counts plus sum/count/min/max of every measure for each group.
+
+	rows is indexed by group key; stats maps each statistic to a frame with the same
+	index and one column per measure.
+	"""
+
+	def __init__(self, rows: pd.Series, stats: Dict[str, pd.DataFrame]):
+		self.rows = rows
+		self.stats = stats
+
+	@classmethod
+	def from_frame(cls, df: pd.DataFrame, measures: Sequence[str], keys) -> "Aggregates":
+		# Same grouping as df.groupby(col): sorted keys, missing keys dropped
+		rows = df.groupby(keys, sort=True, observed=False).size()
+		measures = list(measures)
+		if measures:
+			grouped = df[measures].groupby(keys, sort=True, observed=False)
+			stats = {stat: grouped.agg(stat).reindex(rows.index) for stat in STATS}
+		else:
+			stats = {stat: pd.DataFrame(index=rows.index) for stat in STATS}
+		return cls(rows, stats)
+
+	def rollup(self, keys) -> "Aggregates":
+		"""Merge groups that share a key in keys (aligned with the current index)."""
+		rows = self.rows.groupby(keys, sort=True).sum()
+		stats = {stat: self.stats[stat].groupby(keys, sort=True).agg(how).reindex(rows.index) for stat, how in STATS.items()}
+		return Aggregates(rows, stats)
+
+	def select(self, mask: np.ndarray) -> "Aggregates":
+		return Aggregates(self.rows[mask], {stat: frame[mask] for stat, frame in self.stats.items()})
+
+	def total(self, measure: str) -> Dict[str, float]:
+		"""Overall statistics of one measure across the selected groups."""
+		total = float(self.stats["sum"][measure].sum())
+		count = int(self.stats["count"][measure].sum())
+		return {
+			"count": count,
+			"sum": total,
+			"mean": total / count if count else float("nan"),
+			"min": float(self.stats["min"][measure].min()),
+			"max": float(self.stats["max"][measure].max()),
+		}
+
+
+class MeasureCube:
+	"""Pre-aggregated measures of one dataset by time grain and by dimension.
+
+	grains maps each time grain to Aggregates over date_col buckets; dimensions maps
+	each low-cardinality column to Aggregates over its values; totals covers all rows.
+	"""
+
+	def __init__(self, n_rows: int, date_col: Optional[str], measures: List[str], totals: Aggregates, grains: Dict[str, Aggregates], dimensions: Dict[str, Aggregates], date_min=None, date_max=None):
+		self.n_rows = n_rows
+		self.date_col = date_col
+		self.measures = measures
+		self.totals = totals
+		self.grains = grains
+		self.dimensions = dimensions
+		self.date_min = date_min
+		self.date_max = date_max
+
+	def covers(self, date_col: Optional[str] = None, measures: Sequence[str] = (), dimension: Optional[str] = None) -> bool:
+		if date_col is not None and date_col != self.date_col:
+			return False
+		if dimension is not None and dimension not in self.dimensions:
+			return False
+		return all(m in self.measures for m in measures)
+
+
+def build_cube(
+	df: pd.DataFrame,
+	date_col: Optional[str] = None,
+	measures: Optional[Sequence[str]] = None,
+	dimensions: Optional[Sequence[str]] = None,
+	max_measures: int = 50,
+	max_dimensions: int = 8,
+	max_levels: int = 100,
+) -> MeasureCube:
+	"""Aggregate df once for Q&A.
+
+	Defaults take the date role from the schema index, the first max_measures numeric
+	columns (always including the sales role when numeric) and up to max_dimensions
+	categorical columns with at most max_levels distinct values.
+	"""
+	schema = schema_index(df)
+	if date_col is None:
+		date_col = schema.role("date")
+	if measures is None:
+		measures = schema.numeric[:max_measures]
+		sales = schema.role("sales")
+		if sales in schema.numeric and sales not in measures:
+			measures.append(sales)
+	measures = list(measures)
+	if dimensions is None:
+		dimensions = []
+		for col in schema.categorical:
+			if len(dimensions) >= max_dimensions:
+				break
+			if df[col].nunique() <= max_levels:
+				dimensions.append(col)
+
+	totals = Aggregates.from_frame(df, measures, np.zeros(len(df), dtype=np.int64))
+	dims = {col: Aggregates.from_frame(df, measures, df[col]) for col in dimensions}
+	grains: Dict[str, Aggregates] = {}
+	date_min = date_max = None
+	if date_col is not None and df[date_col].notna().any():
+		dates = df[date_col]
+		date_min, date_max = dates.min(), dates.max()
+		base = "hour" if choose_granularity(date_min, date_max) == "hour" else "day"
+		grains[base] = Aggregates.from_frame(df, measures, bucket_dates(dates, base))
+		for grain, source in _ROLLUPS:
+			if grain not in grains and source in grains:
+				index = grains[source].rows.index.to_numpy(dtype="datetime64[ns]")
+				keys = index.astype("datetime64[Y]").astype("datetime64[ns]") if grain == "year" else bucket_dates(pd.Series(index), grain)
+				grains[grain] = grains[source].rollup(keys)
+	return MeasureCube(len(df), date_col, measures, totals, grains, dims, date_min, date_max)
@@ -1,18 +1,21 @@
-from typing import List, Tuple, Dict
+from typing import Callable, Dict, Iterator, List, Tuple
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
+from src.figures import new_figure
+from src.timeseries import GRANULARITY_LABELS, aggregate_time_series, downsample_series
 
 
-plt.switch_backend("Agg")
+# Point budgets for time-series charts: buckets to aggregate into, then points to draw
+TS_AGGREGATE_POINTS = 2000
+TS_RENDER_POINTS = 500
 
 
-def _plot_distributions(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
-	figures = []
+def _plot_distributions(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
 	for col in df.columns[:10]:
-		fig, ax = plt.subplots(figsize=(6, 4))
+		fig, ax = new_figure(figsize=(6, 4))
 		if is_numeric_dtype(df[col]):
 			sns.histplot(df[col].dropna(), kde=True, ax=ax)
 			ax.set_title(f"Distribution: {col}")
@@ -26,41 +29,35 @@ def _plot_distributions(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
 			vc = df[col].astype(str).value_counts().head(10)
 			sns.barplot(x=vc.values, y=vc.index, ax=ax)
 			ax.set_title(f"Top Categories: {col}")
-		figures.append((f"{col}", fig))
-	return figures
+		yield f"{col}", fig
 
 
-def _plot_boxplots(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
-	figures = []
-	for col in df.columns:
-		if is_numeric_dtype(df[col]):
-			fig, ax = plt.subplots(figsize=(6, 3))
-			sns.boxplot(x=df[col], ax=ax)
-			ax.set_title(f"Boxplot: {col}")
-			figures.append((f"Boxplot: {col}", fig))
-	return figures[:5]
+def _plot_boxplots(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
+	numeric_cols = [col for col in df.columns if is_numeric_dtype(df[col])]
+	for col in numeric_cols[:5]:
+		fig, ax = new_figure(figsize=(6, 3))
+		sns.boxplot(x=df[col], ax=ax)
+		ax.set_title(f"Boxplot: {col}")
+		yield f"Boxplot: {col}", fig
 
 
-def _plot_violin_plots(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
-	figures = []
-	for col in df.columns:
-		if is_numeric_dtype(df[col]):
-			fig, ax = plt.subplots(figsize=(6, 4))
-			sns.violinplot(x=df[col], ax=ax)
-			ax.set_title(f"Violin Plot: {col}")
-			figures.append((f"Violin Plot: {col}", fig))
-	return figures[:5]
+def _plot_violin_plots(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
+	numeric_cols = [col for col in df.columns if is_numeric_dtype(df[col])]
+	for col in numeric_cols[:5]:
+		fig, ax = new_figure(figsize=(6, 4))
+		sns.violinplot(x=df[col], ax=ax)
+		ax.set_title(f"Violin Plot: {col}")
+		yield f"Violin Plot: {col}", fig
 
 
-def _plot_scatter_plots(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
-	figures = []
+def _plot_scatter_plots(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
 	numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
 	
 	if len(numeric_cols) >= 2:
 		# Create scatter plot matrix for first 4 numeric columns
 		cols_to_plot = numeric_cols[:4]
 		if len(cols_to_plot) >= 2:
-			fig, axes = plt.subplots(len(cols_to_plot)-1, len(cols_to_plot)-1, figsize=(12, 10))
+			fig, axes = new_figure(len(cols_to_plot)-1, len(cols_to_plot)-1, figsize=(12, 10))
 			if len(cols_to_plot) == 2:
 				axes = np.array([[axes]])
 			
@@ -76,62 +73,69 @@ def _plot_scatter_plots(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
 					axes[row, col].set_title(f"{cols_to_plot[i]} vs {cols_to_plot[j]}")
 					plot_idx += 1
 			
-			plt.tight_layout()
-			figures.append(("Scatter Matrix", fig))
-	
-	return figures
+			fig.tight_layout()
+			yield "Scatter Matrix", fig
 
 
-def _plot_time_series(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
-	figures = []
+def _plot_time_series(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
 	date_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
+	# Find numeric columns for time series
+	numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()[:3]  # Limit to 3 numeric columns
+	if not numeric_cols:
+		return
 	
 	for date_col in date_cols[:3]:  # Limit to 3 date columns
-		# Find numeric columns for time series
-		numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+		# All metrics in one grouped pass, at a resolution chosen from the date span
+		series_df, granularity = aggregate_time_series(df, date_col, numeric_cols, agg="mean", max_points=TS_AGGREGATE_POINTS)
 		
-		for num_col in numeric_cols[:3]:  # Limit to 3 numeric columns
-			fig, ax = plt.subplots(figsize=(10, 4))
+		for num_col in numeric_cols:
+			fig, ax = new_figure(figsize=(10, 4))
 			
-			# Group by date and calculate mean
-			time_series = df.groupby(df[date_col].dt.to_period('D'))[num_col].mean()
+			time_series = downsample_series(series_df[num_col].dropna(), TS_RENDER_POINTS)
+			marker = 'o' if len(time_series) <= 60 else None
 			
-			ax.plot(time_series.index.to_timestamp(), time_series.values, marker='o', linewidth=2)
-			ax.set_title(f"Time Series: {num_col} over {date_col}")
+			ax.plot(time_series.index, time_series.values, marker=marker, linewidth=2)
+			ax.set_title(f"Time Series: {num_col} over {date_col} ({GRANULARITY_LABELS[granularity].lower()} mean)")
 			ax.set_xlabel("Date")
 			ax.set_ylabel(num_col)
 			ax.tick_params(axis='x', rotation=45)
 			
-			figures.append((f"Time Series: {num_col}", fig))
-	
-	return figures
+			yield f"Time Series: {num_col}", fig
 
 
-def _plot_correlation(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
+def _plot_correlation(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
 	num_df = df.select_dtypes(include=[np.number])
 	if num_df.shape[1] < 2:
-		return []
+		return
 	corr = num_df.corr(numeric_only=True)
-	fig, ax = plt.subplots(figsize=(6, 5))
+	fig, ax = new_figure(figsize=(6, 5))
 	sns.heatmap(corr, cmap="coolwarm", annot=False, ax=ax)
 	ax.set_title("Correlation Heatmap")
-	return [("Correlation Heatmap", fig)]
+	yield "Correlation Heatmap", fig
 
 
-def _plot_pair_plot(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
+def _plot_pair_plot(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
 	numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
 	
 	if len(numeric_cols) >= 2 and len(numeric_cols) <= 6:  # Limit to prevent too many subplots
-		fig = sns.pairplot(df[numeric_cols], diag_kind='kde', height=2)
-		fig.fig.suptitle("Pair Plot Matrix", y=1.02)
-		fig.fig.set_size_inches(12, 10)
-		return [("Pair Plot Matrix", fig.fig)]
-	
-	return []
-
-
-def _plot_categorical_analysis(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]:
-	figures = []
+		# Built on explicit axes (sns.pairplot goes through pyplot's figure manager)
+		n = len(numeric_cols)
+		fig, axes = new_figure(n, n, figsize=(12, 10), squeeze=False)
+		for i, row_col in enumerate(numeric_cols):
+			for j, col_col in enumerate(numeric_cols):
+				ax = axes[i, j]
+				if i == j:
+					sns.kdeplot(x=df[col_col].dropna(), ax=ax, fill=True)
+				else:
+					ax.scatter(df[col_col], df[row_col], s=8, alpha=0.6)
+				ax.set_xlabel(col_col if i == n - 1 else "")
+				ax.set_ylabel(row_col if j == 0 else "")
+		fig.suptitle("Pair Plot Matrix", y=1.02)
+		fig.tight_layout()
+		yield "Pair Plot Matrix", fig
+
+
+def _plot_categorical_analysis(df: pd.DataFrame) -> Iterator[Tuple[str, Figure]]:
 	categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
 	
 	for col in categorical_cols[:5]:  # Limit to 5 categorical columns
@@ -139,7 +143,7 @@ def _plot_categorical_analysis(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]
 		vc = df[col].value_counts().head(15)
 		percentages = (vc / len(df) * 100).round(1)
 		
-		fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+		fig, (ax1, ax2) = new_figure(1, 2, figsize=(12, 4))
 		
 		# Bar chart
 		sns.barplot(x=vc.values, y=vc.index, ax=ax1)
@@ -151,26 +155,33 @@ def _plot_categorical_analysis(df: pd.DataFrame) -> List[Tuple[str, plt.Figure]]
 		ax2.pie(top_10.values, labels=top_10.index, autopct='%1.1f%%', startangle=90)
 		ax2.set_title(f"Distribution: {col}")
 		
-		plt.tight_layout()
-		figures.append((f"Categorical Analysis: {col}", fig))
-	
-	return figures
+		fig.tight_layout()
+		yield f"Categorical Analysis: {col}", fig
 
 
-def generate_eda(df: pd.DataFrame):
-	figs = []
-	
+# Ordered chart builders; each yields (title, figure) pairs one at a time
+EDA_STEPS: List[Tuple[str, Callable[[pd.DataFrame], Iterator[Tuple[str, Figure]]]]] = [
 	# Basic plots
-	figs.extend(_plot_distributions(df))
-	figs.extend(_plot_boxplots(df))
-	figs.extend(_plot_violin_plots(df))
-	
+	("distributions", _plot_distributions),
+	("boxplots", _plot_boxplots),
+	("violin_plots", _plot_violin_plots),
 	# Advanced plots
-	figs.extend(_plot_scatter_plots(df))
-	figs.extend(_plot_time_series(df))
-	figs.extend(_plot_correlation(df))
-	figs.extend(_plot_pair_plot(df))
-	figs.extend(_plot_categorical_analysis(df))
-	
+	("scatter_plots", _plot_scatter_plots),
+	("time_series", _plot_time_series),
+	("correlation", _plot_correlation),
+	("pair_plot", _plot_pair_plot),
+	("categorical", _plot_categorical_analysis),
+]
+
+
+def iter_eda(df: pd.DataFrame) -> Iterator[Tuple[str, str, Figure]]:
+	"""Yield (step, title, figure) as soon as each chart is built."""
+	for step, builder in EDA_STEPS:
+		for title, fig in builder(df):
+			yield step, title, fig
+
+
+def generate_eda(df: pd.DataFrame):
+	figs = [(title, fig) for _, title, fig in iter_eda(df)]
 	meta = {"num_figures": len(figs)}
 	return figs, meta
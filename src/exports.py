@@ -1,130 +1,594 @@
 import io
-from typing import Dict, List, Tuple
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import pandas as pd
+import hashlib
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 import zipfile
 
 try:
-	import matplotlib.pyplot as plt  # noqa: F401
-except Exception:
-	plt = None  # type: ignore
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+except ImportError:  # optional: Parquet / Arrow members in the BI bundles
+	pa = None
+	pq = None
+
+try:
+	from reportlab.graphics import renderPDF
+	from svglib.svglib import svg2rlg
+except ImportError:  # optional: vector charts in PDF reports
+	svg2rlg = None
+
+# Whether export_pdf_report can honour vector_charts (needs svglib)
+PDF_VECTOR_CHARTS = svg2rlg is not None
+
+from src.figures import encode_figure, figure_to_png_bytes
+
+_A85_LOCK = threading.Lock()
+_A85_USERS = 0
+_A85_SAVED = None
+
+
+@contextmanager
+def _binary_pdf_streams():
+	"""Embed PDF streams as binary rather than ASCII85 text, which is 25% larger.
+
+	reportlab has no per-document switch: it reads the module-global rl_config.useA85
+	wherever it writes a stream. This therefore changes the setting for the whole
+	process while at least one of our reports is being built, and restores it when
+	the last one finishes. Any other reportlab output produced meanwhile (in another
+	thread) also gets binary streams, which are equally valid PDF.
+	"""
+	global _A85_USERS, _A85_SAVED
+	with _A85_LOCK:
+		if _A85_USERS == 0:
+			_A85_SAVED = rl_config.useA85
+			rl_config.useA85 = 0
+		_A85_USERS += 1
+	try:
+		yield
+	finally:
+		with _A85_LOCK:
+			_A85_USERS -= 1
+			if _A85_USERS == 0:
+				rl_config.useA85 = _A85_SAVED
 
 
 def _figure_to_png_bytes(fig) -> bytes:
-	buf = io.BytesIO()
-	fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-	buf.seek(0)
-	return buf.read()
+	return figure_to_png_bytes(fig, dpi=150)
+
+
+# Excel's hard limit is 1,048,576 rows per sheet, one of which holds the header
+EXCEL_MAX_DATA_ROWS = 1_048_575
+
+EXCEL_CHUNK_ROWS = 50_000
+
+
+def _excel_rows(df: pd.DataFrame, chunk_rows: int = EXCEL_CHUNK_ROWS):
+	"""Yield plain Python rows (missing values as None), converting chunk_rows at a time."""
+	for start in range(0, len(df), chunk_rows):
+		chunk = df.iloc[start:start + chunk_rows]
+		columns = []
+		for col in chunk.columns:
+			values = chunk[col].astype(object)
+			columns.append(values.where(chunk[col].notna(), None).tolist())
+		yield from zip(*columns)
+
+
+def _summary_rows(overview: Dict, cleaning_report: Dict, insights_text: str) -> List[List[object]]:
+	summary_rows = []
+	summary_rows.append(["Rows", overview["num_rows"]])
+	summary_rows.append(["Columns", overview["num_cols"]])
+	for k, v in overview["dtypes"].items():
+		summary_rows.append([f"dtype:{k}", v])
+	for k, v in overview["missing_counts"].items():
+		summary_rows.append([f"missing:{k}", v])
+	summary_rows.append(["Duplicates Removed", cleaning_report.get("duplicates_removed", 0)])
+	summary_rows.append(["Inferred Types", str(cleaning_report.get("inferred_types", {}))])
+	summary_rows.append(["Imputations", str(cleaning_report.get("imputations", {}))])
+	summary_rows.append(["Insights", insights_text])
+	return summary_rows
+
+
+def write_excel_with_summary(
+	path: str,
+	df: pd.DataFrame,
+	overview: Dict,
+	cleaning_report: Dict,
+	insights_text: str,
+	file_basename: str,
+	figs: List[Tuple[str, object]] | None = None,
+	max_rows_per_sheet: int = EXCEL_MAX_DATA_ROWS,
+	chunk_rows: int = EXCEL_CHUNK_ROWS,
+	progress: Optional[Callable[[float], None]] = None,
+) -> str:
+	"""Write the Excel report to path with openpyxl's write-only (constant-memory) mode.
+
+	Rows are converted chunk_rows at a time and flushed to disk as they are appended,
+	so memory does not grow with the row count. Data beyond max_rows_per_sheet rows
+	continues on CleanedData_2, CleanedData_3, and so on. progress, if given, is called
+	with the fraction of data rows written after each chunk. Returns path.
+	"""
+	from openpyxl import Workbook
+	from openpyxl.cell import WriteOnlyCell
+	from openpyxl.drawing.image import Image
+	from openpyxl.styles import Font
+
+	workbook = Workbook(write_only=True)
+
+	def data_sheet(number: int):
+		ws = workbook.create_sheet("CleanedData" if number == 1 else f"CleanedData_{number}")
+		header = []
+		for col in df.columns:
+			cell = WriteOnlyCell(ws, value=str(col))
+			cell.font = Font(bold=True)
+			header.append(cell)
+		ws.append(header)
+		return ws
+
+	sheet_number = 1
+	ws = data_sheet(sheet_number)
+	rows_in_sheet = 0
+	for written, row in enumerate(_excel_rows(df, chunk_rows), start=1):
+		if rows_in_sheet >= max_rows_per_sheet:
+			sheet_number += 1
+			ws = data_sheet(sheet_number)
+			rows_in_sheet = 0
+		ws.append(row)
+		rows_in_sheet += 1
+		if progress is not None and written % chunk_rows == 0:
+			progress(written / len(df))
+
+	summary_ws = workbook.create_sheet("Summary")
+	summary_ws.append(["Metric", "Value"])
+	for row in _summary_rows(overview, cleaning_report, insights_text):
+		summary_ws.append(row)
+
+	# Charts sheet with embedded PNGs
+	if figs:
+		charts_ws = workbook.create_sheet("Charts")
+		row = 1
+		for idx, (title, fig) in enumerate(figs, start=1):
+			if idx > 1:
+				# Write-only sheets are append-only: pad down to this chart's title row
+				for _ in range(39):
+					charts_ws.append([])
+			charts_ws.append([str(title)])
+			img = Image(io.BytesIO(_figure_to_png_bytes(fig)))
+			img.width = 400
+			img.height = 300
+			charts_ws.add_image(img, f'B{row + 1}')
+			row += 40  # space between images
+
+	workbook.save(path)
+	return path
 
 
 def export_excel_with_summary(df: pd.DataFrame, overview: Dict, cleaning_report: Dict, insights_text: str, file_basename: str, figs: List[Tuple[str, object]] | None = None) -> bytes:
-	buffer = io.BytesIO()
-	with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-		df.to_excel(writer, index=False, sheet_name="CleanedData")
-		# Summary sheet
-		summary_rows = []
-		summary_rows.append(["Rows", overview["num_rows"]])
-		summary_rows.append(["Columns", overview["num_cols"]])
-		for k, v in overview["dtypes"].items():
-			summary_rows.append([f"dtype:{k}", v])
-		for k, v in overview["missing_counts"].items():
-			summary_rows.append([f"missing:{k}", v])
-		summary_rows.append(["Duplicates Removed", cleaning_report.get("duplicates_removed", 0)])
-		summary_rows.append(["Inferred Types", str(cleaning_report.get("inferred_types", {}))])
-		summary_rows.append(["Imputations", str(cleaning_report.get("imputations", {}))])
-		summary_rows.append(["Insights", insights_text])
-		pd.DataFrame(summary_rows, columns=["Metric", "Value"]).to_excel(writer, index=False, sheet_name="Summary")
-
-		# Charts sheet with embedded PNGs
-		if figs:
-			# Create charts sheet with openpyxl
-			from openpyxl import Workbook
-			from openpyxl.drawing.image import Image
-			
-			workbook = writer.book
-			charts_ws = workbook.create_sheet("Charts")
-			
-			row = 1
-			for idx, (title, fig) in enumerate(figs, start=1):
-				# Write title
-				charts_ws.cell(row=row, column=1, value=str(title))
-				
-				# Add chart image
-				png_bytes = _figure_to_png_bytes(fig)
-				img_stream = io.BytesIO(png_bytes)
-				img = Image(img_stream)
-				img.width = 400
-				img.height = 300
-				charts_ws.add_image(img, f'B{row + 1}')
-				row += 40  # space between images
-	buffer.seek(0)
-	return buffer.read()
+	"""In-memory wrapper around write_excel_with_summary for callers that need bytes."""
+	fd, path = tempfile.mkstemp(suffix=".xlsx")
+	os.close(fd)
+	try:
+		write_excel_with_summary(path, df, overview, cleaning_report, insights_text, file_basename, figs=figs)
+		with open(path, "rb") as f:
+			return f.read()
+	finally:
+		os.remove(path)
 
 
-def export_powerbi_csv(df: pd.DataFrame) -> bytes:
+def export_powerbi_csv(df: pd.DataFrame, blocks: Optional["ExportBlocks"] = None) -> bytes:
+	if blocks is not None:
+		return blocks.encoded("csv")
 	buffer = io.BytesIO()
 	df.to_csv(buffer, index=False)
 	buffer.seek(0)
 	return buffer.read()
 
 
-def export_powerbi_bundle(df: pd.DataFrame, figs: List[Tuple[str, object]] | None = None) -> bytes:
-	zip_buf = io.BytesIO()
-	with zipfile.ZipFile(zip_buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-		# Add CSV
-		csv_buf = io.BytesIO()
-		df.to_csv(csv_buf, index=False)
-		zf.writestr("data.csv", csv_buf.getvalue())
-		# Add charts
-		if figs:
-			for i, (title, fig) in enumerate(figs, start=1):
-				png = _figure_to_png_bytes(fig)
-				name = f"charts/chart_{i:02d}.png"
-				zf.writestr(name, png)
-	zip_buf.seek(0)
-	return zip_buf.read()
+CSV_BATCH_ROWS = 50_000
+
+
+def _iter_csv(df: pd.DataFrame, batch_rows: int = CSV_BATCH_ROWS) -> Iterator[bytes]:
+	"""Encode df as UTF-8 CSV, batch_rows rows at a time."""
+	if len(df) == 0:
+		yield df.to_csv(index=False).encode("utf-8")
+		return
+	for start in range(0, len(df), batch_rows):
+		yield df.iloc[start:start + batch_rows].to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+class _ZipSink:
+	"""Write-only file object that buffers zipfile output until the generator drains it.
+
+	It has no tell() or seek(), so zipfile writes in streaming mode (sizes and CRCs
+	go into data descriptors after each member).
+	"""
+
+	def __init__(self):
+		self._chunks: List[bytes] = []
+
+	def write(self, data) -> int:
+		self._chunks.append(bytes(data))
+		return len(data)
+
+	def flush(self) -> None:
+		pass
+
+	def drain(self) -> bytes:
+		data = b"".join(self._chunks)
+		self._chunks.clear()
+		return data
+
+
+# (name, content) or (name, content, compress_type); content is bytes/str or an iterable of byte chunks
+ZipMember = Tuple
+
+
+def _zip_info(name: str, compress_type: int) -> zipfile.ZipInfo:
+	info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+	info.compress_type = compress_type
+	info.external_attr = 0o600 << 16
+	return info
+
+
+def iter_zip(members: Iterable[ZipMember]) -> Iterator[bytes]:
+	"""Stream a ZIP archive built from (name, content[, compress_type]) members.
+
+	content is bytes/str, or an iterable of byte chunks that is compressed as it is
+	consumed; archive bytes are yielded as soon as zipfile produces them, so memory
+	stays bounded by one chunk plus the compressor state. Members are deflated
+	unless they give their own compress_type.
+	"""
+	sink = _ZipSink()
+	with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+		for member in members:
+			name, content = member[0], member[1]
+			info = _zip_info(name, member[2] if len(member) > 2 else zf.compression)
+			if isinstance(content, (bytes, str)):
+				zf.writestr(info, content)
+			else:
+				# Size is unknown up front, so allow members over 2 GiB
+				with zf.open(info, mode="w", force_zip64=True) as out:
+					for piece in content:
+						out.write(piece)
+						data = sink.drain()
+						if data:
+							yield data
+			data = sink.drain()
+			if data:
+				yield data
+	data = sink.drain()
+	if data:
+		yield data
+
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+
+# Columnar formats are written in larger batches: each batch becomes a Parquet row group
+COLUMNAR_BATCH_ROWS = 250_000
+
+
+def normalize_export_formats(formats: Optional[Sequence[str]]) -> List[str]:
+	"""Validate requested data formats, keeping their order; defaults to CSV only."""
+	if not formats:
+		return ["csv"]
+	result = []
+	for fmt in formats:
+		fmt = fmt.strip().lower()
+		if fmt == "feather":
+			fmt = "arrow"
+		if fmt not in EXPORT_FORMATS:
+			raise ValueError(f"Unsupported export format: {fmt}. Choose from {', '.join(EXPORT_FORMATS)}")
+		if fmt != "csv" and pa is None:
+			raise ValueError(f"The {fmt} format requires pyarrow, which is not installed")
+		if fmt not in result:
+			result.append(fmt)
+	return result
+
+
+class _OutputSink(_ZipSink):
+	"""_ZipSink with the position tracking pyarrow writers expect."""
+
+	closed = False
+
+	def __init__(self):
+		super().__init__()
+		self._position = 0
+
+	def write(self, data) -> int:
+		self._position += len(data)
+		return super().write(data)
 
+	def tell(self) -> int:
+		return self._position
 
-def export_tableau_bundle(df: pd.DataFrame, figs: List[Tuple[str, object]] | None = None) -> bytes:
-	"""Create a simple Tableau-ready ZIP containing data.csv and optional charts.
+	def close(self) -> None:
+		self.closed = True
 
-	This avoids extra dependencies by using CSV which Tableau imports easily.
+
+def _arrow_schema(df: pd.DataFrame) -> Tuple["pa.Schema", List[str]]:
+	"""Arrow schema for df, plus the columns that must be written as strings.
+
+	Object columns holding mixed types cannot be converted as-is; those are exported
+	as strings (missing values stay null) rather than failing the whole export.
+	"""
+	fields, stringify = [], []
+	for col in df.columns:
+		try:
+			field = pa.Schema.from_pandas(df[[col]], preserve_index=False).field(0)
+		except (pa.ArrowInvalid, pa.ArrowTypeError):
+			field = pa.field(str(col), pa.string())
+			stringify.append(col)
+		fields.append(field)
+	return pa.schema(fields), stringify
+
+
+def _arrow_batches(df: pd.DataFrame, schema: "pa.Schema", stringify: List[str], batch_rows: int) -> Iterator["pa.Table"]:
+	for start in range(0, max(len(df), 1), batch_rows):
+		chunk = df.iloc[start:start + batch_rows]
+		if stringify:
+			chunk = chunk.copy()
+			for col in stringify:
+				chunk[col] = chunk[col].astype(str).where(chunk[col].notna(), None)
+		yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def _iter_columnar(df: pd.DataFrame, fmt: str, batch_rows: int = COLUMNAR_BATCH_ROWS) -> Iterator[bytes]:
+	"""Encode df as Parquet or Arrow IPC, batch_rows rows at a time.
+
+	Types survive the round trip: datetimes stay timestamps and categoricals become
+	dictionary-encoded columns. Parquet uses dictionary encoding with Snappy (which
+	Power BI and Tableau both read); Arrow IPC buffers are ZSTD-compressed.
+	"""
+	schema, stringify = _arrow_schema(df)
+	sink = _OutputSink()
+	if fmt == "parquet":
+		writer = pq.ParquetWriter(sink, schema, compression="snappy", use_dictionary=True)
+	else:
+		writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+	with writer:
+		for table in _arrow_batches(df, schema, stringify, batch_rows):
+			writer.write_table(table)
+			data = sink.drain()
+			if data:
+				yield data
+	data = sink.drain()
+	if data:
+		yield data
+
+
+def _encode_data(df: pd.DataFrame, fmt: str, batch_rows: int = CSV_BATCH_ROWS) -> Iterator[bytes]:
+	if fmt == "csv":
+		return _iter_csv(df, batch_rows)
+	return _iter_columnar(df, fmt, max(batch_rows, COLUMNAR_BATCH_ROWS))
+
+
+def _read_chunks(path: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+	with open(path, "rb") as f:
+		while True:
+			chunk = f.read(chunk_size)
+			if not chunk:
+				break
+			yield chunk
+
+
+class ExportBlocks:
+	"""Encoded data files (CSV, Parquet, Arrow) of one dataset version, spooled to disk.
+
+	The first export that needs a format tees the encoder's output into a file while
+	streaming it; every later export of that version reads the file back instead of
+	encoding the frame again. Create a new instance when the data changes.
+	"""
+
+	def __init__(self, df: pd.DataFrame, directory: Optional[str] = None):
+		self.df = df
+		self.directory = tempfile.mkdtemp(prefix="export_blocks_", dir=directory)
+		self._paths: Dict[str, str] = {}
+		self._lock = threading.Lock()
+		self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+	def iter_block(self, fmt: str, batch_rows: int = CSV_BATCH_ROWS) -> Iterator[bytes]:
+		with self._lock:
+			path = self._paths.get(fmt)
+		if path is not None:
+			yield from _read_chunks(path)
+			return
+		final = os.path.join(self.directory, f"data.{fmt}")
+		fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+		complete = False
+		try:
+			with os.fdopen(fd, "wb") as f:
+				for piece in _encode_data(self.df, fmt, batch_rows):
+					f.write(piece)
+					yield piece
+			complete = True
+		finally:
+			# An abandoned download leaves no partial block behind
+			if complete:
+				os.replace(tmp, final)
+				with self._lock:
+					self._paths[fmt] = final
+			else:
+				os.remove(tmp)
+
+	def encoded(self, fmt: str) -> bytes:
+		return b"".join(self.iter_block(fmt))
+
+	def close(self) -> None:
+		self._finalizer()
+
+
+def _data_members(prefix: str, df: pd.DataFrame, formats: Sequence[str], batch_rows: int, blocks: Optional[ExportBlocks] = None) -> Iterator[ZipMember]:
+	for fmt in formats:
+		content = blocks.iter_block(fmt, batch_rows) if blocks is not None else _encode_data(df, fmt, batch_rows)
+		if fmt == "csv":
+			yield f"{prefix}data.csv", content
+		else:
+			# Already compressed, so store rather than deflate again
+			yield f"{prefix}data.{fmt}", content, zipfile.ZIP_STORED
+
+
+def _chart_members(prefix: str, figs: List[Tuple[str, object]] | None) -> Iterator[ZipMember]:
+	# Charts are rendered one at a time as the archive reaches them
+	for i, (title, fig) in enumerate(figs or [], start=1):
+		yield f"{prefix}charts/chart_{i:02d}.png", _figure_to_png_bytes(fig)
+
+
+def iter_powerbi_bundle(
+	df: pd.DataFrame,
+	figs: List[Tuple[str, object]] | None = None,
+	batch_rows: int = CSV_BATCH_ROWS,
+	formats: Optional[Sequence[str]] = None,
+	blocks: Optional[ExportBlocks] = None,
+) -> Iterator[bytes]:
+	"""Stream a Power BI ZIP with data.csv (and/or data.parquet, data.arrow) and optional charts.
+
+	With blocks, data files come from that dataset version's encoded blocks.
+	"""
+	formats = normalize_export_formats(formats)
+
+	def members():
+		yield from _data_members("", df, formats, batch_rows, blocks)
+		yield from _chart_members("", figs)
+	return iter_zip(members())
+
+
+def export_powerbi_bundle(df: pd.DataFrame, figs: List[Tuple[str, object]] | None = None, formats: Optional[Sequence[str]] = None, blocks: Optional[ExportBlocks] = None) -> bytes:
+	return b"".join(iter_powerbi_bundle(df, figs, formats=formats, blocks=blocks))
+
+
+TABLEAU_README = (
+	"Tableau Import Instructions\n\n"
+	"1) Open Tableau Desktop or Tableau Public.\n"
+	"2) Choose 'Text file' as a data source and select tableau/data.csv.\n"
+	"   If the bundle has tableau/data.parquet, choose 'More... > Parquet' instead to keep column types.\n"
+	"3) Drag sheets to the canvas and start building visuals.\n"
+	"4) Optional: Use charts in tableau/charts/ as references.\n"
+)
+
+
+def iter_tableau_bundle(
+	df: pd.DataFrame,
+	figs: List[Tuple[str, object]] | None = None,
+	batch_rows: int = CSV_BATCH_ROWS,
+	formats: Optional[Sequence[str]] = None,
+	blocks: Optional[ExportBlocks] = None,
+) -> Iterator[bytes]:
+	"""Stream a simple Tableau-ready ZIP containing data.csv and optional charts.
+
+	CSV needs no extra dependencies and Tableau imports it easily; Parquet and Arrow
+	copies can be requested through formats when pyarrow is installed, and come from
+	blocks when given.
 	Structure:
-	  - tableau/data.csv
+	  - tableau/data.csv (and/or data.parquet, data.arrow)
 	  - tableau/charts/chart_XX.png (optional)
 	  - README.txt with quick import instructions
 	"""
-	zip_buf = io.BytesIO()
-	with zipfile.ZipFile(zip_buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-		# Add CSV in a tableau/ folder
-		csv_buf = io.BytesIO()
-		df.to_csv(csv_buf, index=False)
-		zf.writestr("tableau/data.csv", csv_buf.getvalue())
-
-		# Optional: add charts for reference
-		if figs:
-			for i, (title, fig) in enumerate(figs, start=1):
-				png = _figure_to_png_bytes(fig)
-				name = f"tableau/charts/chart_{i:02d}.png"
-				zf.writestr(name, png)
-
-		# Include a small README with steps
-		readme = (
-			"Tableau Import Instructions\n\n"
-			"1) Open Tableau Desktop or Tableau Public.\n"
-			"2) Choose 'Text file' as a data source and select tableau/data.csv.\n"
-			"3) Drag sheets to the canvas and start building visuals.\n"
-			"4) Optional: Use charts in tableau/charts/ as references.\n"
-		)
-		zf.writestr("tableau/README.txt", readme)
-
-	zip_buf.seek(0)
-	return zip_buf.read()
-
-
-def export_pdf_report(title: str, overview: Dict, cleaning_report: Dict, insights_text: str, figs: List[Tuple[str, object]] | None = None) -> bytes:
+	formats = normalize_export_formats(formats)
+
+	def members():
+		yield from _data_members("tableau/", df, formats, batch_rows, blocks)
+		yield from _chart_members("tableau/", figs)
+		yield "tableau/README.txt", TABLEAU_README
+	return iter_zip(members())
+
+
+def export_tableau_bundle(df: pd.DataFrame, figs: List[Tuple[str, object]] | None = None, formats: Optional[Sequence[str]] = None, blocks: Optional[ExportBlocks] = None) -> bytes:
+	return b"".join(iter_tableau_bundle(df, figs, formats=formats, blocks=blocks))
+
+
+# PDF chart encodings: (format, dpi, JPEG quality). JPEG is embedded as-is (DCT);
+# PNG is decoded and stored losslessly with Flate.
+PDF_IMAGE_QUALITY: Dict[str, Tuple[str, int, Optional[int]]] = {
+	"lossless": ("png", 150, None),
+	"standard": ("jpeg", 120, 80),
+	"compact": ("jpeg", 96, 65),
+}
+
+# Chart resolutions a caller may ask for; bounds the size of rasterized bitmaps
+PDF_MIN_DPI = 50
+PDF_MAX_DPI = 300
+
+# Figures with at most this many drawn primitives can be embedded as vectors
+PDF_VECTOR_MAX_ELEMENTS = 5000
+
+
+def _is_simple_figure(fig, max_elements: int = PDF_VECTOR_MAX_ELEMENTS) -> bool:
+	total = 0
+	for ax in fig.axes:
+		if ax.images:
+			return False
+		for line in ax.lines:
+			total += len(line.get_xdata())
+		for coll in ax.collections:
+			total += max(len(coll.get_offsets()), len(coll.get_paths()))
+		total += len(ax.patches)
+		if total > max_elements:
+			return False
+	return True
+
+
+class _PdfImages:
+	"""Encoded chart images written once per content hash.
+
+	reportlab reuses an image XObject when drawImage gets the same file name again,
+	and reads JPEG files without decoding them, so identical charts are embedded once
+	and no image is re-encoded.
+	"""
+
+	def __init__(self, directory: str, fmt: str, dpi: int, quality: Optional[int]):
+		self.directory = directory
+		self.fmt, self.dpi, self.quality = fmt, dpi, quality
+		self._sizes: Dict[str, Tuple[int, int]] = {}
+
+	def get(self, fig) -> Tuple[str, Tuple[int, int]]:
+		data = encode_figure(fig, self.fmt, self.dpi, self.quality)
+		digest = hashlib.sha1(data).hexdigest()
+		path = os.path.join(self.directory, f"{digest}.{'jpg' if self.fmt == 'jpeg' else self.fmt}")
+		if path not in self._sizes:
+			with open(path, "wb") as f:
+				f.write(data)
+			self._sizes[path] = ImageReader(path).getSize()
+		return path, self._sizes[path]
+
+
+def export_pdf_report(
+	title: str,
+	overview: Dict,
+	cleaning_report: Dict,
+	insights_text: str,
+	figs: List[Tuple[str, object]] | None = None,
+	image_quality: str = "standard",
+	dpi: Optional[int] = None,
+	vector_charts: bool = False,
+) -> bytes:
+	"""PDF report with overview, cleaning report, insights and one block per chart.
+
+	image_quality picks a PDF_IMAGE_QUALITY tier and dpi overrides its resolution,
+	clamped to PDF_MIN_DPI..PDF_MAX_DPI.
+	With vector_charts, simple charts are drawn as vectors instead of raster images;
+	this needs svglib and raises ValueError when it is not installed.
+	"""
+	if image_quality not in PDF_IMAGE_QUALITY:
+		raise ValueError(f"Unsupported image quality: {image_quality}. Choose from {', '.join(PDF_IMAGE_QUALITY)}")
+	if vector_charts and not PDF_VECTOR_CHARTS:
+		raise ValueError("Vector charts are unavailable: svglib is not installed")
+	fmt, tier_dpi, quality = PDF_IMAGE_QUALITY[image_quality]
+	dpi = min(max(int(dpi), PDF_MIN_DPI), PDF_MAX_DPI) if dpi else tier_dpi
+	with _binary_pdf_streams():
+		return _build_pdf_report(title, overview, cleaning_report, insights_text, figs, fmt, dpi, quality, vector_charts)
+
+
+def _build_pdf_report(title, overview, cleaning_report, insights_text, figs, fmt, dpi, quality, vector_charts) -> bytes:
 	buffer = io.BytesIO()
 	c = canvas.Canvas(buffer, pagesize=A4)
 	width, height = A4
@@ -170,25 +634,39 @@ def export_pdf_report(title: str, overview: Dict, cleaning_report: Dict, insight
 
 	# Charts pages
 	if figs:
-		for (title_text, fig) in figs:
-			png = _figure_to_png_bytes(fig)
-			img = ImageReader(io.BytesIO(png))
-			img_w, img_h = img.getSize()
-			# Fit within margins
-			max_w = width - 2 * margin
-			max_h = height - 2 * margin - 14
-			scale = min(max_w / img_w, max_h / img_h)
-			draw_w = img_w * scale
-			draw_h = img_h * scale
-			if y - draw_h < margin:
-				c.showPage(); y = height - margin
-			c.setFont("Helvetica-Bold", 12)
-			c.drawString(margin, y, str(title_text))
-			y -= 14
-			c.drawImage(img, margin, y - draw_h, width=draw_w, height=draw_h, preserveAspectRatio=True, anchor='sw')
-			y = y - draw_h - 18
-			if y < margin:
-				c.showPage(); y = height - margin
+		max_w = width - 2 * margin
+		max_h = height - 2 * margin - 14
+		with tempfile.TemporaryDirectory() as image_dir:
+			images = _PdfImages(image_dir, fmt, dpi, quality)
+			for (title_text, fig) in figs:
+				drawing = None
+				if vector_charts and _is_simple_figure(fig):
+					svg = encode_figure(fig, "svg")
+					# Embedded rasters (colorbars, images) are left to the raster path
+					if b"<image" not in svg:
+						drawing = svg2rlg(io.BytesIO(svg))
+				if drawing is not None:
+					img_w, img_h = drawing.width, drawing.height
+				else:
+					path, (img_w, img_h) = images.get(fig)
+				# Fit within margins
+				scale = min(max_w / img_w, max_h / img_h)
+				draw_w = img_w * scale
+				draw_h = img_h * scale
+				if y - draw_h < margin:
+					c.showPage(); y = height - margin
+				c.setFont("Helvetica-Bold", 12)
+				c.drawString(margin, y, str(title_text))
+				y -= 14
+				if drawing is not None:
+					drawing.scale(scale, scale)
+					drawing.width, drawing.height = draw_w, draw_h
+					renderPDF.draw(drawing, c, margin, y - draw_h)
+				else:
+					c.drawImage(path, margin, y - draw_h, width=draw_w, height=draw_h, preserveAspectRatio=True, anchor='sw')
+				y = y - draw_h - 18
+				if y < margin:
+					c.showPage(); y = height - margin
 
 	c.showPage()
 	c.save()
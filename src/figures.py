@@ -0,0 +1,61 @@
+import io
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def new_figure(nrows: int = 1, ncols: int = 1, figsize: Tuple[float, float] = (6, 4), **subplot_kw) -> Tuple[Figure, Any]:
+	"""Create a Figure on its own Agg canvas, bypassing pyplot's global figure manager.
+
+	Figures built this way are not registered anywhere, so they can be created and
+	rendered from several threads at once and are freed as soon as they go out of scope.
+	Returns (fig, axes) with the same axes shape as ``plt.subplots``.
+	"""
+	fig = Figure(figsize=figsize)
+	FigureCanvasAgg(fig)
+	axes = fig.subplots(nrows, ncols, **subplot_kw)
+	return fig, axes
+
+
+# Encoded images per figure and (format, dpi, quality), so a chart shown in the UI and
+# then exported to Excel, ZIP bundles and PDF is rasterized once per encoding
+_ENCODED: "weakref.WeakKeyDictionary[Figure, Dict[Tuple, bytes]]" = weakref.WeakKeyDictionary()
+# One lock per figure: savefig draws into the figure, so two threads must not save it at once
+_RENDER_LOCKS: "weakref.WeakKeyDictionary[Figure, threading.Lock]" = weakref.WeakKeyDictionary()
+_ENCODED_LOCK = threading.Lock()
+
+
+def encode_figure(fig: Figure, fmt: str = "png", dpi: int = 100, quality: Optional[int] = None) -> bytes:
+	"""Render fig as png, jpeg or svg bytes, reusing earlier encodings of the same figure.
+
+	Figures are treated as immutable once rendered. quality only applies to JPEG.
+	"""
+	key = (fmt, dpi, quality)
+	with _ENCODED_LOCK:
+		cached = _ENCODED.get(fig, {}).get(key)
+		lock = _RENDER_LOCKS.setdefault(fig, threading.Lock())
+	if cached is not None:
+		return cached
+	with lock:
+		# Another thread may have encoded it while we waited
+		with _ENCODED_LOCK:
+			cached = _ENCODED.get(fig, {}).get(key)
+		if cached is not None:
+			return cached
+		buf = io.BytesIO()
+		kwargs = {}
+		if fmt == "jpeg":
+			kwargs["pil_kwargs"] = {"quality": quality or 85, "optimize": True}
+		fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches="tight", **kwargs)
+		data = buf.getvalue()
+		with _ENCODED_LOCK:
+			_ENCODED.setdefault(fig, {})[key] = data
+	return data
+
+
+def figure_to_png_bytes(fig: Figure, dpi: int = 100) -> bytes:
+	return encode_figure(fig, "png", dpi)
+
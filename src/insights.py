@@ -1,39 +1,55 @@
-from typing import List
+from typing import List, Union
 import pandas as pd
 import numpy as np
+from pandas.api.types import is_datetime64_any_dtype
+from src.arrays import numeric_columns
+from src.associations import rank_associations
+from src.correlation import CoMomentAccumulator, top_correlations
+from src.outliers import OutlierBounds, detect_outliers, scan_outliers
+from src.streaming import DEFAULT_CHUNK_ROWS, DEFAULT_MAX_CELLS, ChunkSource, MomentAccumulator, accumulate, as_chunk_source, chunk_rows_for, numeric_columns_of, split_chunks
+from src.timeseries import detect_time_anomalies
 
 
 def _find_outliers(df: pd.DataFrame) -> List[str]:
 	messages = []
-	num_df = df.select_dtypes(include=[np.number])
-	for col in num_df.columns:
-		series = num_df[col].dropna()
-		if series.std(ddof=0) == 0 or series.shape[0] < 5:
+	report = detect_outliers(df, methods=("zscore",), max_indices=0)
+	ratios = report.ratios("zscore")
+	for col, n, ratio in zip(report.columns, report.bounds.counts, ratios):
+		if n < 5:
 			continue
-		z = (series - series.mean()) / series.std(ddof=0)
-		outlier_ratio = (np.abs(z) > 3).mean()
-		if outlier_ratio > 0.02:
-			messages.append(f"{col}: {outlier_ratio:.1%} potential outliers (>|3σ|)")
+		if ratio > 0.02:
+			messages.append(f"{col}: {ratio:.1%} potential outliers (>|3σ|)")
 	return messages
 
 
 def _top_correlations(df: pd.DataFrame) -> List[str]:
-	num_df = df.select_dtypes(include=[np.number])
-	if num_df.shape[1] < 2:
+	pairs = top_correlations(df, k=5, min_abs=0.5)
+	return [f"{a} ~ {b}: corr={abs(c):.2f}" for a, b, c in pairs]
+
+
+def _categorical_associations(df: pd.DataFrame) -> List[str]:
+	pairs = rank_associations(df, measure="cramers_v", k=5, min_value=0.3)
+	return [f"{a} ~ {b}: Cramér's V={v:.2f}" for a, b, v in pairs]
+
+
+def _time_series_anomalies(df: pd.DataFrame, max_lines: int = 10) -> List[str]:
+	date_cols = [col for col, dtype in df.dtypes.items() if is_datetime64_any_dtype(dtype)]
+	metrics = numeric_columns(df)
+	if not date_cols or not metrics:
 		return []
-	corr = num_df.corr(numeric_only=True).abs()
-	pairs = []
-	cols = corr.columns.tolist()
-	for i in range(len(cols)):
-		for j in range(i + 1, len(cols)):
-			pairs.append((cols[i], cols[j], corr.iloc[i, j]))
-	pairs.sort(key=lambda x: x[2], reverse=True)
-	return [f"{a} ~ {b}: corr={c:.2f}" for a, b, c in pairs[:5] if c >= 0.5]
+	date_col = date_cols[0]
+	anomalies, granularity = detect_time_anomalies(df, date_col, metrics)
+	# Scores are not comparable across kinds: structural changes first, then the largest spikes
+	kind_order = {"level_shift": 0, "seasonality_break": 1, "spike": 2}
+	anomalies.sort(key=lambda a: (kind_order[a.kind], -a.score))
+	fmt = "%Y-%m-%d %H:00" if granularity == "hour" else "%Y-%m-%d"
+	messages = []
+	for a in anomalies[:max_lines]:
+		messages.append(f"{a.metric} over {date_col}: {a.detail} at {a.timestamp.strftime(fmt)}")
+	return messages
 
 
-def generate_insights(df: pd.DataFrame) -> str:
-	outliers = _find_outliers(df)
-	correls = _top_correlations(df)
+def _format_insights(outliers: List[str], correls: List[str], associations: List[str], time_anomalies: List[str]) -> str:
 	lines = []
 	if outliers:
 		lines.append("Outliers detected:")
@@ -43,6 +59,70 @@ def generate_insights(df: pd.DataFrame) -> str:
 		lines.append("Strong numeric correlations:")
 		for m in correls:
 			lines.append(f"- {m}")
+	if associations:
+		lines.append("Strong categorical associations:")
+		for m in associations:
+			lines.append(f"- {m}")
+	if time_anomalies:
+		lines.append("Time-series anomalies:")
+		for m in time_anomalies:
+			lines.append(f"- {m}")
 	if not lines:
 		lines.append("No significant anomalies or strong correlations detected.")
 	return "\n".join(lines)
+
+
+def generate_insights(df: pd.DataFrame) -> str:
+	outliers = _find_outliers(df)
+	correls = _top_correlations(df)
+	associations = _categorical_associations(df)
+	time_anomalies = _time_series_anomalies(df)
+	return _format_insights(outliers, correls, associations, time_anomalies)
+
+
+# The co-moment matrices grow with the square of the column count (about 32 bytes
+# per pair), so streamed correlations cover at most this many numeric columns
+MAX_CORRELATION_COLUMNS = 500
+
+
+def generate_insights_full(
+	source: Union[pd.DataFrame, ChunkSource],
+	chunk_rows: int = DEFAULT_CHUNK_ROWS,
+	max_cells: int = DEFAULT_MAX_CELLS,
+	max_correlation_columns: int = MAX_CORRELATION_COLUMNS,
+) -> str:
+	"""Exact insights over every row of a frame or chunked source with bounded memory.
+
+	Pass 1 folds each chunk into Welford moments and a co-moment matrix; pass 2 counts
+	3-sigma exceedances against the final moments. Chunks hold at most chunk_rows rows
+	and max_cells values, so wide data is read in shorter chunks. Correlations use the
+	rows where both columns of a pair are present and cover only the first
+	max_correlation_columns numeric columns. Categorical associations and time-series
+	anomalies need the rows together, so they are only computed when source is an
+	in-memory frame.
+	"""
+	if isinstance(source, pd.DataFrame):
+		associations = _categorical_associations(source)
+		time_anomalies = _time_series_anomalies(source)
+	else:
+		associations, time_anomalies = [], []
+	cols = numeric_columns_of(source)
+	source = split_chunks(as_chunk_source(source, chunk_rows), chunk_rows_for(len(cols), chunk_rows, max_cells))
+	moments = MomentAccumulator(cols)
+	comoments = CoMomentAccumulator(cols[:max_correlation_columns])
+	accumulate(source, [moments, comoments])
+
+	std = moments.std(ddof=0)
+	ok = (moments.n >= 5) & (std > 0)
+	low = np.where(ok, moments.mean - 3 * std, -np.inf)
+	high = np.where(ok, moments.mean + 3 * std, np.inf)
+	bounds = OutlierBounds(cols, moments.n, {"zscore": low}, {"zscore": high})
+	report = scan_outliers(source(), bounds, max_indices=0)
+
+	outliers = []
+	for col, ratio, flagged in zip(cols, report.ratios("zscore"), ok):
+		if flagged and ratio > 0.02:
+			outliers.append(f"{col}: {ratio:.1%} potential outliers (>|3σ|)")
+	pairs = comoments.top_correlations(k=5, min_abs=0.5)
+	correls = [f"{a} ~ {b}: corr={abs(c):.2f}" for a, b, c in pairs]
+	return _format_insights(outliers, correls, associations, time_anomalies)
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+
+# A builder writes the artifact to the given path and may report progress in [0, 1]
+ProgressCallback = Callable[[float], None]
+Builder = Callable[[str, ProgressCallback], None]
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+	"""Content hash of a frame: vectorized row hashes plus column names and dtypes."""
+	digest = hashlib.blake2b(digest_size=16)
+	digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+	digest.update(np.ascontiguousarray(pd.util.hash_pandas_object(df, index=True).to_numpy()).tobytes())
+	return digest.hexdigest()
+
+
+def artifact_key(fingerprint: str, kind: str, options: Dict) -> str:
+	payload = json.dumps({"data": fingerprint, "kind": kind, "options": options}, sort_keys=True, default=str)
+	return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _write_json(path: str, data: Dict) -> None:
+	# Write then rename so readers in other processes never see a partial file
+	fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+	with os.fdopen(fd, "w") as f:
+		json.dump(data, f)
+	os.replace(tmp, path)
+
+
+class ExportJobs:
+	"""Background export jobs on a bounded thread pool with an on-disk artifact cache.
+
+	Job records and artifacts live under cache_dir, so any web worker process can
+	poll a job or serve its download. Artifacts are keyed by dataset fingerprint and
+	export options; a job whose artifact already exists completes immediately.
+	"""
+
+	def __init__(
+		self,
+		cache_dir: str,
+		max_workers: int = 2,
+		max_pending: int = 16,
+		max_cache_bytes: int = 2 * 1024 ** 3,
+		job_ttl: float = 24 * 60 * 60,
+	):
+		self.cache_dir = cache_dir
+		self.jobs_dir = os.path.join(cache_dir, "jobs")
+		self.artifacts_dir = os.path.join(cache_dir, "artifacts")
+		os.makedirs(self.jobs_dir, exist_ok=True)
+		os.makedirs(self.artifacts_dir, exist_ok=True)
+		self.max_pending = max_pending
+		self.max_cache_bytes = max_cache_bytes
+		self.job_ttl = job_ttl
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+		self._lock = threading.Lock()
+		self._pending = 0
+		# Keys being built in this process and the future their build resolves, so
+		# concurrent duplicates share one build without holding a pool worker
+		self._building: Dict[str, Tuple[str, Future]] = {}
+
+	def _job_path(self, job_id: str) -> str:
+		return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+	def artifact_path(self, key: str, extension: str) -> str:
+		return os.path.join(self.artifacts_dir, f"{key}{extension}")
+
+	def _save(self, job: Dict) -> None:
+		job["updated"] = time.time()
+		_write_json(self._job_path(job["id"]), job)
+
+	def get(self, job_id: str) -> Optional[Dict]:
+		if not job_id.isalnum():
+			return None
+		try:
+			with open(self._job_path(job_id)) as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	def submit(self, owner: str, kind: str, key: str, extension: str, filename: str, mimetype: str, build: Builder) -> Dict:
+		"""Queue build for the artifact identified by key; returns the job record.
+
+		Raises RuntimeError when the pool already has max_pending jobs waiting.
+		"""
+		job = {
+			"id": secrets.token_hex(16),
+			"owner": owner,
+			"kind": kind,
+			"key": key,
+			"extension": extension,
+			"filename": filename,
+			"mimetype": mimetype,
+			"status": "queued",
+			"progress": 0.0,
+			"error": None,
+			"cached": False,
+			"created": time.time(),
+		}
+		path = self.artifact_path(key, extension)
+		if os.path.exists(path):
+			os.utime(path)
+			job.update(status="done", progress=1.0, cached=True)
+			self._save(job)
+			return job
+		with self._lock:
+			if self._pending >= self.max_pending:
+				raise RuntimeError("Too many export jobs in progress, please retry shortly")
+			self._pending += 1
+		try:
+			self._save(job)
+		except Exception:
+			with self._lock:
+				self._pending -= 1
+			raise
+		snapshot = dict(job)
+		self._start(job, path, build)
+		return snapshot
+
+	def _start(self, job: Dict, path: str, build: Builder) -> None:
+		"""Build on the pool, or follow the build already running for the same key."""
+		with self._lock:
+			leader = self._building.get(job["key"])
+			if leader is None:
+				self._building[job["key"]] = (job["id"], Future())
+		if leader is None:
+			self._executor.submit(self._run, job, path, build)
+		else:
+			leader[1].add_done_callback(lambda _: self._follow(job, path, build))
+
+	def _follow(self, job: Dict, path: str, build: Builder) -> None:
+		"""Finish a duplicate job once its leader is done; builds itself if the leader failed."""
+		if not os.path.exists(path):
+			self._start(job, path, build)
+			return
+		job.update(status="done", progress=1.0, cached=True, finished=time.time())
+		try:
+			self._save(job)
+		finally:
+			with self._lock:
+				self._pending -= 1
+
+	def _run(self, job: Dict, path: str, build: Builder) -> None:
+		job["status"] = "running"
+		job["started"] = time.time()
+		last_saved = [0.0]
+
+		def progress(fraction: float) -> None:
+			job["progress"] = round(min(max(float(fraction), 0.0), 1.0), 4)
+			# Throttle status writes; pollers only need a few updates per second
+			now = time.time()
+			if now - last_saved[0] >= 0.5:
+				last_saved[0] = now
+				self._save(job)
+
+		try:
+			self._save(job)
+			tmp = f"{path}.{job['id']}.part"
+			try:
+				build(tmp, progress)
+				os.replace(tmp, path)
+			finally:
+				if os.path.exists(tmp):
+					os.remove(tmp)
+			job.update(status="done", progress=1.0)
+		except Exception as e:
+			print(f"Export job {job['id']} ({job['kind']}) failed: {traceback.format_exc()}")
+			job.update(status="error", error=str(e))
+		finally:
+			job["finished"] = time.time()
+			try:
+				self._save(job)
+			except Exception as e:
+				print(f"Export job {job['id']}: could not save final status: {e}")
+			# Always release the slot and wake followers, even if the status write failed
+			with self._lock:
+				self._pending -= 1
+				own = self._building.pop(job["key"], None)
+			# Followers run their callbacks here, outside the lock
+			if own is not None:
+				own[1].set_result(None)
+			self.prune()
+
+	def prune(self) -> None:
+		"""Drop expired job records and least recently used artifacts over the byte budget."""
+		now = time.time()
+		for name in os.listdir(self.jobs_dir):
+			path = os.path.join(self.jobs_dir, name)
+			try:
+				if now - os.path.getmtime(path) > self.job_ttl:
+					os.remove(path)
+			except OSError:
+				pass
+		artifacts = []
+		for name in os.listdir(self.artifacts_dir):
+			if name.endswith(".part"):
+				continue
+			path = os.path.join(self.artifacts_dir, name)
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			artifacts.append((stat.st_mtime, stat.st_size, path))
+		total = sum(size for _, size, _ in artifacts)
+		for _, size, path in sorted(artifacts):
+			if total <= self.max_cache_bytes:
+				break
+			try:
+				os.remove(path)
+				total -= size
+			except OSError:
+				pass
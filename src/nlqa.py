@@ -1,70 +1,120 @@
 import re
-from typing import Optional, Tuple, List
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.cbook import boxplot_stats
+from matplotlib.figure import Figure
 import seaborn as sns
-from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+from pandas.api.types import is_numeric_dtype
+from src.figures import new_figure
+from src.outliers import detect_outliers
+from src.cube import MeasureCube, build_cube
+from src.query import QueryError, QueryPlan, parse_query, run_queries, run_query
+from src.schema import schema_index
+from src.timeseries import GRANULARITY_LABELS, choose_granularity, downsample_series, format_buckets
 
 
-class QAResult:
-	def __init__(self, table: Optional[pd.DataFrame] = None, figure: Optional[plt.Figure] = None, message: Optional[str] = None):
-		self.table = table
-		self.figure = figure
-		self.message = message or ""
+class Chart:
+	"""A chart an answer can show, drawn only when first asked for.
 
+	kind and title describe it without rendering; draw builds the Figure.
+	"""
 
-def _find_date_column(df: pd.DataFrame) -> Optional[str]:
-	for col in df.columns:
-		if is_datetime64_any_dtype(df[col]):
-			return col
-	return None
+	def __init__(self, kind: str, title: str, draw: Callable[[], Figure]):
+		self.kind = kind
+		self.title = title
+		self._draw: Optional[Callable[[], Figure]] = draw
+		self._figure: Optional[Figure] = None
+		self._lock = threading.Lock()
 
+	def figure(self) -> Figure:
+		with self._lock:
+			if self._figure is None:
+				self._figure = self._draw()
+				# The closure holds the data it plots; let it go once drawn
+				self._draw = None
+			return self._figure
 
-def _find_sales_column(df: pd.DataFrame) -> Optional[str]:
-	# Look for common sales-related column names
-	sales_keywords = ['sale', 'sales', 'revenue', 'amount', 'price', 'cost', 'value', 'total', 'income']
-	for col in df.columns:
-		col_lower = col.lower()
-		if any(keyword in col_lower for keyword in sales_keywords):
-			return col
-	return None
+	def describe(self) -> Dict[str, str]:
+		return {"kind": self.kind, "title": self.title}
 
+	@property
+	def nbytes(self) -> int:
+		"""Approximate memory held by the frames and arrays the draw closure captured."""
+		total = 0
+		for cell in getattr(self._draw, "__closure__", None) or ():
+			try:
+				total += _approx_nbytes(cell.cell_contents)
+			except ValueError:
+				# Cell not bound yet
+				pass
+		return total
 
-def _normalize_col(df: pd.DataFrame, name: str) -> Optional[str]:
-	name_l = name.strip().lower()
-	for col in df.columns:
-		if col.lower() == name_l:
-			return col
-	return None
 
+def _approx_nbytes(value) -> int:
+	if isinstance(value, pd.DataFrame):
+		return int(value.memory_usage(index=True).sum())
+	if isinstance(value, (pd.Series, pd.Index)):
+		return int(value.memory_usage(index=True))
+	if isinstance(value, np.ndarray):
+		return value.nbytes
+	if isinstance(value, dict):
+		return sum(_approx_nbytes(item) for item in value.values())
+	if isinstance(value, (list, tuple)):
+		return sum(_approx_nbytes(item) for item in value)
+	return 0
 
-def _parse_date_filter(question: str) -> Optional[Tuple[str, str]]:
-	# Extract month names and years
-	months = {
-		'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
-		'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'july': 7, 'august': 8,
-		'aug': 8, 'september': 9, 'sep': 9, 'october': 10, 'oct': 10,
-		'november': 11, 'nov': 11, 'december': 12, 'dec': 12
-	}
-	
+
+class QAResult:
+	"""An answer: message, optional table and chart. error is set when answering failed."""
+
+	def __init__(self, table: Optional[pd.DataFrame] = None, figure: Optional[Figure] = None, message: Optional[str] = None, chart: Optional[Chart] = None, error: Optional[str] = None):
+		self.table = table
+		self.message = message or ""
+		self.error = error
+		if chart is None and figure is not None:
+			chart = Chart("figure", "", lambda: figure)
+		self.chart = chart
+
+	@property
+	def figure(self) -> Optional[Figure]:
+		"""The chart's Figure, rendered on first access."""
+		return self.chart.figure() if self.chart is not None else None
+
+
+_MONTHS = {
+	'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
+	'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'jun': 6, 'july': 7, 'jul': 7,
+	'august': 8, 'aug': 8, 'september': 9, 'sept': 9, 'sep': 9, 'october': 10, 'oct': 10,
+	'november': 11, 'nov': 11, 'december': 12, 'dec': 12
+}
+# Longest names first so "june" is not read as "jun"; whole words only, so "summary"
+# or "market" do not count as March
+_MONTH_RE = re.compile(r"\b(" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\b")
+_YEAR_RE = re.compile(r"20\d{2}")
+
+
+def _parse_date_filter(question: str) -> Optional[Tuple[int, Optional[str]]]:
 	question_lower = question.lower()
 	
 	# Look for month patterns
-	for month_name, month_num in months.items():
-		if month_name in question_lower:
-			# Look for year
-			year_match = re.search(r'20\d{2}', question)
-			year = year_match.group() if year_match else None
-			return month_num, year
+	m = _MONTH_RE.search(question_lower)
+	if m:
+		# Look for year
+		year_match = _YEAR_RE.search(question)
+		year = year_match.group() if year_match else None
+		return _MONTHS[m.group(1)], year
 	
 	# Look for "this month", "last month", etc.
 	if 'this month' in question_lower:
-		from datetime import datetime
 		now = datetime.now()
 		return now.month, str(now.year)
 	elif 'last month' in question_lower:
-		from datetime import datetime
 		now = datetime.now()
 		last_month = now.month - 1 if now.month > 1 else 12
 		last_year = now.year if now.month > 1 else now.year - 1
@@ -73,351 +123,664 @@ def _parse_date_filter(question: str) -> Optional[Tuple[str, str]]:
 	return None
 
 
-def _create_comparison_chart(df: pd.DataFrame, col1: str, col2: str, title: str) -> plt.Figure:
-	fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-	
-	# First column
-	if is_numeric_dtype(df[col1]):
-		ax1.hist(df[col1].dropna(), bins=20, alpha=0.7)
-		ax1.set_title(f'Distribution of {col1}')
-		ax1.set_xlabel(col1)
-		ax1.set_ylabel('Frequency')
-	else:
-		vc1 = df[col1].value_counts().head(10)
-		ax1.bar(range(len(vc1)), vc1.values)
-		ax1.set_title(f'Top {col1}')
-		ax1.set_xticks(range(len(vc1)))
-		ax1.set_xticklabels(vc1.index, rotation=45)
-	
-	# Second column
-	if is_numeric_dtype(df[col2]):
-		ax2.hist(df[col2].dropna(), bins=20, alpha=0.7)
-		ax2.set_title(f'Distribution of {col2}')
-		ax2.set_xlabel(col2)
-		ax2.set_ylabel('Frequency')
+def _bar_chart(table: pd.DataFrame, label_col: str, value_col: str, title: str, limit: int = 20) -> Chart:
+	"""Horizontal bars of the first limit rows of table."""
+	labels = table[label_col].astype(str).head(limit)
+	values = table[value_col].head(limit)
+
+	def draw() -> Figure:
+		fig, ax = new_figure(figsize=(6, 4))
+		sns.barplot(y=labels, x=values, ax=ax)
+		ax.set_title(title)
+		return fig
+
+	return Chart("bar", title, draw)
+
+
+# Charts keep only what they plot, never the frame: an unrendered chart can wait in
+# the chart cache long after its question was answered
+def _histogram(values: pd.Series, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+	return np.histogram(values.dropna().to_numpy(dtype=np.float64), bins=bins)
+
+
+def _plot_histogram(ax, hist: Tuple[np.ndarray, np.ndarray], **kwargs) -> None:
+	counts, edges = hist
+	# Same bars as ax.hist on the raw values
+	ax.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
+
+
+def _column_summary(series: pd.Series) -> Tuple[str, object]:
+	if is_numeric_dtype(series):
+		return "hist", _histogram(series, 20)
+	return "top", series.value_counts().head(10)
+
+
+def _plot_column_summary(ax, col: str, summary: Tuple[str, object]) -> None:
+	kind, data = summary
+	if kind == "hist":
+		_plot_histogram(ax, data, alpha=0.7)
+		ax.set_title(f'Distribution of {col}')
+		ax.set_xlabel(col)
+		ax.set_ylabel('Frequency')
 	else:
-		vc2 = df[col2].value_counts().head(10)
-		ax2.bar(range(len(vc2)), vc2.values)
-		ax2.set_title(f'Top {col2}')
-		ax2.set_xticks(range(len(vc2)))
-		ax2.set_xticklabels(vc2.index, rotation=45)
-	
-	plt.tight_layout()
+		ax.bar(range(len(data)), data.values)
+		ax.set_title(f'Top {col}')
+		ax.set_xticks(range(len(data)))
+		ax.set_xticklabels(data.index, rotation=45)
+
+
+def _create_comparison_chart(col1: str, summary1: Tuple[str, object], col2: str, summary2: Tuple[str, object]) -> Figure:
+	fig, (ax1, ax2) = new_figure(1, 2, figsize=(12, 5))
+	_plot_column_summary(ax1, col1, summary1)
+	_plot_column_summary(ax2, col2, summary2)
+	fig.tight_layout()
 	return fig
 
 
-def answer_question(df: pd.DataFrame, question: str) -> QAResult:
-	q = question.strip().lower()
-	
-	# 1) Basic counts and info
-	if re.search(r"(how many|count)\s+(rows|records)", q):
-		return QAResult(message=f"Total rows: {len(df)}")
-	if re.search(r"(how many|count)\s+(columns|features)", q):
-		return QAResult(message=f"Total columns: {df.shape[1]}")
-	if re.search(r"(what|show)\s+(columns|features)", q):
-		cols_df = pd.DataFrame({'Column': df.columns, 'Type': df.dtypes.astype(str), 'Non-Null': df.count()})
-		return QAResult(table=cols_df, message=f"Dataset has {len(df.columns)} columns")
-	
-	# 2) Sales queries with date filtering
-	if re.search(r"(sale|sales|revenue|amount|income)", q):
-		date_filter = _parse_date_filter(question)
-		sales_col = _find_sales_column(df)
-		date_col = _find_date_column(df)
-		
-		if not sales_col:
-			return QAResult(message="No sales/revenue column found. Look for columns like 'sales', 'revenue', 'amount', 'price'.")
-		
-		if date_filter and date_col:
-			month, year = date_filter
-			# Filter by month and year
-			filtered_df = df.copy()
-			if year:
-				filtered_df = filtered_df[filtered_df[date_col].dt.year == int(year)]
-			filtered_df = filtered_df[filtered_df[date_col].dt.month == month]
-			
-			if filtered_df.empty:
-				return QAResult(message=f"No data found for {pd.Timestamp(year=int(year), month=month, day=1).strftime('%B %Y')}")
-			
-			total_sales = pd.to_numeric(filtered_df[sales_col], errors='coerce').sum()
-			avg_sales = pd.to_numeric(filtered_df[sales_col], errors='coerce').mean()
-			
-			# Create chart
-			fig, ax = plt.subplots(figsize=(8, 5))
+class Intent:
+	"""A question pattern and the handler that answers questions matching it.
+
+	handler(df, question, q, groups, cube) receives the original question, its stripped
+	lower-case form, the pattern's capture groups and the dataset's MeasureCube, if
+	one was passed to answer_question. params(question, q, groups)
+	returns everything the answer depends on besides the data, so that differently
+	worded questions with the same params share cached answers. full_data marks
+	handlers cheap enough to run on the whole dataset rather than a sample.
+	"""
+
+	def __init__(self, name: str, pattern: str, handler: Callable[..., QAResult], params: Optional[Callable[..., Tuple]] = None, full_data: bool = False):
+		self.name = name
+		self.pattern = pattern
+		self.handler = handler
+		self.params = params or (lambda question, q, groups: tuple(groups))
+		self.full_data = full_data
+		self.groups = re.compile(pattern).groups
+
+
+_INTENTS: List[Intent] = []
+_ROUTER: Optional[Tuple["re.Pattern", Dict[int, Tuple[Intent, int]]]] = None
+_ROUTER_LOCK = threading.Lock()
+
+# name -> [calls, total seconds]
+_INTENT_STATS: Dict[str, List[float]] = {}
+_STATS_LOCK = threading.Lock()
+
+FALLBACK_INTENT = "fallback"
+
+
+def register_intent(name: str, pattern: str, before: Optional[str] = None, params: Optional[Callable[..., Tuple]] = None, full_data: bool = False):
+	"""Decorator adding an intent; intents are tried in registration order.
+
+	Pass before=<intent name> to give a new intent priority over an existing one.
+	params defaults to the capture groups; see Intent for full_data.
+	"""
+	def decorator(handler: Callable[..., QAResult]) -> Callable[..., QAResult]:
+		global _ROUTER
+		intent = Intent(name, pattern, handler, params, full_data)
+		with _ROUTER_LOCK:
+			names = [i.name for i in _INTENTS]
+			if name in names:
+				_INTENTS[names.index(name)] = intent
+			elif before is not None and before in names:
+				_INTENTS.insert(names.index(before), intent)
+			else:
+				_INTENTS.append(intent)
+			_ROUTER = None
+		return handler
+	return decorator
+
+
+def _router() -> Tuple["re.Pattern", Dict[int, Tuple[Intent, int]]]:
+	"""All intents compiled into one anchored regex of ordered lookahead alternatives.
+
+	At position 0 the engine tries each alternative in priority order; alternative i
+	is a lookahead for intent i's pattern anywhere in the question followed by an
+	empty marker group, so the first intent that matches wins exactly as a sequence
+	of re.search calls would, and m.lastindex identifies it. Returns (regex,
+	marker group -> (intent, index of its first capture group)).
+	"""
+	global _ROUTER
+	router = _ROUTER
+	if router is not None:
+		return router
+	with _ROUTER_LOCK:
+		if _ROUTER is None:
+			parts, markers, group = [], {}, 0
+			for intent in _INTENTS:
+				parts.append(f"(?=.*?(?:{intent.pattern}))()")
+				first = group + 1
+				group += intent.groups + 1
+				markers[group] = (intent, first)
+			_ROUTER = (re.compile("^(?:" + "|".join(parts) + ")", re.DOTALL), markers)
+		return _ROUTER
+
+
+def classify_question(question: str) -> Tuple[Optional[Intent], Tuple[Optional[str], ...]]:
+	"""Intent for a question and its capture groups, in one regex pass."""
+	regex, markers = _router()
+	m = regex.match(question.strip().lower())
+	if m is None:
+		return None, ()
+	intent, first = markers[m.lastindex]
+	return intent, m.groups()[first - 1:first - 1 + intent.groups]
+
+
+def question_key(question: str) -> Tuple:
+	"""Canonical (intent, params) form of a question, usable as a cache key."""
+	intent, groups = classify_question(question)
+	if intent is None:
+		return (FALLBACK_INTENT,)
+	return (intent.name,) + tuple(intent.params(question, question.strip().lower(), groups))
+
+
+def answer_questions(
+	df: pd.DataFrame,
+	questions: List[str],
+	cube: Optional[MeasureCube] = None,
+	sample: Optional[pd.DataFrame] = None,
+	max_workers: int = 4,
+) -> List[Tuple[QAResult, float]]:
+	"""Answer many questions about one dataset together.
+
+	Questions with the same question_key are answered once. Aggregate questions are
+	planned together, so those over the same filters, measures and group-by columns
+	share masks and groupbys (see run_queries); the rest run on a thread pool. sample,
+	when given, stands in for df for intents not marked full_data. Returns (result,
+	seconds) per question in input order; shared work counts toward every question
+	that used it. A question that raises gets a result with error set; the others
+	are still answered.
+	"""
+	keys = [question_key(question) for question in questions]
+	first: Dict[Tuple, int] = {}
+	for i, key in enumerate(keys):
+		first.setdefault(key, i)
+	answers: Dict[Tuple, Tuple[QAResult, float]] = {}
+	plans: List[Tuple[Tuple, str, str, QueryPlan]] = []
+	singles: List[Tuple[Tuple, str]] = []
+	for key, i in first.items():
+		question = questions[i]
+		intent, groups = classify_question(question)
+		if intent is not None and intent.handler is _answer_aggregate:
+			start = time.perf_counter()
+			try:
+				plans.append((key, intent.name, groups[0], parse_query(groups[0], groups[1], schema_index(df))))
+			except QueryError as e:
+				answers[key] = (QAResult(message=str(e)), time.perf_counter() - start)
+			except Exception as e:
+				answers[key] = (_error_result(question, e), time.perf_counter() - start)
+		else:
+			singles.append((key, question))
+
+	def run_single(question: str) -> Tuple[QAResult, float]:
+		start = time.perf_counter()
+		try:
+			frame = df if sample is None or uses_full_data(question) else sample
+			result = answer_question(frame, question, cube=cube)
+		except Exception as e:
+			result = _error_result(question, e)
+		return result, time.perf_counter() - start
+
+	def run_plans() -> List[Tuple[QAResult, float]]:
+		start = time.perf_counter()
+		try:
+			values = run_queries(df, [plan for _, _, _, plan in plans])
+		except Exception:
+			# Run the plans one by one so only the failing question reports an error
+			values = None
+		shared = time.perf_counter() - start
+		results = []
+		for i, (key, name, op, plan) in enumerate(plans):
+			start = time.perf_counter()
+			try:
+				result = _aggregate_result(op, plan, run_query(df, plan) if values is None else values[i])
+			except QueryError as e:
+				result = QAResult(message=str(e))
+			except Exception as e:
+				result = _error_result(questions[first[key]], e)
+			seconds = shared + time.perf_counter() - start
+			_record(name, seconds)
+			results.append((result, seconds))
+		return results
+
+	with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="qa") as pool:
+		planned = pool.submit(run_plans) if plans else None
+		for (key, _), answer in zip(singles, pool.map(run_single, [question for _, question in singles])):
+			answers[key] = answer
+		if planned is not None:
+			for (key, _, _, _), answer in zip(plans, planned.result()):
+				answers[key] = answer
+	return [answers[key] for key in keys]
+
+
+def _error_result(question: str, error: Exception) -> QAResult:
+	print(f"Q&A error for {question!r}: {traceback.format_exc()}")
+	return QAResult(message=f"Could not answer this question: {error}", error=str(error))
+
+
+def uses_full_data(question: str) -> bool:
+	"""Whether the question's intent should see the whole dataset rather than a sample."""
+	intent, _ = classify_question(question)
+	return intent is not None and intent.full_data
+
+
+def _record(name: str, seconds: float) -> None:
+	with _STATS_LOCK:
+		stats = _INTENT_STATS.setdefault(name, [0, 0.0])
+		stats[0] += 1
+		stats[1] += seconds
+
+
+def intent_stats() -> Dict[str, Dict[str, float]]:
+	"""Per-intent call counts and timings (classification plus handler)."""
+	with _STATS_LOCK:
+		return {
+			name: {"calls": int(calls), "total_ms": total * 1000, "avg_ms": total * 1000 / calls if calls else 0.0}
+			for name, (calls, total) in _INTENT_STATS.items()
+		}
+
+
+def reset_intent_stats() -> None:
+	with _STATS_LOCK:
+		_INTENT_STATS.clear()
+
+
+def answer_question(df: pd.DataFrame, question: str, cube: Optional[MeasureCube] = None) -> QAResult:
+	"""Answer question from df.
+
+	cube, when given, holds aggregates of the full dataset (df may be a sample of it);
+	questions it can answer are served from the cube instead of df.
+	"""
+	start = time.perf_counter()
+	intent, groups = classify_question(question)
+	if intent is None:
+		result = _fallback()
+	else:
+		result = intent.handler(df, question, question.strip().lower(), groups, cube)
+	_record(intent.name if intent is not None else FALLBACK_INTENT, time.perf_counter() - start)
+	return result
+
+
+def _cube_for(df: pd.DataFrame, cube: Optional[MeasureCube], date_col: Optional[str] = None, measures: Tuple[str, ...] = (), dimension: Optional[str] = None) -> MeasureCube:
+	# The dataset cube when it has what the question needs, else a minimal one over df
+	if cube is not None and cube.covers(date_col, measures, dimension):
+		return cube
+	return build_cube(df, date_col=date_col, measures=list(measures), dimensions=[dimension] if dimension else [])
+
+
+# 1) Basic counts and info
+def _no_params(question: str, q: str, groups) -> Tuple:
+	return ()
+
+
+# Questions with a where/by/per clause are left to filtered_aggregate
+@register_intent("row_count", r"(how many|count)\s+(rows|records)\b(?!.*\b(?:where|by|per)\s)", params=_no_params)
+def _answer_row_count(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	return QAResult(message=f"Total rows: {cube.n_rows if cube is not None else len(df)}")
+
+
+@register_intent("column_count", r"(how many|count)\s+(columns|features)", params=_no_params)
+def _answer_column_count(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	return QAResult(message=f"Total columns: {df.shape[1]}")
+
+
+@register_intent("column_list", r"(what|show)\s+(columns|features)", params=_no_params)
+def _answer_column_list(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	cols_df = pd.DataFrame({'Column': df.columns, 'Type': df.dtypes.astype(str), 'Non-Null': df.count()})
+	return QAResult(table=cols_df, message=f"Dataset has {len(df.columns)} columns")
+
+
+# 2) Sales queries with date filtering
+@register_intent("sales", r"(sale|sales|revenue|amount|income)", params=lambda question, q, groups: (_parse_date_filter(question),))
+def _answer_sales(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	date_filter = _parse_date_filter(question)
+	schema = schema_index(df)
+	sales_col = schema.role("sales")
+	date_col = schema.role("date")
+
+	if not sales_col:
+		return QAResult(message="No sales/revenue column found. Look for columns like 'sales', 'revenue', 'amount', 'price'.")
+	if not is_numeric_dtype(df[sales_col]):
+		df = df.assign(**{sales_col: pd.to_numeric(df[sales_col], errors='coerce')})
+	cube = _cube_for(df, cube, date_col, (sales_col,))
+
+	if date_filter and date_col:
+		month, year = date_filter
+		period = pd.Timestamp(year=int(year) if year else 2000, month=month, day=1).strftime('%B %Y' if year else '%B')
+		days = cube.grains.get("day")
+		if days is None:
+			return QAResult(message=f"No data found for {period}")
+		# Select the matching days from the cube rather than filtering rows
+		mask = days.rows.index.month == month
+		if year:
+			mask &= days.rows.index.year == int(year)
+		selected = days.select(mask)
+		n_rows = int(selected.rows.sum())
+
+		if n_rows == 0:
+			return QAResult(message=f"No data found for {period}")
+
+		totals = selected.total(sales_col)
+		daily = pd.DataFrame({
+			date_col: selected.rows.index.strftime('%Y-%m-%d'),
+			sales_col: selected.stats["sum"][sales_col].to_numpy(),
+			'rows': selected.rows.to_numpy(),
+		})
+
+		title = f'Daily Sales - {period}' if n_rows > 1 else f'Sales - {period}'
+
+		def draw() -> Figure:
+			fig, ax = new_figure(figsize=(8, 5))
 			# Group by day if possible
-			if len(filtered_df) > 1:
-				daily_sales = filtered_df.groupby(filtered_df[date_col].dt.day)[sales_col].sum()
+			if n_rows > 1:
+				daily_sales = selected.stats["sum"][sales_col].groupby(selected.rows.index.day).sum()
 				ax.bar(daily_sales.index, daily_sales.values)
 				ax.set_xlabel('Day of Month')
-				ax.set_ylabel('Sales')
-				ax.set_title(f'Daily Sales - {pd.Timestamp(year=int(year), month=month, day=1).strftime("%B %Y")}')
 			else:
-				ax.bar([1], [total_sales])
+				ax.bar([1], [totals["sum"]])
 				ax.set_xlabel('Period')
-				ax.set_ylabel('Sales')
-				ax.set_title(f'Sales - {pd.Timestamp(year=int(year), month=month, day=1).strftime("%B %Y")}')
-			
-			return QAResult(
-				table=filtered_df[[date_col, sales_col]].head(20),
-				figure=fig,
-				message=f"Sales in {pd.Timestamp(year=int(year), month=month, day=1).strftime('%B %Y')}: Total: {total_sales:.2f}, Average: {avg_sales:.2f}"
-			)
-		else:
-			# No date filter, show overall sales
-			total_sales = pd.to_numeric(df[sales_col], errors='coerce').sum()
-			avg_sales = pd.to_numeric(df[sales_col], errors='coerce').mean()
-			
-			# Create chart
-			fig, ax = plt.subplots(figsize=(8, 5))
-			if _find_date_column(df):
-				date_col = _find_date_column(df)
-				monthly_sales = df.groupby(df[date_col].dt.to_period('M'))[sales_col].sum()
-				ax.plot(monthly_sales.index.astype(str), monthly_sales.values)
+			ax.set_ylabel('Sales')
+			ax.set_title(title)
+			return fig
+
+		return QAResult(
+			table=daily.head(31),
+			chart=Chart("bar", title, draw),
+			message=f"Sales in {period}: Total: {totals['sum']:.2f}, Average: {totals['mean']:.2f}"
+		)
+	else:
+		# No date filter, show overall sales
+		totals = cube.totals.total(sales_col)
+
+		months = cube.grains.get("month") if date_col else None
+		title = 'Monthly Sales Trend' if months is not None else 'Total Sales'
+
+		def draw() -> Figure:
+			fig, ax = new_figure(figsize=(8, 5))
+			if months is not None:
+				monthly_sales = downsample_series(months.stats["sum"][sales_col])
+				ax.plot(monthly_sales.index, monthly_sales.values)
 				ax.set_xlabel('Month')
-				ax.set_ylabel('Sales')
-				ax.set_title('Monthly Sales Trend')
 				ax.tick_params(axis='x', rotation=45)
 			else:
-				ax.bar([1], [total_sales])
+				ax.bar([1], [totals["sum"]])
 				ax.set_xlabel('Overall')
-				ax.set_ylabel('Sales')
-				ax.set_title('Total Sales')
-			
-			return QAResult(
-				table=df[[sales_col]].describe(),
-				figure=fig,
-				message=f"Overall sales: Total: {total_sales:.2f}, Average: {avg_sales:.2f}"
-			)
-	
-	# 3) Minimum/Maximum values
-	if re.search(r"(minimum|min|lowest|smallest)\s+(?:value\s+)?(?:in|of)?\s*([a-zA-Z0-9_]+)", q):
-		col = _normalize_col(df, re.search(r"(minimum|min|lowest|smallest)\s+(?:value\s+)?(?:in|of)?\s*([a-zA-Z0-9_]+)", q).group(2))
-		if col and col in df.columns:
-			if is_numeric_dtype(df[col]):
-				min_val = df[col].min()
-				min_rows = df[df[col] == min_val]
-				fig, ax = plt.subplots(figsize=(8, 5))
-				ax.hist(df[col].dropna(), bins=30, alpha=0.7)
-				ax.axvline(min_val, color='red', linestyle='--', label=f'Min: {min_val}')
-				ax.set_title(f'Distribution of {col} (Min highlighted)')
-				ax.legend()
-				return QAResult(table=min_rows, figure=fig, message=f"Minimum value in {col}: {min_val}")
-			else:
-				return QAResult(message=f"{col} is not numeric, cannot find minimum")
-		return QAResult(message="Column not found")
-	
-	if re.search(r"(maximum|max|highest|largest)\s+(?:value\s+)?(?:in|of)?\s*([a-zA-Z0-9_]+)", q):
-		col = _normalize_col(df, re.search(r"(maximum|max|highest|largest)\s+(?:value\s+)?(?:in|of)?\s*([a-zA-Z0-9_]+)", q).group(2))
-		if col and col in df.columns:
-			if is_numeric_dtype(df[col]):
-				max_val = df[col].max()
-				max_rows = df[df[col] == max_val]
-				fig, ax = plt.subplots(figsize=(8, 5))
-				ax.hist(df[col].dropna(), bins=30, alpha=0.7)
-				ax.axvline(max_val, color='red', linestyle='--', label=f'Max: {max_val}')
-				ax.set_title(f'Distribution of {col} (Max highlighted)')
+			ax.set_ylabel('Sales')
+			ax.set_title(title)
+			return fig
+
+		return QAResult(
+			table=pd.DataFrame({'Statistic': list(totals), sales_col: list(totals.values())}),
+			chart=Chart("line" if months is not None else "bar", title, draw),
+			message=f"Overall sales: Total: {totals['sum']:.2f}, Average: {totals['mean']:.2f}"
+		)
+
+
+# 3) Minimum/Maximum values
+def _answer_extreme(df: pd.DataFrame, name: Optional[str], kind: str) -> QAResult:
+	col = schema_index(df).resolve(name)
+	if col:
+		if is_numeric_dtype(df[col]):
+			val = df[col].min() if kind == "Min" else df[col].max()
+			rows = df[df[col] == val]
+			title = f'Distribution of {col} ({kind} highlighted)'
+			hist = _histogram(df[col], 30)
+
+			def draw() -> Figure:
+				fig, ax = new_figure(figsize=(8, 5))
+				_plot_histogram(ax, hist, alpha=0.7)
+				ax.axvline(val, color='red', linestyle='--', label=f'{kind}: {val}')
+				ax.set_title(title)
 				ax.legend()
-				return QAResult(table=max_rows, figure=fig, message=f"Maximum value in {col}: {max_val}")
-			else:
-				return QAResult(message=f"{col} is not numeric, cannot find maximum")
-		return QAResult(message="Column not found")
-	
-	# 4) Unique values and distributions
-	m = re.search(r"(unique|distinct).*(in|of)\s+([a-zA-Z0-9_]+)", q)
-	if m:
-		col = _normalize_col(df, m.group(3))
-		if col and col in df.columns:
-			vc = df[col].astype(str).value_counts().reset_index()
-			vc.columns = [col, "count"]
-			fig, ax = plt.subplots(figsize=(6, 4))
-			sns.barplot(y=vc[col].head(20), x=vc["count"].head(20), ax=ax)
-			ax.set_title(f"Top {col}")
-			return QAResult(table=vc.head(100), figure=fig, message=f"Top values in {col}")
-		return QAResult(message="Column not found.")
+				return fig
 
-	# 5) Aggregations with filters
-	m = re.search(r"(avg|average|mean|sum|min|max)\s+(?:of\s+)?([a-zA-Z0-9_]+)(?:\s+where\s+([a-zA-Z0-9_]+)\s*(=|==|is|equals)\s*([\w\-\.]+))?", q)
-	if m:
-		op, col_name, fcol, _, fval = m.groups()
-		col = _normalize_col(df, col_name)
-		if not col:
-			return QAResult(message="Target column not found.")
-		res = df.copy()
-		if fcol and fval is not None:
-			fcol_real = _normalize_col(df, fcol)
-			if fcol_real:
-				res = res[res[fcol_real].astype(str).str.lower() == str(fval).lower()]
-			else:
-				return QAResult(message="Filter column not found.")
-		if op in ["avg", "average", "mean"]:
-			val = pd.to_numeric(res[col], errors="coerce").mean()
-		elif op == "sum":
-			val = pd.to_numeric(res[col], errors="coerce").sum()
-		elif op == "min":
-			val = pd.to_numeric(res[col], errors="coerce").min()
+			label = "Minimum" if kind == "Min" else "Maximum"
+			return QAResult(table=rows, chart=Chart("histogram", title, draw), message=f"{label} value in {col}: {val}")
 		else:
-			val = pd.to_numeric(res[col], errors="coerce").max()
-		return QAResult(message=f"{op} of {col}: {val}")
+			return QAResult(message=f"{col} is not numeric, cannot find {'minimum' if kind == 'Min' else 'maximum'}")
+	return QAResult(message="Column not found")
 
-	# 6) Top N categories
-	m = re.search(r"(top|most common)\s*(\d+)?\s*(values|categories|items)?\s*(in|of)?\s*([a-zA-Z0-9_]+)", q)
-	if m:
-		n_str, col_name = m.group(2), m.group(5)
-		n = int(n_str) if n_str else 10
-		col = _normalize_col(df, col_name)
-		if not col:
-			return QAResult(message="Column not found.")
-		vc = df[col].astype(str).value_counts().reset_index().head(n)
+
+@register_intent("minimum", r"(minimum|min|lowest|smallest)\s+(?:value\s+)?(?:(?:in|of)\s+)?([\w\- ]+)", params=lambda question, q, groups: (groups[1],))
+def _answer_minimum(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	return _answer_extreme(df, groups[1], "Min")
+
+
+@register_intent("maximum", r"(maximum|max|highest|largest)\s+(?:value\s+)?(?:(?:in|of)\s+)?([\w\- ]+)", params=lambda question, q, groups: (groups[1],))
+def _answer_maximum(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	return _answer_extreme(df, groups[1], "Max")
+
+
+# 4) Unique values and distributions
+@register_intent("unique_values", r"(unique|distinct).*(in|of)\s+([\w\- ]+)", params=lambda question, q, groups: (groups[2],))
+def _answer_unique_values(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	col = schema_index(df).resolve(groups[2])
+	if col:
+		vc = df[col].astype(str).value_counts().reset_index()
 		vc.columns = [col, "count"]
-		fig, ax = plt.subplots(figsize=(6, 4))
-		sns.barplot(y=vc[col], x=vc["count"], ax=ax)
-		ax.set_title(f"Top {n} {col}")
-		return QAResult(table=vc, figure=fig, message=f"Top {n} values in {col}")
+		return QAResult(table=vc.head(100), chart=_bar_chart(vc, col, "count", f"Top {col}"), message=f"Top values in {col}")
+	return QAResult(message="Column not found.")
 
-	# 7) Counts by category
-	m = re.search(r"(count|number)\s+(by|per)\s+([a-zA-Z0-9_]+)", q)
-	if m:
-		col = _normalize_col(df, m.group(3))
-		if not col:
-			return QAResult(message="Column not found.")
-		vc = df.groupby(col).size().reset_index(name="count").sort_values("count", ascending=False)
-		fig, ax = plt.subplots(figsize=(6, 4))
-		sns.barplot(y=vc[col].head(20), x=vc["count"].head(20), ax=ax)
-		ax.set_title(f"Count by {col}")
-		return QAResult(table=vc, figure=fig, message=f"Counts by {col}")
-
-	# 8) Time trends and patterns
-	if re.search(r"(trend|over time|by month|monthly|weekly|daily|pattern)", q):
-		date_col = _find_date_column(df)
-		if not date_col:
-			return QAResult(message="No datetime column found for trend analysis.")
-		
-		# Determine time period
-		if 'daily' in q:
-			period = 'D'
-			title = "Daily counts"
-		elif 'weekly' in q:
-			period = 'W'
-			title = "Weekly counts"
-		else:
-			period = 'M'
-			title = "Monthly counts"
-		
-		counts = df[date_col].dropna().dt.to_period(period).value_counts().sort_index()
-		res = counts.reset_index()
-		res.columns = ["period", "count"]
-		
-		fig, ax = plt.subplots(figsize=(8, 5))
-		ax.plot(res["period"].astype(str), res["count"])
+
+# 5) Aggregations, with filters and grouping
+def _aggregate_params(question: str, q: str, groups) -> Tuple:
+	return (groups[0], " ".join(groups[1].split()))
+
+
+# Filtered or grouped aggregates outrank the sales and min/max intents, which would
+# otherwise answer them while ignoring the clause. Counts may also be asked as "how
+# many ..." or "number of ...", and "count where ..." counts rows.
+@register_intent("filtered_aggregate", r"\b(average|avg|mean|sum|total|minimum|min|maximum|max|count|how many|number of)\s+((?:.+?\s)?where\s.+|.+?\s(?:by|per)\s.+)", before="sales", params=_aggregate_params, full_data=True)
+@register_intent("aggregate", r"\b(avg|average|mean|sum|min|max)\s+(.+)", params=_aggregate_params, full_data=True)
+def _answer_aggregate(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	op, text = groups
+	try:
+		plan = parse_query(op, text, schema_index(df))
+		value = run_query(df, plan)
+	except QueryError as e:
+		return QAResult(message=str(e))
+	return _aggregate_result(op, plan, value)
+
+
+def _aggregate_result(op: str, plan: QueryPlan, value) -> QAResult:
+	if plan.aggregate == "count":
+		# "how many" / "number of" read as count
+		op = "count"
+	subject = f"{op} of {plan.measure if plan.measure is not None else 'rows'}"
+	where = f" where {plan.describe_filter()}" if plan.conditions else ""
+	if plan.group_by is None:
+		return QAResult(message=f"{subject}{where}: {value}")
+	res = value.rename(subject).reset_index().sort_values(subject, ascending=False)
+	chart = _bar_chart(res, plan.group_by, subject, f"{subject} by {plan.group_by}")
+	return QAResult(table=res, chart=chart, message=f"{subject} by {plan.group_by}{where}")
+
+
+# 6) Top N categories
+@register_intent("top_n", r"(top|most common)\s*(\d+)?\s*(values|categories|items)?\s*(?:(in|of)\s+)?([\w\- ]+)", params=lambda question, q, groups: (int(groups[1]) if groups[1] else 10, groups[4]))
+def _answer_top_n(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	n_str, col_name = groups[1], groups[4]
+	n = int(n_str) if n_str else 10
+	col = schema_index(df).resolve(col_name)
+	if not col:
+		return QAResult(message="Column not found.")
+	vc = df[col].astype(str).value_counts().reset_index().head(n)
+	vc.columns = [col, "count"]
+	return QAResult(table=vc, chart=_bar_chart(vc, col, "count", f"Top {n} {col}", limit=n), message=f"Top {n} values in {col}")
+
+
+# 7) Counts by category
+@register_intent("count_by", r"(count|number)\s+(by|per)\s+([\w\- ]+)", params=lambda question, q, groups: (groups[2],))
+def _answer_count_by(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	col = schema_index(df).resolve(groups[2])
+	if not col:
+		return QAResult(message="Column not found.")
+	sizes = _cube_for(df, cube, dimension=col).dimensions[col].rows
+	vc = sizes.rename_axis(col).reset_index(name="count").sort_values("count", ascending=False)
+	return QAResult(table=vc, chart=_bar_chart(vc, col, "count", f"Count by {col}"), message=f"Counts by {col}")
+
+
+# 8) Time trends and patterns
+def _trend_granularity(q: str) -> Optional[str]:
+	# Determine time period; pick one from the data span when none is asked for
+	if 'daily' in q:
+		return "day"
+	elif 'weekly' in q:
+		return "week"
+	elif 'monthly' in q or 'by month' in q:
+		return "month"
+	return None
+
+
+@register_intent("trend", r"(trend|over time|by month|monthly|weekly|daily|pattern)", params=lambda question, q, groups: (_trend_granularity(q),))
+def _answer_trend(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	date_col = schema_index(df).role("date")
+	if not date_col:
+		return QAResult(message="No datetime column found for trend analysis.")
+
+	cube = _cube_for(df, cube, date_col)
+	granularity = _trend_granularity(q) or choose_granularity(cube.date_min, cube.date_max)
+	grain = cube.grains.get(granularity)
+	counts = grain.rows if grain is not None else pd.Series([], index=pd.DatetimeIndex([]), dtype="int64")
+	title = f"{GRANULARITY_LABELS[granularity]} counts"
+	res = pd.DataFrame({"period": format_buckets(counts.index, granularity), "count": counts.to_numpy()})
+
+	def draw() -> Figure:
+		fig, ax = new_figure(figsize=(8, 5))
+		plotted = downsample_series(counts)
+		ax.plot(plotted.index, plotted.values)
 		ax.set_title(title)
 		ax.tick_params(axis='x', rotation=45)
-		return QAResult(table=res, figure=fig, message=f"{title} by {date_col}")
-
-	# 9) Business metrics and correlations
-	if re.search(r"(profit|margin|growth|performance|correlation|relationship)", q):
-		# Look for numeric columns that might be business metrics
-		numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-		if len(numeric_cols) >= 2:
-			fig, ax = plt.subplots(figsize=(8, 5))
-			corr = df[numeric_cols].corr()
+		return fig
+
+	return QAResult(table=res, chart=Chart("line", title, draw), message=f"{title} by {date_col}")
+
+
+# 9) Business metrics and correlations
+@register_intent("correlation", r"(profit|margin|growth|performance|correlation|relationship)", params=_no_params)
+def _answer_correlation(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	# Look for numeric columns that might be business metrics
+	numeric_cols = list(schema_index(df).numeric)
+	if len(numeric_cols) >= 2:
+		corr = df[numeric_cols].corr()
+		title = "Business Metrics Correlation"
+
+		def draw() -> Figure:
+			fig, ax = new_figure(figsize=(8, 5))
 			sns.heatmap(corr, annot=True, cmap='coolwarm', ax=ax)
-			ax.set_title("Business Metrics Correlation")
-			return QAResult(table=corr, figure=fig, message="Correlation between business metrics")
-		else:
-			return QAResult(message="Need at least 2 numeric columns for business metrics analysis.")
-
-	# 10) Data quality and missing values
-	if re.search(r"(missing|null|empty|quality|clean)", q):
-		missing_info = df.isnull().sum()
-		missing_df = pd.DataFrame({'Column': missing_info.index, 'Missing_Count': missing_info.values, 'Missing_Percentage': (missing_info.values / len(df) * 100)})
-		missing_df = missing_df[missing_df['Missing_Count'] > 0].sort_values('Missing_Count', ascending=False)
-		
-		if not missing_df.empty:
-			fig, ax = plt.subplots(figsize=(8, 5))
+			ax.set_title(title)
+			return fig
+
+		return QAResult(table=corr, chart=Chart("heatmap", title, draw), message="Correlation between business metrics")
+	else:
+		return QAResult(message="Need at least 2 numeric columns for business metrics analysis.")
+
+
+# 10) Data quality and missing values
+@register_intent("missing", r"(missing|null|empty|quality|clean)", params=_no_params)
+def _answer_missing(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	missing_info = df.isnull().sum()
+	missing_df = pd.DataFrame({'Column': missing_info.index, 'Missing_Count': missing_info.values, 'Missing_Percentage': (missing_info.values / len(df) * 100)})
+	missing_df = missing_df[missing_df['Missing_Count'] > 0].sort_values('Missing_Count', ascending=False)
+
+	if not missing_df.empty:
+		title = 'Missing Data by Column (%)'
+
+		def draw() -> Figure:
+			fig, ax = new_figure(figsize=(8, 5))
 			ax.bar(missing_df['Column'], missing_df['Missing_Percentage'])
-			ax.set_title('Missing Data by Column (%)')
+			ax.set_title(title)
 			ax.set_xlabel('Column')
 			ax.set_ylabel('Missing Percentage')
 			ax.tick_params(axis='x', rotation=45)
-			return QAResult(table=missing_df, figure=fig, message=f"Found {len(missing_df)} columns with missing data")
-		else:
-			return QAResult(message="No missing data found in the dataset")
-
-	# 11) Data distribution and statistics
-	if re.search(r"(distribution|spread|statistics|stats|summary)", q):
-		numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-		if numeric_cols:
-			fig, axes = plt.subplots(2, 2, figsize=(12, 8))
-			fig.suptitle('Data Distribution Overview')
-			
-			for i, col in enumerate(numeric_cols[:4]):
+			return fig
+
+		return QAResult(table=missing_df, chart=Chart("bar", title, draw), message=f"Found {len(missing_df)} columns with missing data")
+	else:
+		return QAResult(message="No missing data found in the dataset")
+
+
+# 11) Data distribution and statistics
+@register_intent("distribution", r"(distribution|spread|statistics|stats|summary)", params=_no_params)
+def _answer_distribution(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	numeric_cols = list(schema_index(df).numeric)
+	if numeric_cols:
+		title = 'Data Distribution Overview'
+		hists = [(col, _histogram(df[col], 20)) for col in numeric_cols[:4]]
+
+		def draw() -> Figure:
+			fig, axes = new_figure(2, 2, figsize=(12, 8))
+			fig.suptitle(title)
+
+			for i, (col, hist) in enumerate(hists):
 				row, col_idx = i // 2, i % 2
-				axes[row, col_idx].hist(df[col].dropna(), bins=20, alpha=0.7)
+				_plot_histogram(axes[row, col_idx], hist, alpha=0.7)
 				axes[row, col_idx].set_title(f'{col}')
 				axes[row, col_idx].set_xlabel(col)
-			
-			plt.tight_layout()
-			return QAResult(table=df[numeric_cols].describe(), figure=fig, message="Data distribution overview for numeric columns")
-		else:
-			return QAResult(message="No numeric columns found for distribution analysis")
-
-	# 12) Comparison between columns
-	if re.search(r"(compare|comparison|vs|versus|between)\s+([a-zA-Z0-9_]+)\s+(?:and|&|vs|versus)\s+([a-zA-Z0-9_]+)", q):
-		m = re.search(r"(compare|comparison|vs|versus|between)\s+([a-zA-Z0-9_]+)\s+(?:and|&|vs|versus)\s+([a-zA-Z0-9_]+)", q)
-		col1 = _normalize_col(df, m.group(2))
-		col2 = _normalize_col(df, m.group(3))
-		
-		if col1 and col2 and col1 in df.columns and col2 in df.columns:
-			fig = _create_comparison_chart(df, col1, col2, f"Comparison: {col1} vs {col2}")
-			comparison_data = pd.DataFrame({
-				'Column': [col1, col2],
-				'Count': [df[col1].count(), df[col2].count()],
-				'Unique': [df[col1].nunique(), df[col2].nunique()]
-			})
-			if is_numeric_dtype(df[col1]):
-				comparison_data.loc[0, 'Mean'] = df[col1].mean()
-			if is_numeric_dtype(df[col2]):
-				comparison_data.loc[1, 'Mean'] = df[col2].mean()
-			
-			return QAResult(table=comparison_data, figure=fig, message=f"Comparison between {col1} and {col2}")
-		else:
-			return QAResult(message="One or both columns not found")
-
-	# 13) Outliers detection
-	if re.search(r"(outlier|anomaly|extreme|unusual)", q):
-		numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-		if numeric_cols:
-			outliers_data = []
-			fig, axes = plt.subplots(2, 2, figsize=(12, 8))
-			fig.suptitle('Outlier Detection')
-			
-			for i, col in enumerate(numeric_cols[:4]):
+
+			fig.tight_layout()
+			return fig
+
+		return QAResult(table=df[numeric_cols].describe(), chart=Chart("histogram", title, draw), message="Data distribution overview for numeric columns")
+	else:
+		return QAResult(message="No numeric columns found for distribution analysis")
+
+
+# 12) Comparison between columns
+@register_intent("compare", r"(compare|comparison|vs|versus|between)\s+([\w\- ]+?)\s+(?:and|&|vs|versus)\s+([\w\- ]+)", params=lambda question, q, groups: (groups[1], groups[2]))
+def _answer_compare(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	schema = schema_index(df)
+	col1 = schema.resolve(groups[1])
+	col2 = schema.resolve(groups[2])
+
+	if col1 and col2:
+		title = f"Comparison: {col1} vs {col2}"
+		summary1, summary2 = _column_summary(df[col1]), _column_summary(df[col2])
+		chart = Chart("comparison", title, lambda: _create_comparison_chart(col1, summary1, col2, summary2))
+		comparison_data = pd.DataFrame({
+			'Column': [col1, col2],
+			'Count': [df[col1].count(), df[col2].count()],
+			'Unique': [df[col1].nunique(), df[col2].nunique()]
+		})
+		if is_numeric_dtype(df[col1]):
+			comparison_data.loc[0, 'Mean'] = df[col1].mean()
+		if is_numeric_dtype(df[col2]):
+			comparison_data.loc[1, 'Mean'] = df[col2].mean()
+
+		return QAResult(table=comparison_data, chart=chart, message=f"Comparison between {col1} and {col2}")
+	else:
+		return QAResult(message="One or both columns not found")
+
+
+# 13) Outliers detection
+@register_intent("outliers", r"(outlier|anomaly|extreme|unusual)", params=_no_params)
+def _answer_outliers(df: pd.DataFrame, question: str, q: str, groups, cube: Optional[MeasureCube] = None) -> QAResult:
+	numeric_cols = list(schema_index(df).numeric)
+	if numeric_cols:
+		report = detect_outliers(df, methods=("iqr",), columns=numeric_cols, max_indices=0)
+		title = 'Outlier Detection'
+		# Box statistics and fliers, as ax.boxplot would compute them
+		boxes = [(col, boxplot_stats(df[col].dropna().to_numpy(dtype=np.float64))) for col in numeric_cols[:4]]
+
+		def draw() -> Figure:
+			fig, axes = new_figure(2, 2, figsize=(12, 8))
+			fig.suptitle(title)
+
+			for i, (col, stats) in enumerate(boxes):
 				row, col_idx = i // 2, i % 2
-				Q1 = df[col].quantile(0.25)
-				Q3 = df[col].quantile(0.75)
-				IQR = Q3 - Q1
-				lower_bound = Q1 - 1.5 * IQR
-				upper_bound = Q3 + 1.5 * IQR
-				
-				outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-				if not outliers.empty:
-					outliers_data.append({
-						'Column': col,
-						'Outlier_Count': len(outliers),
-						'Outlier_Percentage': len(outliers) / len(df) * 100
-					})
-				
-				axes[row, col_idx].boxplot(df[col].dropna())
+				axes[row, col_idx].bxp(stats)
 				axes[row, col_idx].set_title(f'{col} - Boxplot')
-			
-			plt.tight_layout()
-			
-			if outliers_data:
-				outliers_df = pd.DataFrame(outliers_data)
-				return QAResult(table=outliers_df, figure=fig, message="Outlier analysis for numeric columns")
-			else:
-				return QAResult(message="No significant outliers detected")
+
+			fig.tight_layout()
+			return fig
+
+		outliers_df = report.to_frame("iqr")
+		if not outliers_df.empty:
+			return QAResult(table=outliers_df, chart=Chart("boxplot", title, draw), message="Outlier analysis for numeric columns")
 		else:
-			return QAResult(message="No numeric columns found for outlier analysis")
+			return QAResult(message="No significant outliers detected")
+	else:
+		return QAResult(message="No numeric columns found for outlier analysis")
+
 
+def _fallback() -> QAResult:
 	# Fallback with comprehensive suggestions
 	return QAResult(message="Try asking about:\n• Sales in July 2024\n• Top 10 products\n• Average price by category\n• Monthly trends\n• Count by region\n• Revenue where country = USA\n• Minimum/maximum values\n• Data quality and missing values\n• Compare two columns\n• Find outliers\n• Data distribution\n• Statistics summary")
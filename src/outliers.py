@@ -0,0 +1,219 @@
+import warnings
+from typing import Dict, Iterable, List, Optional, Sequence
+import pandas as pd
+import numpy as np
+from src.arrays import float_block, numeric_columns
+
+
+METHODS = ("zscore", "mad", "iqr")
+
+# Iglewicz-Hoaglin modified z-score: 0.6745 * (x - median) / MAD
+_MAD_CONSISTENCY = 0.6745
+
+
+class OutlierBounds:
+	"""Per-column [low, high] acceptance intervals for each detection method.
+
+	Every method reduces to an interval, so flagging a chunk is one vectorized
+	comparison per method regardless of how the bounds were estimated.
+	"""
+
+	def __init__(self, columns: Sequence[str], counts: np.ndarray, low: Dict[str, np.ndarray], high: Dict[str, np.ndarray]):
+		self.columns = list(columns)
+		self.counts = counts
+		self.low = low
+		self.high = high
+
+	@property
+	def methods(self) -> List[str]:
+		return list(self.low.keys())
+
+
+class OutlierReport:
+	def __init__(self, bounds: OutlierBounds, n_rows: int, counts: Dict[str, np.ndarray], indices: Dict[str, Dict[str, np.ndarray]]):
+		self.bounds = bounds
+		self.columns = bounds.columns
+		self.n_rows = n_rows
+		self.counts = counts
+		self.indices = indices
+
+	def ratios(self, method: str) -> np.ndarray:
+		"""Share of non-null values flagged per column."""
+		with np.errstate(divide="ignore", invalid="ignore"):
+			return np.where(self.bounds.counts > 0, self.counts[method] / self.bounds.counts, 0.0)
+
+	def to_frame(self, method: str) -> pd.DataFrame:
+		"""Columns with at least one flagged value, most affected first."""
+		counts = self.counts[method]
+		res = pd.DataFrame({
+			"Column": self.columns,
+			"Outlier_Count": counts,
+			"Outlier_Percentage": counts / max(self.n_rows, 1) * 100,
+		})
+		return res[res["Outlier_Count"] > 0].sort_values("Outlier_Count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _fit_block(block: np.ndarray, methods: Sequence[str], z_thresh: float, mad_thresh: float, iqr_k: float):
+	"""Bounds for the columns of a 2D float block; returns (non-null counts, low, high)."""
+	p = block.shape[1]
+	nan_mask = np.isnan(block)
+	has_nan = nan_mask.any()
+	n = block.shape[0] - nan_mask.sum(axis=0)
+	del nan_mask
+	has_data = n > 0
+	low = {m: np.full(p, -np.inf) for m in methods}
+	high = {m: np.full(p, np.inf) for m in methods}
+	if not has_data.any():
+		return n, low, high
+	with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+		# All-NaN columns are expected here and handled via has_data
+		warnings.simplefilter("ignore", RuntimeWarning)
+		if "zscore" in methods:
+			if has_nan:
+				mean, std = np.nanmean(block, axis=0), np.nanstd(block, axis=0)
+			else:
+				mean, std = block.mean(axis=0), block.std(axis=0)
+			ok = has_data & (std > 0)
+			low["zscore"] = np.where(ok, mean - z_thresh * std, -np.inf)
+			high["zscore"] = np.where(ok, mean + z_thresh * std, np.inf)
+		if "iqr" in methods or "mad" in methods:
+			quantile = np.nanquantile if has_nan else np.quantile
+			q1, median, q3 = quantile(block, [0.25, 0.5, 0.75], axis=0)
+		if "iqr" in methods:
+			iqr = q3 - q1
+			low["iqr"] = np.where(has_data, q1 - iqr_k * iqr, -np.inf)
+			high["iqr"] = np.where(has_data, q3 + iqr_k * iqr, np.inf)
+		if "mad" in methods:
+			mad = (np.nanmedian if has_nan else np.median)(np.abs(block - median), axis=0)
+			ok = has_data & (mad > 0)
+			width = mad_thresh * mad / _MAD_CONSISTENCY
+			low["mad"] = np.where(ok, median - width, -np.inf)
+			high["mad"] = np.where(ok, median + width, np.inf)
+	return n, low, high
+
+
+def _column_blocks(n_rows: int, p: int, max_cells: int):
+	width = max(1, min(p, max_cells // max(n_rows, 1)))
+	for start in range(0, p, width):
+		yield start, min(start + width, p)
+
+
+def fit_outlier_bounds(
+	df: pd.DataFrame,
+	methods: Sequence[str] = METHODS,
+	columns: Optional[Sequence[str]] = None,
+	z_thresh: float = 3.0,
+	mad_thresh: float = 3.5,
+	iqr_k: float = 1.5,
+	max_cells: int = 32_000_000,
+) -> OutlierBounds:
+	"""Estimate bounds for all numeric columns, as many columns at a time as fit in max_cells."""
+	cols = numeric_columns(df, columns)
+	p = len(cols)
+	counts = np.zeros(p, dtype=np.int64)
+	low = {m: np.full(p, -np.inf) for m in methods}
+	high = {m: np.full(p, np.inf) for m in methods}
+	for start, stop in _column_blocks(len(df), p, max_cells):
+		block = float_block(df, cols[start:stop])
+		counts[start:stop], block_low, block_high = _fit_block(block, methods, z_thresh, mad_thresh, iqr_k)
+		for m in methods:
+			low[m][start:stop] = block_low[m]
+			high[m][start:stop] = block_high[m]
+	return OutlierBounds(cols, counts, low, high)
+
+
+class _OutlierScan:
+	"""Accumulates flag counts and row positions over (row chunk, column block) tiles."""
+
+	def __init__(self, bounds: OutlierBounds, max_indices: int):
+		self.bounds = bounds
+		self.max_indices = max_indices
+		p = len(bounds.columns)
+		self.n_rows = 0
+		self.counts = {m: np.zeros(p, dtype=np.int64) for m in bounds.methods}
+		self._positions = {m: [[] for _ in range(p)] for m in bounds.methods}
+		self._kept = {m: np.zeros(p, dtype=np.int64) for m in bounds.methods}
+
+	def update(self, values: np.ndarray, row_offset: int, col_start: int = 0) -> None:
+		col_stop = col_start + values.shape[1]
+		for m in self.bounds.methods:
+			# NaN compares False on both sides, so missing values are never flagged
+			flags = (values < self.bounds.low[m][col_start:col_stop]) | (values > self.bounds.high[m][col_start:col_stop])
+			chunk_counts = flags.sum(axis=0)
+			self.counts[m][col_start:col_stop] += chunk_counts
+			if self.max_indices <= 0:
+				continue
+			kept = self._kept[m]
+			for j in np.flatnonzero(chunk_counts > 0):
+				k = col_start + j
+				if kept[k] >= self.max_indices:
+					continue
+				pos = np.flatnonzero(flags[:, j])[: self.max_indices - kept[k]]
+				self._positions[m][k].append(pos + row_offset)
+				kept[k] += pos.shape[0]
+
+	def positions(self) -> Dict[str, List[np.ndarray]]:
+		return {
+			m: [np.concatenate(parts) if parts else np.empty(0, dtype=np.int64) for parts in per_col]
+			for m, per_col in self._positions.items()
+		}
+
+
+def scan_outliers(chunks: Iterable[pd.DataFrame], bounds: OutlierBounds, max_indices: int = 1000) -> OutlierReport:
+	"""Flag values in an iterable of row chunks against precomputed bounds.
+
+	Bounds can come from fit_outlier_bounds or from streaming moments; row indices
+	in the report are the chunks' own index labels.
+	"""
+	scan = _OutlierScan(bounds, max_indices)
+	labels = []
+	for chunk in chunks:
+		labels.append(chunk.index)
+		scan.update(float_block(chunk, bounds.columns), scan.n_rows)
+		scan.n_rows += len(chunk)
+	index = labels[0].append(labels[1:]) if labels else pd.RangeIndex(0)
+	return _build_report(bounds, scan, index)
+
+
+def _build_report(bounds: OutlierBounds, scan: _OutlierScan, index: pd.Index) -> OutlierReport:
+	indices = {
+		m: {col: index[pos].to_numpy() for col, pos in zip(bounds.columns, per_col)}
+		for m, per_col in scan.positions().items()
+	}
+	return OutlierReport(bounds, scan.n_rows, scan.counts, indices)
+
+
+def detect_outliers(
+	df: pd.DataFrame,
+	methods: Sequence[str] = METHODS,
+	columns: Optional[Sequence[str]] = None,
+	z_thresh: float = 3.0,
+	mad_thresh: float = 3.5,
+	iqr_k: float = 1.5,
+	chunk_rows: int = 250_000,
+	max_indices: int = 1000,
+	max_cells: int = 32_000_000,
+) -> OutlierReport:
+	"""Z-score, MAD and IQR outlier flags for all numeric columns of df.
+
+	Columns are processed in 2D blocks of at most max_cells values: bounds are fitted
+	on the block and its values flagged right away, chunk_rows rows at a time, so the
+	frame is converted to floats only once and peak memory stays bounded.
+	"""
+	cols = numeric_columns(df, columns)
+	p = len(cols)
+	counts = np.zeros(p, dtype=np.int64)
+	low = {m: np.full(p, -np.inf) for m in methods}
+	high = {m: np.full(p, np.inf) for m in methods}
+	bounds = OutlierBounds(cols, counts, low, high)
+	scan = _OutlierScan(bounds, max_indices)
+	for start, stop in _column_blocks(len(df), p, max_cells):
+		block = float_block(df, cols[start:stop])
+		counts[start:stop], block_low, block_high = _fit_block(block, methods, z_thresh, mad_thresh, iqr_k)
+		for m in methods:
+			low[m][start:stop] = block_low[m]
+			high[m][start:stop] = block_high[m]
+		for row in range(0, block.shape[0], chunk_rows):
+			scan.update(block[row:row + chunk_rows], row, start)
+	scan.n_rows = len(df)
+	return _build_report(bounds, scan, df.index)
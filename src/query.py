@@ -0,0 +1,320 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+from src.schema import SchemaIndex, schema_index
+
+
+# Question words for each aggregate
+AGGREGATES = {
+	'avg': 'mean', 'average': 'mean', 'mean': 'mean', 'sum': 'sum', 'total': 'sum',
+	'min': 'min', 'minimum': 'min', 'max': 'max', 'maximum': 'max', 'count': 'count',
+	'how many': 'count', 'number of': 'count',
+}
+
+# Comparison phrases, longest first so "greater than or equal" is not read as "greater than"
+_OPERATORS: List[Tuple[Tuple[str, ...], str]] = [
+	(('greater', 'than', 'or', 'equal', 'to'), '>='), (('less', 'than', 'or', 'equal', 'to'), '<='),
+	(('not', 'equal', 'to'), '!='), (('greater', 'than'), '>'), (('more', 'than'), '>'),
+	(('less', 'than'), '<'), (('at', 'least'), '>='), (('at', 'most'), '<='),
+	(('is', 'not'), '!='), (('not', 'in'), 'not in'), (('between',), 'between'), (('in',), 'in'),
+	(('above',), '>'), (('over',), '>'), (('below',), '<'), (('under',), '<'),
+	(('equals',), '='), (('is',), '='), (('>=',), '>='), (('<=',), '<='), (('!=',), '!='),
+	(('<>',), '!='), (('==',), '='), (('=',), '='), (('>',), '>'), (('<',), '<'),
+]
+_OPERATOR_STARTS = {words[0] for words, _ in _OPERATORS}
+
+_TOKEN_RE = re.compile(r"'[^']*'|\"[^\"]*\"|>=|<=|!=|<>|==|[=<>(),]|[^\s=<>(),'\"?!]+")
+_CLAUSE_WORDS = {'where', 'by', 'per'}
+
+# Count targets that mean the rows themselves rather than a column
+_ROW_WORDS = {'rows', 'records'}
+
+_COMPARE = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal}
+
+
+class QueryError(ValueError):
+	"""A question that parses as a query but cannot be evaluated against the data."""
+
+
+class Condition:
+	def __init__(self, column: str, op: str, values: Sequence[str]):
+		self.column = column
+		self.op = op
+		self.values = list(values)
+
+	def describe(self) -> str:
+		if self.op == 'between':
+			return f"{self.column} between {self.values[0]} and {self.values[1]}"
+		if self.op in ('in', 'not in'):
+			return f"{self.column} {self.op} ({', '.join(self.values)})"
+		return f"{self.column} {self.op} {self.values[0]}"
+
+
+class QueryPlan:
+	"""aggregate(measure) over rows matching any of the AND-groups, optionally per group_by.
+
+	measure is None for a plain row count.
+	"""
+
+	def __init__(self, aggregate: str, measure: Optional[str], conditions: List[List[Condition]], group_by: Optional[str] = None):
+		self.aggregate = aggregate
+		self.measure = measure
+		self.conditions = conditions
+		self.group_by = group_by
+
+	def describe_filter(self) -> str:
+		return " or ".join(" and ".join(c.describe() for c in group) for group in self.conditions)
+
+
+def _tokenize(text: str) -> List[str]:
+	return [t[1:-1] if t[0] in "'\"" else t for t in _TOKEN_RE.findall(text.lower())]
+
+
+class _Parser:
+	def __init__(self, tokens: List[str], schema: SchemaIndex):
+		self.tokens = tokens
+		self.pos = 0
+		self.schema = schema
+
+	def peek(self, offset: int = 0) -> Optional[str]:
+		i = self.pos + offset
+		return self.tokens[i] if i < len(self.tokens) else None
+
+	def operator(self) -> Optional[Tuple[str, int]]:
+		for words, op in _OPERATORS:
+			if tuple(self.tokens[self.pos:self.pos + len(words)]) == words:
+				return op, len(words)
+		return None
+
+	def column(self, stop, role: str = "Filter") -> str:
+		words = []
+		while self.peek() is not None and not stop():
+			words.append(self.peek())
+			self.pos += 1
+		col = self.schema.resolve(" ".join(words))
+		if col is None:
+			raise QueryError(f"{role} column not found: {' '.join(words) or '(none)'}")
+		return col
+
+	def value(self) -> str:
+		# A value runs up to the next connective, so "new york" stays one value
+		words = []
+		while self.peek() is not None and self.peek() not in ('and', 'or', ',', ')', 'by', 'per', 'where'):
+			words.append(self.peek())
+			self.pos += 1
+		if not words:
+			raise QueryError("Missing value in filter")
+		return " ".join(words)
+
+	def condition(self) -> Condition:
+		col = self.column(lambda: self.peek() in _OPERATOR_STARTS and self.operator() is not None)
+		op, width = self.operator() or (None, 0)
+		if op is None:
+			raise QueryError(f"Missing comparison for {col}")
+		self.pos += width
+		if op == 'between':
+			low = self.value()
+			if self.peek() != 'and':
+				raise QueryError("Ranges are written 'between <low> and <high>'")
+			self.pos += 1
+			return Condition(col, op, [low, self.value()])
+		if op in ('in', 'not in'):
+			paren = self.peek() == '('
+			self.pos += paren
+			values = [self.value()]
+			while self.peek() == ',':
+				self.pos += 1
+				values.append(self.value())
+			if paren and self.peek() == ')':
+				self.pos += 1
+			return Condition(col, op, values)
+		return Condition(col, op, [self.value()])
+
+	def conditions(self) -> List[List[Condition]]:
+		groups = [[self.condition()]]
+		while self.peek() in ('and', 'or'):
+			connective = self.peek()
+			self.pos += 1
+			if connective == 'and':
+				groups[-1].append(self.condition())
+			else:
+				groups.append([self.condition()])
+		return groups
+
+
+def parse_query(aggregate_word: str, text: str, schema: SchemaIndex) -> QueryPlan:
+	"""Plan for '<aggregate> [of] <text>', where text is a measure followed by optional
+	'where <conditions>' and 'by <column>' clauses in either order.
+
+	Conditions combine with 'and' (binding tighter) and 'or'; each compares a column
+	with =, !=, <, <=, >, >=, 'between a and b' or '[not] in (a, b, ...)'. Raises
+	QueryError when a column cannot be resolved or a clause is malformed.
+	"""
+	aggregate = AGGREGATES[aggregate_word]
+	parser = _Parser(_tokenize(text), schema)
+	if parser.peek() == 'of':
+		parser.pos += 1
+	if aggregate == 'count':
+		# "count of orders where ..." counts rows when no column is named
+		start = parser.pos
+		while parser.peek() is not None and parser.peek() not in _CLAUSE_WORDS:
+			parser.pos += 1
+		name = " ".join(parser.tokens[start:parser.pos])
+		measure = None if name in _ROW_WORDS else schema.resolve(name)
+	else:
+		measure = parser.column(lambda: parser.peek() in _CLAUSE_WORDS, "Target")
+	conditions: List[List[Condition]] = []
+	group_by = None
+	while parser.peek() is not None:
+		word = parser.peek()
+		parser.pos += 1
+		if word == 'where' and not conditions:
+			conditions = parser.conditions()
+		elif word in ('by', 'per') and group_by is None:
+			group_by = parser.column(lambda: parser.peek() == 'where', "Group")
+		else:
+			raise QueryError(f"Could not understand '{word}'")
+	return QueryPlan(aggregate, measure, conditions, group_by)
+
+
+def _number(col: str, value: str) -> float:
+	try:
+		return float(value)
+	except ValueError:
+		raise QueryError(f"'{value}' is not a number (column {col})")
+
+
+def _date_bounds(col: str, value: str) -> Tuple[np.datetime64, np.datetime64]:
+	# "2024", "2024-03" and "2024-03-05" each stand for the whole period
+	try:
+		period = pd.Period(value)
+	except (ValueError, TypeError):
+		raise QueryError(f"'{value}' is not a date (column {col})")
+	return np.datetime64(period.start_time, "ns"), np.datetime64(period.end_time, "ns")
+
+
+def _condition_mask(df: pd.DataFrame, cond: Condition) -> np.ndarray:
+	series = df[cond.column]
+	dtype = series.dtype
+	op = cond.op
+	if is_datetime64_any_dtype(dtype):
+		values = series.to_numpy(dtype="datetime64[ns]")
+		valid = ~np.isnat(values)
+		bounds = [_date_bounds(cond.column, v) for v in cond.values]
+		if op == 'between':
+			mask = (values >= bounds[0][0]) & (values <= bounds[1][1])
+		elif op in ('=', '!=', 'in', 'not in'):
+			mask = np.zeros(len(values), dtype=bool)
+			for start, end in bounds:
+				mask |= (values >= start) & (values <= end)
+			if op in ('!=', 'not in'):
+				mask = ~mask
+		else:
+			# After a period means after its end; before it means before its start
+			start, end = bounds[0]
+			mask = _COMPARE[op](values, end if op in ('>', '<=') else start)
+		return mask & valid
+	if is_numeric_dtype(dtype) and not is_bool_dtype(dtype):
+		values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+		valid = ~np.isnan(values)
+		numbers = [_number(cond.column, v) for v in cond.values]
+		if op == 'between':
+			mask = (values >= numbers[0]) & (values <= numbers[1])
+		elif op in ('=', 'in'):
+			mask = np.isin(values, numbers)
+		elif op in ('!=', 'not in'):
+			mask = ~np.isin(values, numbers)
+		else:
+			mask = _COMPARE[op](values, numbers[0])
+		return mask & valid
+	if op not in ('=', '!=', 'in', 'not in'):
+		raise QueryError(f"{cond.column} is not numeric or a date, so only =, != and in apply")
+	# Case-insensitive equality on integer codes; the labels are compared once per distinct value
+	codes, _, lookup = schema_index(df).codes(df, cond.column)
+	matching = [lookup.get(v, np.empty(0, dtype=np.int64)) for v in cond.values]
+	mask = np.isin(codes, np.concatenate(matching))
+	if op in ('!=', 'not in'):
+		mask = ~mask & (codes >= 0)
+	return mask
+
+
+def filter_mask(df: pd.DataFrame, conditions: List[List[Condition]], memo: Optional[Dict[str, np.ndarray]] = None) -> Optional[np.ndarray]:
+	"""Boolean row mask for OR-ed AND-groups of conditions; None when there are none.
+
+	memo, shared between calls, keeps the mask of each distinct condition.
+	"""
+	if not conditions:
+		return None
+	memo = {} if memo is None else memo
+	mask = np.zeros(len(df), dtype=bool)
+	for group in conditions:
+		group_mask = np.ones(len(df), dtype=bool)
+		for cond in group:
+			key = cond.describe()
+			if key not in memo:
+				memo[key] = _condition_mask(df, cond)
+			group_mask &= memo[key]
+		mask |= group_mask
+	return mask
+
+
+def _measure_values(df: pd.DataFrame, measure: Optional[str], aggregate: str) -> np.ndarray:
+	if measure is None:
+		return np.ones(len(df), dtype=np.float64)
+	series = df[measure]
+	if aggregate == 'count':
+		# Count the measure's non-missing values, whatever their type
+		return np.where(series.notna().to_numpy(), 1.0, np.nan)
+	if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+		# Plain NumPy columns are used as they are, so integer sums stay integers
+		return series.to_numpy()
+	if not is_numeric_dtype(series.dtype) or is_bool_dtype(series.dtype):
+		series = pd.to_numeric(series, errors="coerce")
+	return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def run_queries(df: pd.DataFrame, plans: Sequence[QueryPlan]) -> list:
+	"""Evaluate plans on df without copying it, sharing work between them.
+
+	Each distinct condition is masked once and each measure column read once; plans
+	with the same filter and group-by column are answered from one groupby. Returns,
+	per plan, a scalar or a Series indexed by group label when plan.group_by is set.
+	"""
+	results: list = [None] * len(plans)
+	batches: Dict[Tuple[str, Optional[str]], List[int]] = {}
+	for i, plan in enumerate(plans):
+		batches.setdefault((plan.describe_filter(), plan.group_by), []).append(i)
+	conditions: Dict[str, np.ndarray] = {}
+	columns: Dict[Tuple[Optional[str], bool], np.ndarray] = {}
+	for (_, group_by), members in batches.items():
+		mask = filter_mask(df, plans[members[0]].conditions, conditions)
+		keys = []
+		for i in members:
+			key = (plans[i].measure, plans[i].aggregate == 'count')
+			if key not in columns:
+				columns[key] = _measure_values(df, plans[i].measure, plans[i].aggregate)
+			keys.append(key)
+		if group_by is None:
+			for i, key in zip(members, keys):
+				values = columns[key]
+				results[i] = pd.Series(values if mask is None else values[mask]).agg(plans[i].aggregate)
+			continue
+		codes, uniques, _ = schema_index(df).codes(df, group_by)
+		keep = codes >= 0 if mask is None else mask & (codes >= 0)
+		distinct = list(dict.fromkeys(keys))
+		frame = pd.DataFrame({j: columns[key][keep] for j, key in enumerate(distinct)})
+		grouped = frame.groupby(codes[keep])
+		for i, key in zip(members, keys):
+			result = grouped[distinct.index(key)].agg(plans[i].aggregate)
+			result.index = uniques.take(result.index.to_numpy())
+			result.index.name = group_by
+			result.name = None
+			results[i] = result
+	return results
+
+
+def run_query(df: pd.DataFrame, plan: QueryPlan):
+	"""Evaluate one plan; see run_queries."""
+	return run_queries(df, [plan])[0]
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RateLimiter:
+	"""Token buckets per client key, shared by worker processes through a sqlite file.
+
+	Each key's bucket holds up to burst tokens and refills at rate tokens per second;
+	a request is allowed when its cost can be taken from the bucket. Buckets idle for
+	idle_ttl seconds are full again and are deleted, and the table is trimmed to the
+	max_keys most recently used keys, both at most once per sweep_interval.
+	"""
+
+	def __init__(self, path: str, rate: float = 10.0, burst: float = 10.0, idle_ttl: float = 600.0, max_keys: int = 100000, sweep_interval: float = 60.0):
+		self.path = path
+		self.rate = rate
+		self.burst = burst
+		# A shorter TTL would forget buckets that are not full yet
+		self.idle_ttl = max(idle_ttl, burst / rate)
+		self.max_keys = max_keys
+		self.sweep_interval = sweep_interval
+		self._next_sweep = 0.0
+		self._threads = threading.local()
+		os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+		conn = self._conn()
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+		conn.execute("CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated)")
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._threads, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+			# Bucket state is disposable; skip fsyncs
+			conn.execute("PRAGMA synchronous=OFF")
+			self._threads.conn = conn
+		return conn
+
+	def allow(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+		"""Take cost tokens from key's bucket; returns (allowed, seconds until it would be).
+
+		Costs above burst are charged as burst, so every request can eventually pass.
+		"""
+		cost = min(cost, self.burst)
+		now = time.time()
+		if now >= self._next_sweep:
+			self._next_sweep = now + self.sweep_interval
+			self.sweep(now)
+		conn = self._conn()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+			tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+			allowed = tokens >= cost
+			if allowed:
+				tokens -= cost
+			conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+			conn.execute("COMMIT")
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		return allowed, 0.0 if allowed else (cost - tokens) / self.rate
+
+	def sweep(self, now: Optional[float] = None) -> None:
+		"""Delete idle buckets and trim the table to max_keys."""
+		now = time.time() if now is None else now
+		conn = self._conn()
+		conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.idle_ttl,))
+		excess = conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] - self.max_keys
+		if excess > 0:
+			conn.execute("DELETE FROM buckets WHERE key IN (SELECT key FROM buckets ORDER BY updated LIMIT ?)", (excess,))
+
+	def stats(self) -> Dict[str, float]:
+		keys = self._conn().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+		return {"keys": keys, "max_keys": self.max_keys, "rate": self.rate, "burst": self.burst}
@@ -0,0 +1,175 @@
+import difflib
+import re
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_datetime64_any_dtype
+from src.arrays import numeric_columns
+from src.associations import categorical_columns
+
+
+# Abbreviations mapped to the word they stand for, applied to column names and
+# question phrases alike so that "qty sold" finds "Quantity_Sold"
+SYNONYMS: Dict[str, str] = {
+	'qty': 'quantity', 'amt': 'amount', 'num': 'number', 'no': 'number', 'nbr': 'number',
+	'cust': 'customer', 'client': 'customer', 'prod': 'product', 'cat': 'category',
+	'dt': 'date', 'desc': 'description', 'addr': 'address', 'avg': 'average',
+	'pct': 'percent', 'percentage': 'percent', 'rev': 'revenue', 'cnt': 'count',
+	'yr': 'year', 'mo': 'month', 'dept': 'department', 'emp': 'employee', 'tel': 'phone',
+}
+
+# Column names containing any of these fill the "sales" role
+SALES_KEYWORDS = ['sale', 'sales', 'revenue', 'amount', 'price', 'cost', 'value', 'total', 'income']
+
+# Words a question may put in front of a column name
+_LEADING_WORDS = {'the', 'a', 'an', 'of', 'column', 'field', 'value', 'values'}
+
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(name: str) -> List[str]:
+	return _TOKEN_RE.findall(_CAMEL_RE.sub(" ", name).lower())
+
+
+def _canonical(tokens: List[str]) -> str:
+	# Synonyms first, then a crude singular so "orders" and "order" agree
+	words = [SYNONYMS.get(t, t) for t in tokens]
+	return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words)
+
+
+def _phrase_keys(phrase: str) -> List[str]:
+	tokens = _tokens(phrase)
+	return [phrase.strip().casefold(), " ".join(tokens), _canonical(tokens)]
+
+
+class SchemaIndex:
+	"""Column lookup tables for one frame, built in a single pass over its columns.
+
+	Names resolve through dictionaries of case-folded, tokenized and synonym-normalized
+	keys; misses fall back to fuzzy matching, memoized per phrase. Columns are also
+	grouped by dtype bucket and by semantic role (sales, date, category).
+	"""
+
+	def __init__(self, df: pd.DataFrame, fuzzy_cutoff: float = 0.85, max_memo: int = 1024):
+		self.columns: List[str] = [str(c) for c in df.columns]
+		self.numeric: List[str] = numeric_columns(df)
+		self.categorical: List[str] = categorical_columns(df)
+		self.datetime: List[str] = [col for col, dtype in df.dtypes.items() if is_datetime64_any_dtype(dtype)]
+		self.roles: Dict[str, Optional[str]] = {
+			"sales": next((col for col in df.columns if any(k in str(col).lower() for k in SALES_KEYWORDS)), None),
+			"date": self.datetime[0] if self.datetime else None,
+			"category": self.categorical[0] if self.categorical else None,
+		}
+		self._keys: Dict[str, str] = {}
+		# Exact case-folded names take precedence over derived keys; earlier columns win ties
+		for col in df.columns:
+			self._keys.setdefault(str(col).casefold(), col)
+		for col in df.columns:
+			for key in _phrase_keys(str(col))[1:]:
+				if key:
+					self._keys.setdefault(key, col)
+		# Longest run of question words that can name a column ("order date" for order_date)
+		self.max_words = max((max(len(str(c).split()), len(_tokens(str(c)))) for c in df.columns), default=1)
+		self._source_columns = df.columns
+		self.fuzzy_cutoff = fuzzy_cutoff
+		self._fuzzy: Dict[str, Optional[str]] = {}
+		self._max_memo = max_memo
+		self._codes: Dict[str, Tuple[np.ndarray, pd.Index, Dict[str, np.ndarray]]] = {}
+		self._lock = threading.Lock()
+
+	def codes(self, df: pd.DataFrame, col: str) -> Tuple[np.ndarray, pd.Index, Dict[str, np.ndarray]]:
+		"""Factorized df[col]: integer codes (-1 for missing), the distinct values and a
+		map from each lower-cased value label to its codes. Computed once per column.
+
+		df must be the frame this index was built for.
+		"""
+		with self._lock:
+			cached = self._codes.get(col)
+		if cached is None:
+			codes, uniques = pd.factorize(df[col], sort=False)
+			if len(uniques) < np.iinfo(np.int32).max:
+				codes = codes.astype(np.int32)
+			labels: Dict[str, List[int]] = {}
+			for code, label in enumerate(pd.Index(uniques).astype(str).str.lower()):
+				labels.setdefault(label, []).append(code)
+			cached = (codes, pd.Index(uniques), {label: np.array(c) for label, c in labels.items()})
+			with self._lock:
+				self._codes[col] = cached
+		return cached
+
+	def role(self, name: str) -> Optional[str]:
+		return self.roles.get(name)
+
+	def lookup(self, phrase: str) -> Optional[str]:
+		"""Column whose name matches phrase up to case, separators, plurals and synonyms."""
+		for key in _phrase_keys(phrase):
+			col = self._keys.get(key)
+			if col is not None:
+				return col
+		return None
+
+	def fuzzy_lookup(self, phrase: str) -> Optional[str]:
+		key = _canonical(_tokens(phrase))
+		if len(key) < 4:
+			return None
+		with self._lock:
+			if key in self._fuzzy:
+				return self._fuzzy[key]
+		match = difflib.get_close_matches(key, list(self._keys), n=1, cutoff=self.fuzzy_cutoff)
+		col = self._keys[match[0]] if match else None
+		with self._lock:
+			if len(self._fuzzy) >= self._max_memo:
+				self._fuzzy.clear()
+			self._fuzzy[key] = col
+		return col
+
+	def resolve(self, text: Optional[str]) -> Optional[str]:
+		"""Column named at the start of text, preferring the longest matching run of words.
+
+		text may run past the name ("region last year"); exact matches of any prefix
+		win over fuzzy ones.
+		"""
+		if not text:
+			return None
+		words = text.split()
+		while words and words[0] in _LEADING_WORDS and len(words) > 1:
+			words = words[1:]
+		prefixes = [" ".join(words[:n]) for n in range(min(len(words), self.max_words), 0, -1)]
+		for phrase in prefixes:
+			col = self.lookup(phrase)
+			if col is not None:
+				return col
+		for phrase in prefixes:
+			col = self.fuzzy_lookup(phrase)
+			if col is not None:
+				return col
+		return None
+
+
+_INDEXES: Dict[int, Tuple["weakref.ref", SchemaIndex]] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def schema_index(df: pd.DataFrame) -> SchemaIndex:
+	"""The SchemaIndex of df, built on first use and dropped with the frame."""
+	key = id(df)
+	with _INDEXES_LOCK:
+		entry = _INDEXES.get(key)
+		# A frame whose columns were reassigned in place gets a fresh index
+		if entry is not None and entry[0]() is df and entry[1]._source_columns is df.columns:
+			return entry[1]
+	index = SchemaIndex(df)
+	with _INDEXES_LOCK:
+		_INDEXES[key] = (weakref.ref(df), index)
+	weakref.finalize(df, _drop_index, key, index)
+	return index
+
+
+def _drop_index(key: int, index: SchemaIndex) -> None:
+	with _INDEXES_LOCK:
+		entry = _INDEXES.get(key)
+		if entry is not None and entry[1] is index:
+			del _INDEXES[key]
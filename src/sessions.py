@@ -0,0 +1,463 @@
+import hashlib
+import os
+import pickle
+import re
+import secrets
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from matplotlib.figure import Figure
+
+try:
+	import pyarrow as pa
+	import pyarrow.ipc as ipc
+except ImportError:  # optional: frames are stored as pickles and read back as copies
+	pa = None
+	ipc = None
+
+
+# Values at least this large are stored in their own file; smaller ones (login time,
+# token, filename, metadata) are kept inline in the index
+FILE_MIN_BYTES = 64 * 1024
+
+# Rough in-memory footprint charged for a matplotlib figure
+FIGURE_BYTES = 1024 * 1024
+
+# A file another worker deleted between reading the index and opening it
+_LOAD_ATTEMPTS = 3
+
+_KEY_RE = re.compile(r"[^\w\-]")
+
+# (kind, payload): ("inline", pickled bytes), ("arrow", path) or ("pickle", path);
+# paths are relative to the store directory
+Entry = Tuple[str, Any]
+
+
+def _nbytes(value: Any, seen: set) -> int:
+	"""Approximate memory held by value, counting each object once."""
+	if id(value) in seen:
+		return 0
+	seen.add(id(value))
+	if isinstance(value, pd.DataFrame):
+		return int(value.memory_usage(deep=True).sum())
+	if isinstance(value, Figure):
+		return FIGURE_BYTES
+	if isinstance(value, (list, tuple, set)):
+		return sum(_nbytes(v, seen) for v in value)
+	if isinstance(value, dict):
+		return sum(_nbytes(v, seen) for v in value.values())
+	nbytes = getattr(value, "nbytes", None)
+	if isinstance(nbytes, int):
+		return nbytes
+	return sys.getsizeof(value)
+
+
+def _session_dir(session_id: str) -> str:
+	return os.path.join("data", hashlib.blake2b(session_id.encode("utf-8"), digest_size=16).hexdigest())
+
+
+class _Local:
+	"""This process's copy of a session and the index entries it corresponds to.
+
+	values holds the object read from or written to each entry, so a key whose value
+	is still the same object does not need writing again.
+	"""
+
+	def __init__(self, data: Dict[str, Any], version: Optional[int] = None, entries: Optional[Dict[str, Entry]] = None, values: Optional[Dict[str, Any]] = None):
+		self.data = data
+		# Index version this copy matches; None until the session is first saved
+		self.version = version
+		self.entries = entries or {}
+		self.values = values or {}
+
+
+class SessionStore:
+	"""Session dicts shared by all worker processes through files on local disk.
+
+	A sqlite index maps each session id to a version and its entries: small values
+	inline, frames as Arrow IPC files (pickles when pyarrow is missing or cannot hold
+	them) and other large values as pickles. Arrow files are memory-mapped, so numeric
+	columns are read without copying and share the page cache across workers, which
+	makes those frames read-only (see __getitem__). Files are immutable; a changed
+	value gets a new file.
+
+	Sessions are read and written as with a dict of dicts. Each process keeps the
+	sessions it used recently in memory and revalidates them against the index
+	version, which each thread reads once per request and caches until settle().
+	Call settle() after each request: it saves the sessions the request touched,
+	merging per key with concurrent changes from other workers, drops expired
+	sessions and, while the local copies exceed max_bytes, forgets the least
+	recently used ones idle for at least min_idle seconds. derived keys are
+	per-process caches callers rebuild on demand; they are never saved.
+	"""
+
+	def __init__(
+		self,
+		directory: str,
+		max_bytes: int = 1024 ** 3,
+		timeout: Optional[float] = None,
+		min_idle: float = 30.0,
+		derived: Iterable[str] = (),
+		sweep_interval: float = 60.0,
+	):
+		self.directory = directory
+		os.makedirs(os.path.join(directory, "data"), exist_ok=True)
+		self.index_path = os.path.join(directory, "index.sqlite")
+		self.max_bytes = max_bytes
+		self.timeout = timeout
+		self.min_idle = min_idle
+		self.derived = set(derived)
+		self.sweep_interval = sweep_interval
+		self._next_sweep = 0.0
+		self._threads = threading.local()
+		conn = self._conn()
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, version INTEGER NOT NULL, login_time REAL, entries BLOB NOT NULL)")
+		conn.execute("CREATE INDEX IF NOT EXISTS sessions_login_time ON sessions (login_time)")
+		# Local copies in least recently used order, with their last access time
+		self._local: "OrderedDict[str, _Local]" = OrderedDict()
+		self._accessed: Dict[str, float] = {}
+		self._bytes: Dict[str, int] = {}
+		# Frame sizes by id, so unchanged frames are not measured again
+		self._frame_sizes: Dict[int, Tuple["weakref.ref", int]] = {}
+		self._lock = threading.Lock()
+		# Loads and saves of one session are serialized through one of these
+		self._stripes = [threading.Lock() for _ in range(64)]
+		self.loads = 0
+		self.saves = 0
+		if pa is None:
+			print(f"SessionStore: pyarrow is not installed; session frames in {directory} are stored as pickles and read back as full copies")
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._threads, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+			self._threads.conn = conn
+		return conn
+
+	def _stripe(self, session_id: str) -> threading.Lock:
+		return self._stripes[hash(session_id) % len(self._stripes)]
+
+	def _touched(self) -> Dict[str, _Local]:
+		touched = getattr(self._threads, "touched", None)
+		if touched is None:
+			touched = self._threads.touched = {}
+		return touched
+
+	def _rows(self) -> Dict[str, Optional[Tuple[int, bytes]]]:
+		rows = getattr(self._threads, "rows", None)
+		if rows is None:
+			rows = self._threads.rows = {}
+		return rows
+
+	def _row(self, session_id: str, fresh: bool = False) -> Optional[Tuple[int, bytes]]:
+		"""Index row of a session, read at most once per request unless fresh."""
+		rows = self._rows()
+		if fresh or session_id not in rows:
+			rows[session_id] = self._conn().execute("SELECT version, entries FROM sessions WHERE id = ?", (session_id,)).fetchone()
+		return rows[session_id]
+
+	def _use(self, session_id: str, local: _Local) -> Dict[str, Any]:
+		with self._lock:
+			if session_id in self._local:
+				self._local.move_to_end(session_id)
+			self._accessed[session_id] = time.time()
+		self._touched()[session_id] = local
+		return local.data
+
+	def __getitem__(self, session_id: str) -> Dict[str, Any]:
+		"""The session's dict; raises KeyError for unknown or removed sessions.
+
+		Frames read back from Arrow files are read-only: numeric columns are views of
+		the mapped file, so in-place writes (df.loc[...] = v, df[col] += 1) raise
+		ValueError. A frame this process stored stays writable until another worker
+		saves the session, so do not rely on either. Assign new columns, or take
+		df.copy() and store it back, to change a session frame.
+		"""
+		row = self._row(session_id)
+		with self._lock:
+			local = self._local.get(session_id)
+		if row is None:
+			if local is not None and local.version is None:
+				# Created here and not saved yet
+				return self._use(session_id, local)
+			self._forget(session_id)
+			raise KeyError(session_id)
+		if local is not None and local.version == row[0]:
+			return self._use(session_id, local)
+		with self._stripe(session_id):
+			for attempt in range(_LOAD_ATTEMPTS):
+				with self._lock:
+					local = self._local.get(session_id)
+				if local is not None and local.version == row[0]:
+					return self._use(session_id, local)
+				try:
+					local = self._load(row, local)
+					break
+				except FileNotFoundError:
+					if attempt == _LOAD_ATTEMPTS - 1:
+						raise
+					row = self._row(session_id, fresh=True)
+					if row is None:
+						self._forget(session_id)
+						raise KeyError(session_id)
+			with self._lock:
+				self._local[session_id] = local
+				self.loads += 1
+		return self._use(session_id, local)
+
+	def _load(self, row: Tuple[int, bytes], previous: Optional[_Local]) -> _Local:
+		"""Local copy of an index row, reusing values of unchanged entries from previous."""
+		version, blob = row
+		entries: Dict[str, Entry] = pickle.loads(blob)
+		data: Dict[str, Any] = {}
+		values: Dict[str, Any] = {}
+		for key, entry in entries.items():
+			if previous is not None and previous.entries.get(key) == entry and key in previous.values:
+				value = previous.values[key]
+			else:
+				value = self._read(entry)
+			data[key] = values[key] = value
+		if previous is not None:
+			# Derived caches check which frame they were built from before use
+			for key in self.derived & previous.data.keys():
+				data[key] = previous.data[key]
+		return _Local(data, version, entries, values)
+
+	def _read(self, entry: Entry) -> Any:
+		kind, payload = entry
+		if kind == "inline":
+			return pickle.loads(payload)
+		path = os.path.join(self.directory, payload)
+		if kind == "arrow":
+			# Numeric columns without missing values stay backed by the mapped file
+			return ipc.open_file(pa.memory_map(path)).read_all().to_pandas(split_blocks=True)
+		with open(path, "rb") as f:
+			return pickle.load(f)
+
+	def _write(self, session_id: str, key: str, value: Any) -> Optional[Entry]:
+		"""Store value and return its entry; None when it cannot be saved."""
+		if not isinstance(value, pd.DataFrame) and _nbytes(value, set()) < FILE_MIN_BYTES:
+			try:
+				return ("inline", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+			except (pickle.PicklingError, TypeError, AttributeError) as e:
+				print(f"Session value {key} not shared: {e}")
+				return None
+		directory = _session_dir(session_id)
+		os.makedirs(os.path.join(self.directory, directory), exist_ok=True)
+		name = os.path.join(directory, f"{_KEY_RE.sub('_', key)}-{secrets.token_hex(8)}")
+		if isinstance(value, pd.DataFrame) and pa is not None:
+			try:
+				table = pa.Table.from_pandas(value)
+				with pa.OSFile(os.path.join(self.directory, name + ".arrow"), "wb") as sink:
+					with ipc.new_file(sink, table.schema) as writer:
+						writer.write_table(table)
+				return ("arrow", name + ".arrow")
+			except (pa.ArrowException, ValueError, TypeError):
+				# Mixed-type object columns and the like
+				pass
+		try:
+			with open(os.path.join(self.directory, name + ".pkl"), "wb") as f:
+				pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+		except (pickle.PicklingError, TypeError, AttributeError) as e:
+			print(f"Session value {key} not shared: {e}")
+			os.remove(os.path.join(self.directory, name + ".pkl"))
+			return None
+		return ("pickle", name + ".pkl")
+
+	def _remove_files(self, entries: Iterable[Entry]) -> None:
+		for kind, payload in entries:
+			if kind != "inline":
+				try:
+					os.remove(os.path.join(self.directory, payload))
+				except FileNotFoundError:
+					pass
+
+	def save(self, session_id: str, local: _Local) -> None:
+		"""Write the keys of local that changed since it was loaded or last saved."""
+		with self._stripe(session_id):
+			changes: Dict[str, Optional[Entry]] = {}
+			written: List[Entry] = []
+			for key, value in list(local.data.items()):
+				if key in self.derived:
+					continue
+				entry = local.entries.get(key)
+				if entry is not None and key in local.values and local.values[key] is value:
+					continue
+				if entry is not None and entry[0] == "inline" and not isinstance(value, pd.DataFrame):
+					try:
+						if pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL) == entry[1]:
+							local.values[key] = value
+							continue
+					except (pickle.PicklingError, TypeError, AttributeError):
+						pass
+				entry = self._write(session_id, key, value)
+				if entry is not None:
+					changes[key] = entry
+					written.append(entry)
+					local.values[key] = value
+			for key in list(local.entries):
+				if key not in local.data:
+					changes[key] = None
+			if not changes and local.version is not None:
+				return
+
+			conn = self._conn()
+			try:
+				conn.execute("BEGIN IMMEDIATE")
+				row = conn.execute("SELECT version, entries FROM sessions WHERE id = ?", (session_id,)).fetchone()
+				if row is None and local.version is not None:
+					# Removed by another worker since this copy was loaded
+					conn.execute("ROLLBACK")
+					self._remove_files(written)
+					self._forget(session_id)
+					return
+				current: Dict[str, Entry] = pickle.loads(row[1]) if row is not None else {}
+				merged = dict(current)
+				for key, entry in changes.items():
+					if entry is None:
+						merged.pop(key, None)
+					else:
+						merged[key] = entry
+				version = (row[0] if row is not None else 0) + 1
+				login_time = local.data.get("login_time")
+				conn.execute(
+					"INSERT OR REPLACE INTO sessions (id, version, login_time, entries) VALUES (?, ?, ?, ?)",
+					(session_id, version, login_time, pickle.dumps(merged, protocol=pickle.HIGHEST_PROTOCOL)),
+				)
+				conn.execute("COMMIT")
+			except Exception:
+				if conn.in_transaction:
+					conn.execute("ROLLBACK")
+				self._remove_files(written)
+				raise
+			self._rows().pop(session_id, None)
+			self._remove_files(entry for key, entry in current.items() if merged.get(key) != entry)
+			# Another worker's changes in between leave this copy stale: reload on next access
+			local.version = version if row is None or row[0] == local.version else -1
+			for key in changes:
+				if changes[key] is None:
+					local.values.pop(key, None)
+			local.entries = merged
+			with self._lock:
+				self.saves += 1
+
+	def __setitem__(self, session_id: str, data: Dict[str, Any]) -> None:
+		row = self._row(session_id)
+		# Replaces every key of an existing session on the next save
+		local = _Local(data, row[0] if row is not None else None, pickle.loads(row[1]) if row is not None else {})
+		with self._lock:
+			self._local[session_id] = local
+		self._use(session_id, local)
+
+	def __delitem__(self, session_id: str) -> None:
+		if session_id not in self:
+			raise KeyError(session_id)
+		self._remove(session_id)
+
+	def __contains__(self, session_id: object) -> bool:
+		if not isinstance(session_id, str):
+			return False
+		with self._lock:
+			local = self._local.get(session_id)
+		if local is not None and local.version is None:
+			return True
+		return self._row(session_id) is not None
+
+	def __len__(self) -> int:
+		return len(self.keys())
+
+	def get(self, session_id: str, default: Any = None) -> Any:
+		try:
+			return self[session_id]
+		except KeyError:
+			return default
+
+	def keys(self) -> List[str]:
+		ids = [r[0] for r in self._conn().execute("SELECT id FROM sessions")]
+		with self._lock:
+			unsaved = [s for s, local in self._local.items() if local.version is None]
+		return ids + [s for s in unsaved if s not in set(ids)]
+
+	def _forget(self, session_id: str) -> None:
+		with self._lock:
+			self._local.pop(session_id, None)
+			self._accessed.pop(session_id, None)
+			self._bytes.pop(session_id, None)
+
+	def _remove(self, session_id: str) -> None:
+		self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+		self._rows().pop(session_id, None)
+		shutil.rmtree(os.path.join(self.directory, _session_dir(session_id)), ignore_errors=True)
+		self._forget(session_id)
+
+	def _size(self, data: Dict[str, Any]) -> int:
+		seen: set = set()
+		total = 0
+		for value in list(data.values()):
+			if isinstance(value, pd.DataFrame):
+				seen.add(id(value))
+				cached = self._frame_sizes.get(id(value))
+				if cached is None or cached[0]() is not value:
+					cached = (weakref.ref(value), _nbytes(value, set()))
+					self._frame_sizes[id(value)] = cached
+				total += cached[1]
+		for value in list(data.values()):
+			total += _nbytes(value, seen)
+		return total
+
+	def settle(self) -> None:
+		"""Save the sessions this thread touched, expire old ones and trim local copies.
+
+		Also ends the request for this thread: its cached index rows are dropped.
+		"""
+		touched = self._touched()
+		self._threads.touched = {}
+		self._threads.rows = {}
+		for session_id, local in touched.items():
+			try:
+				self.save(session_id, local)
+			except Exception as e:
+				print(f"Session save failed for {session_id}: {e}")
+			size = self._size(local.data)
+			with self._lock:
+				if self._local.get(session_id) is local:
+					self._bytes[session_id] = size
+
+		now = time.time()
+		if self.timeout is not None and now >= self._next_sweep:
+			self._next_sweep = now + self.sweep_interval
+			expired = self._conn().execute("SELECT id FROM sessions WHERE login_time < ?", (now - self.timeout,)).fetchall()
+			for (session_id,) in expired:
+				self._remove(session_id)
+
+		with self._lock:
+			self._frame_sizes = {k: v for k, v in self._frame_sizes.items() if v[0]() is not None}
+			total = sum(self._bytes.values())
+			# Saved copies can simply be dropped; the next access reads them back
+			for session_id in list(self._local):
+				if total <= self.max_bytes:
+					break
+				if now - self._accessed.get(session_id, 0) < self.min_idle or self._local[session_id].version is None:
+					continue
+				total -= self._bytes.pop(session_id, 0)
+				del self._local[session_id]
+				self._accessed.pop(session_id, None)
+
+	def stats(self) -> Dict[str, int]:
+		shared = self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+		with self._lock:
+			return {
+				"sessions": shared,
+				"local": len(self._local),
+				"bytes": sum(self._bytes.values()),
+				"max_bytes": self.max_bytes,
+				"loads": self.loads,
+				"saves": self.saves,
+			}
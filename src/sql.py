@@ -0,0 +1,128 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype
+from src.schema import schema_index
+
+
+class SQLError(ValueError):
+	"""A query the SQL engine rejected or could not finish."""
+
+
+# Authorizer actions a read-only query needs; everything else is denied
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+_TRAILING_RE = re.compile(r"[\s;]+$")
+
+
+def _quote(name: str) -> str:
+	return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+	if is_bool_dtype(dtype) or is_integer_dtype(dtype):
+		return "INTEGER"
+	if is_float_dtype(dtype):
+		return "REAL"
+	return "TEXT"
+
+
+def _sql_column(values: pd.Series) -> list:
+	"""values as Python objects sqlite3 can bind: ISO text for datetimes, None for missing."""
+	dtype = values.dtype
+	if is_datetime64_any_dtype(dtype):
+		values = values.dt.strftime("%Y-%m-%d %H:%M:%S")
+	missing = np.flatnonzero(values.isna().to_numpy())
+	if is_bool_dtype(dtype) or is_integer_dtype(dtype) or is_float_dtype(dtype):
+		out = values.to_numpy().tolist() if not missing.size else values.astype(object).tolist()
+	else:
+		out = values.astype(str).tolist()
+	for i in missing.tolist():
+		out[i] = None
+	return out
+
+
+class SQLDatabase:
+	"""Frames loaded once into an in-memory sqlite database for read-only SQL.
+
+	Tables are bulk loaded in chunks with journaling off, then indexed on their date
+	and low-cardinality categorical columns and analyzed, so the query planner can use
+	the indexes. Afterwards the connection is query-only and an authorizer rejects
+	anything but reads. aliases become views over other tables.
+	"""
+
+	def __init__(self, tables: Dict[str, pd.DataFrame], aliases: Optional[Dict[str, str]] = None, chunk_rows: int = 50000, max_indexes: int = 8):
+		self.columns: Dict[str, List[Tuple[str, str]]] = {}
+		self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+		self._lock = threading.Lock()
+		conn = self._conn
+		conn.execute("PRAGMA journal_mode=OFF")
+		conn.execute("PRAGMA synchronous=OFF")
+		for name, df in tables.items():
+			self._load(name, df, chunk_rows, max_indexes)
+		for alias, target in (aliases or {}).items():
+			conn.execute(f"CREATE VIEW {_quote(alias)} AS SELECT * FROM {_quote(target)}")
+			self.columns[alias] = self.columns[target]
+		conn.execute("ANALYZE")
+		conn.commit()
+		# Memory held by the database, for session memory accounting
+		self.nbytes = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+		conn.execute("PRAGMA query_only=ON")
+		conn.set_authorizer(lambda action, *args: sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY)
+
+	def _load(self, name: str, df: pd.DataFrame, chunk_rows: int, max_indexes: int) -> None:
+		conn = self._conn
+		# sqlite names are case-insensitive; later duplicates get a numeric suffix
+		names, seen = [], set()
+		for col in df.columns:
+			base = candidate = str(col)
+			n = 1
+			while candidate.lower() in seen:
+				n += 1
+				candidate = f"{base}_{n}"
+			seen.add(candidate.lower())
+			names.append(candidate)
+		types = [_sql_type(dtype) for dtype in df.dtypes]
+		self.columns[name] = list(zip(names, types))
+		conn.execute(f"CREATE TABLE {_quote(name)} ({', '.join(f'{_quote(c)} {t}' for c, t in zip(names, types))})")
+		insert = f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(names))})"
+		with conn:
+			for start in range(0, len(df), chunk_rows):
+				chunk = df.iloc[start:start + chunk_rows]
+				conn.executemany(insert, zip(*(_sql_column(chunk[col]) for col in chunk.columns)))
+		schema = schema_index(df)
+		indexed = [str(col) for col in schema.datetime + schema.categorical[:max_indexes]][:max_indexes]
+		for i, col in enumerate(indexed):
+			column = names[[str(c) for c in df.columns].index(col)]
+			conn.execute(f"CREATE INDEX {_quote(f'idx_{name}_{i}')} ON {_quote(name)} ({_quote(column)})")
+
+	def query(self, sql: str, limit: int = 1000, offset: int = 0, timeout: float = 10.0) -> Tuple[List[str], List[tuple], bool]:
+		"""Run one SELECT and return (column names, up to limit rows from offset, has_more).
+
+		The statement is wrapped as a subquery so paging happens inside sqlite.
+		Raises SQLError for rejected or failing statements and after timeout seconds.
+		"""
+		sql = _TRAILING_RE.sub("", sql or "")
+		if not sql:
+			raise SQLError("No SQL query provided")
+		deadline = time.monotonic() + timeout
+		wrapped = f"SELECT * FROM (\n{sql}\n) LIMIT ? OFFSET ?"
+		with self._lock:
+			self._conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+			try:
+				cursor = self._conn.execute(wrapped, (limit + 1, offset))
+				rows = cursor.fetchall()
+				columns = [d[0] for d in cursor.description]
+			except sqlite3.DatabaseError as e:
+				if time.monotonic() > deadline:
+					raise SQLError(f"Query timed out after {timeout:g}s") from e
+				raise SQLError(str(e)) from e
+			except sqlite3.Warning as e:
+				raise SQLError(str(e)) from e
+			finally:
+				self._conn.set_progress_handler(None, 0)
+		return columns, rows[:limit], len(rows) > limit
@@ -0,0 +1,145 @@
+import warnings
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
+import pandas as pd
+import numpy as np
+from src.arrays import float_block, numeric_columns
+
+
+# A chunked source is a zero-argument callable returning a fresh iterator of row chunks,
+# so that multi-pass algorithms can re-read it
+ChunkSource = Callable[[], Iterable[pd.DataFrame]]
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Most values converted to floats per chunk: accumulators make a few temporaries
+# of the chunk's size, so wide frames get proportionally shorter chunks
+DEFAULT_MAX_CELLS = 4_000_000
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+	for start in range(0, len(df), chunk_rows):
+		yield df.iloc[start:start + chunk_rows]
+
+
+def as_chunk_source(source: Union[pd.DataFrame, ChunkSource], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> ChunkSource:
+	if isinstance(source, pd.DataFrame):
+		return lambda: iter_chunks(source, chunk_rows)
+	return source
+
+
+def chunk_rows_for(n_columns: int, chunk_rows: int = DEFAULT_CHUNK_ROWS, max_cells: int = DEFAULT_MAX_CELLS) -> int:
+	"""Rows per chunk so that a chunk of n_columns holds at most max_cells values."""
+	return max(1, min(chunk_rows, max_cells // max(n_columns, 1)))
+
+
+def split_chunks(source: ChunkSource, max_rows: int) -> ChunkSource:
+	"""source with chunks longer than max_rows split up."""
+	def chunks() -> Iterator[pd.DataFrame]:
+		for chunk in source():
+			if len(chunk) <= max_rows:
+				yield chunk
+			else:
+				yield from iter_chunks(chunk, max_rows)
+	return chunks
+
+
+class MomentAccumulator:
+	"""Per-column count, mean, M2 (sum of squared deviations), min and max.
+
+	Chunks are reduced with vectorized NumPy and folded in with the parallel form of
+	Welford's update (Chan et al.), so partial accumulators merge exactly.
+	Missing values are ignored column by column.
+	"""
+
+	def __init__(self, columns: Sequence[str]):
+		self.columns = list(columns)
+		p = len(self.columns)
+		self.n = np.zeros(p, dtype=np.int64)
+		self.mean = np.zeros(p)
+		self.m2 = np.zeros(p)
+		self.min = np.full(p, np.inf)
+		self.max = np.full(p, -np.inf)
+
+	def update(self, chunk: pd.DataFrame) -> "MomentAccumulator":
+		return self.update_block(float_block(chunk, self.columns))
+
+	def update_block(self, block: np.ndarray) -> "MomentAccumulator":
+		if block.shape[0] == 0:
+			return self
+		other = MomentAccumulator(self.columns)
+		missing = np.isnan(block)
+		if not missing.any():
+			other.n[:] = block.shape[0]
+			other.mean = block.mean(axis=0)
+			other.m2 = ((block - other.mean) ** 2).sum(axis=0)
+			other.min = block.min(axis=0)
+			other.max = block.max(axis=0)
+			return self.merge(other)
+		other.n = block.shape[0] - missing.sum(axis=0)
+		with np.errstate(invalid="ignore"), warnings.catch_warnings():
+			# Columns that are all-NaN in this chunk are masked out by n == 0
+			warnings.simplefilter("ignore", RuntimeWarning)
+			mean = np.nanmean(block, axis=0)
+			m2 = np.nansum((block - mean) ** 2, axis=0)
+			low = np.nanmin(block, axis=0)
+			high = np.nanmax(block, axis=0)
+		empty = other.n == 0
+		other.mean = np.where(empty, 0.0, mean)
+		other.m2 = np.where(empty, 0.0, m2)
+		other.min = np.where(empty, np.inf, low)
+		other.max = np.where(empty, -np.inf, high)
+		return self.merge(other)
+
+	def merge(self, other: "MomentAccumulator") -> "MomentAccumulator":
+		n = self.n + other.n
+		with np.errstate(divide="ignore", invalid="ignore"):
+			delta = other.mean - self.mean
+			weight = np.where(n > 0, other.n / n, 0.0)
+			self.mean = self.mean + delta * weight
+			self.m2 = self.m2 + other.m2 + delta ** 2 * np.where(n > 0, self.n * other.n / n, 0.0)
+		self.min = np.minimum(self.min, other.min)
+		self.max = np.maximum(self.max, other.max)
+		self.n = n
+		return self
+
+	def std(self, ddof: int = 0) -> np.ndarray:
+		with np.errstate(divide="ignore", invalid="ignore"):
+			return np.where(self.n > ddof, np.sqrt(self.m2 / (self.n - ddof)), np.nan)
+
+	def to_frame(self) -> pd.DataFrame:
+		return pd.DataFrame({
+			"count": self.n,
+			"mean": np.where(self.n > 0, self.mean, np.nan),
+			"std": self.std(ddof=1),
+			"min": np.where(self.n > 0, self.min, np.nan),
+			"max": np.where(self.n > 0, self.max, np.nan),
+		}, index=self.columns)
+
+
+def accumulate(source: Union[pd.DataFrame, ChunkSource], accumulators: Sequence, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+	"""Feed every chunk of source to each accumulator in one pass; returns the row count.
+
+	Accumulators expose update_block(); each chunk is converted to a float block
+	once per distinct column list.
+	"""
+	rows = 0
+	for chunk in as_chunk_source(source, chunk_rows)():
+		rows += len(chunk)
+		blocks = {}
+		for acc in accumulators:
+			key = tuple(acc.columns)
+			if key not in blocks:
+				blocks[key] = float_block(chunk, acc.columns)
+			acc.update_block(blocks[key])
+	return rows
+
+
+def numeric_columns_of(source: Union[pd.DataFrame, ChunkSource], columns: Optional[Sequence[str]] = None) -> list:
+	"""Numeric columns of a frame, or of the first chunk of a chunked source."""
+	if columns is not None:
+		return list(columns)
+	if isinstance(source, pd.DataFrame):
+		return numeric_columns(source)
+	for chunk in source():
+		return numeric_columns(chunk)
+	return []
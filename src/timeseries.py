@@ -0,0 +1,266 @@
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+
+
+# Supported resolutions, finest first, with their approximate bucket width
+GRANULARITIES: List[Tuple[str, pd.Timedelta]] = [
+	("hour", pd.Timedelta(hours=1)),
+	("day", pd.Timedelta(days=1)),
+	("week", pd.Timedelta(days=7)),
+	("month", pd.Timedelta(days=30)),
+]
+
+GRANULARITY_LABELS: Dict[str, str] = {
+	"hour": "Hourly",
+	"day": "Daily",
+	"week": "Weekly",
+	"month": "Monthly",
+}
+
+_LABEL_FORMATS: Dict[str, str] = {
+	"hour": "%Y-%m-%d %H:00",
+	"day": "%Y-%m-%d",
+	"week": "%Y-%m-%d",
+	"month": "%Y-%m",
+}
+
+DEFAULT_MAX_POINTS = 500
+
+
+def choose_granularity(start, end, max_points: int = DEFAULT_MAX_POINTS) -> str:
+	"""Pick the finest resolution whose bucket count over [start, end] fits in max_points."""
+	if pd.isna(start) or pd.isna(end):
+		return "day"
+	span = pd.Timestamp(end) - pd.Timestamp(start)
+	for name, width in GRANULARITIES:
+		if span / width < max_points:
+			return name
+	return GRANULARITIES[-1][0]
+
+
+def bucket_dates(dates: pd.Series, granularity: str) -> np.ndarray:
+	"""Truncate datetimes to the start of their bucket with plain datetime64 arithmetic."""
+	values = pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]")
+	if granularity == "hour":
+		return values.astype("datetime64[h]").astype("datetime64[ns]")
+	if granularity == "day":
+		return values.astype("datetime64[D]").astype("datetime64[ns]")
+	if granularity == "week":
+		days = values.astype("datetime64[D]")
+		# 1970-01-01 was a Thursday; shift so that weeks start on Monday
+		offset = (days.astype(np.int64) + 3) % 7
+		return (days - offset.astype("timedelta64[D]")).astype("datetime64[ns]")
+	if granularity == "month":
+		return values.astype("datetime64[M]").astype("datetime64[ns]")
+	raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def format_buckets(index: pd.Index, granularity: str) -> pd.Index:
+	return pd.DatetimeIndex(index).strftime(_LABEL_FORMATS[granularity])
+
+
+def aggregate_time_series(
+	df: pd.DataFrame,
+	date_col: str,
+	metrics: Sequence[str],
+	agg: str = "mean",
+	granularity: Optional[str] = None,
+	max_points: int = DEFAULT_MAX_POINTS,
+) -> Tuple[pd.DataFrame, str]:
+	"""Aggregate all metrics over date_col in a single grouped pass.
+
+	When granularity is None it is chosen from the data span so that the result has
+	at most roughly max_points rows. Returns (frame indexed by bucket start, granularity).
+	"""
+	dates = df[date_col]
+	if granularity is None:
+		granularity = choose_granularity(dates.min(), dates.max(), max_points)
+	keys = bucket_dates(dates, granularity)
+	metrics = list(metrics)
+	if metrics:
+		result = df[metrics].groupby(keys, sort=True).agg(agg)
+	else:
+		# No metrics: count rows per bucket
+		result = pd.Series(keys).dropna().value_counts(sort=False).sort_index().to_frame("count")
+	result.index = pd.DatetimeIndex(result.index, name=date_col)
+	return result, granularity
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+	"""Largest-Triangle-Three-Buckets downsampling; returns the indices of kept points.
+
+	x must be increasing. NaN points in y are never selected.
+	"""
+	x = np.asarray(x, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+	valid = np.flatnonzero(~np.isnan(y))
+	n = valid.shape[0]
+	if n_out >= n or n_out < 3:
+		return valid
+	xv, yv = x[valid], y[valid]
+	# Interior points are split into n_out - 2 buckets; first and last are always kept
+	edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+	keep = np.empty(n_out, dtype=np.int64)
+	keep[0], keep[-1] = 0, n - 1
+	prev = 0
+	for i in range(n_out - 2):
+		start, end = edges[i], edges[i + 1]
+		if i + 2 < n_out - 1:
+			nxt_start, nxt_end = edges[i + 1], edges[i + 2]
+			avg_x = xv[nxt_start:nxt_end].mean()
+			avg_y = yv[nxt_start:nxt_end].mean()
+		else:
+			avg_x, avg_y = xv[-1], yv[-1]
+		area = np.abs(
+			(xv[prev] - avg_x) * (yv[start:end] - yv[prev])
+			- (xv[prev] - xv[start:end]) * (avg_y - yv[prev])
+		)
+		prev = start + int(np.argmax(area))
+		keep[i + 1] = prev
+	return valid[keep]
+
+
+def downsample_series(series: pd.Series, max_points: int = DEFAULT_MAX_POINTS) -> pd.Series:
+	"""LTTB-downsample a datetime-indexed series for rendering."""
+	if len(series) <= max_points:
+		return series
+	x = pd.DatetimeIndex(series.index).asi8
+	idx = lttb(x, series.to_numpy(dtype=np.float64, na_value=np.nan), max_points)
+	return series.iloc[idx]
+
+
+# Natural cycle length (in buckets) used for seasonality checks at each resolution
+SEASON_LENGTHS: Dict[str, int] = {
+	"hour": 24,
+	"day": 7,
+	"week": 52,
+	"month": 12,
+}
+
+_REGULAR_FREQS: Dict[str, str] = {
+	"hour": "h",
+	"day": "D",
+	"week": "W-MON",
+	"month": "MS",
+}
+
+
+class TimeSeriesAnomaly:
+	def __init__(self, metric: str, kind: str, timestamp: pd.Timestamp, score: float, detail: str):
+		self.metric = metric
+		self.kind = kind
+		self.timestamp = timestamp
+		self.score = score
+		self.detail = detail
+
+
+def _window_stats(cum_n: np.ndarray, cum_s1: np.ndarray, cum_s2: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+	"""Count, mean and std over rows [lo, hi) of every column from prefix sums."""
+	n = cum_n[hi] - cum_n[lo]
+	with np.errstate(divide="ignore", invalid="ignore"):
+		mean = (cum_s1[hi] - cum_s1[lo]) / n
+		var = (cum_s2[hi] - cum_s2[lo]) / n - mean ** 2
+	return n, mean, np.sqrt(np.clip(var, 0.0, None))
+
+
+def _seasonality_breaks(values: np.ndarray, season: int, min_typical: float = 0.6, drop: float = 0.5):
+	"""Row-wise correlation of each full cycle with the previous one, for every column.
+
+	Returns (cycle correlations of shape (cycles - 1, m), typical correlation per column,
+	boolean break flags).
+	"""
+	cycles = values.shape[0] // season
+	shaped = values[values.shape[0] - cycles * season:].reshape(cycles, season, -1)
+	prev, cur = shaped[:-1], shaped[1:]
+	with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+		warnings.simplefilter("ignore", RuntimeWarning)
+		prev_c = prev - np.nanmean(prev, axis=1, keepdims=True)
+		cur_c = cur - np.nanmean(cur, axis=1, keepdims=True)
+		cov = np.nansum(prev_c * cur_c, axis=1)
+		norm = np.sqrt(np.nansum(prev_c ** 2, axis=1) * np.nansum(cur_c ** 2, axis=1))
+		corr = cov / norm
+		typical = np.nanmedian(corr, axis=0)
+	breaks = (typical >= min_typical) & (corr < typical - drop)
+	return corr, typical, breaks
+
+
+def detect_time_anomalies(
+	df: pd.DataFrame,
+	date_col: str,
+	metrics: Sequence[str],
+	max_points: int = 1000,
+	spike_z: float = 4.0,
+	shift_threshold: float = 2.0,
+	max_spikes: int = 3,
+) -> Tuple[List[TimeSeriesAnomaly], Optional[str]]:
+	"""Spikes, level shifts and seasonality breaks for each metric over date_col.
+
+	Metrics are aggregated (mean per bucket) in one grouped pass onto a regular grid.
+	Trailing and leading window statistics for every bucket and metric come from
+	prefix sums, so each metric costs a handful of vectorized array operations.
+	Returns (anomalies, granularity).
+	"""
+	metrics = list(metrics)
+	if not metrics or df[date_col].notna().sum() == 0:
+		return [], None
+	series_df, granularity = aggregate_time_series(df, date_col, metrics, agg="mean", max_points=max_points)
+	grid = pd.date_range(series_df.index.min(), series_df.index.max(), freq=_REGULAR_FREQS[granularity])
+	series_df = series_df.reindex(grid)
+	values = series_df.to_numpy(dtype=np.float64, na_value=np.nan)
+	t_count = values.shape[0]
+	season = SEASON_LENGTHS[granularity]
+	window = max(7, min(2 * season, t_count // 4))
+	anomalies: List[TimeSeriesAnomaly] = []
+	if t_count < 4 * 7:
+		return anomalies, granularity
+
+	with warnings.catch_warnings():
+		warnings.simplefilter("ignore", RuntimeWarning)
+		# Centre each metric so prefix sums of squares stay well conditioned
+		col_means = np.nanmean(values, axis=0)
+	values = values - col_means
+	valid = ~np.isnan(values)
+	x = np.where(valid, values, 0.0)
+	zero = np.zeros((1, values.shape[1]))
+	cum_n = np.vstack([zero, np.cumsum(valid, axis=0)])
+	cum_s1 = np.vstack([zero, np.cumsum(x, axis=0)])
+	cum_s2 = np.vstack([zero, np.cumsum(x * x, axis=0)])
+	t = np.arange(t_count)
+	min_n = window // 2
+
+	# Spikes: deviation from the trailing window [t - w, t)
+	n_prev, mean_prev, std_prev = _window_stats(cum_n, cum_s1, cum_s2, np.maximum(t - window, 0), t)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		z = (values - mean_prev) / std_prev
+	z[(n_prev < min_n) | ~(std_prev > 0) | ~valid] = 0.0
+
+	# Level shifts: leading window [t, t + w) against the trailing one
+	n_next, mean_next, std_next = _window_stats(cum_n, cum_s1, cum_s2, t, np.minimum(t + window, t_count))
+	with np.errstate(divide="ignore", invalid="ignore"):
+		pooled = np.sqrt((std_prev ** 2 + std_next ** 2) / 2)
+		shift = np.abs(mean_next - mean_prev) / pooled
+	shift[(n_prev < min_n) | (n_next < min_n) | ~(pooled > 0)] = 0.0
+
+	breaks = None
+	if t_count >= 3 * season and season > 1:
+		corr, typical, breaks = _seasonality_breaks(values, season)
+		first_cycle = t_count - (t_count // season) * season
+
+	label = GRANULARITY_LABELS[granularity].lower()
+	for j, metric in enumerate(metrics):
+		spike_rows = np.flatnonzero(np.abs(z[:, j]) > spike_z)
+		spike_rows = spike_rows[np.argsort(-np.abs(z[spike_rows, j]))][:max_spikes]
+		for row in spike_rows:
+			direction = "spike" if z[row, j] > 0 else "dip"
+			anomalies.append(TimeSeriesAnomaly(metric, "spike", grid[row], float(abs(z[row, j])), f"{direction} (z={z[row, j]:.1f} vs trailing {window} {label} buckets)"))
+		row = int(np.argmax(shift[:, j]))
+		if shift[row, j] > shift_threshold:
+			before, after = mean_prev[row, j] + col_means[j], mean_next[row, j] + col_means[j]
+			anomalies.append(TimeSeriesAnomaly(metric, "level_shift", grid[row], float(shift[row, j]), f"level shift (mean {before:.2f} → {after:.2f})"))
+		if breaks is not None:
+			for cycle in np.flatnonzero(breaks[:, j])[:max_spikes]:
+				start = first_cycle + (cycle + 1) * season
+				anomalies.append(TimeSeriesAnomaly(metric, "seasonality_break", grid[start], float(typical[j] - corr[cycle, j]), f"seasonality break (cycle corr {corr[cycle, j]:.2f} vs typical {typical[j]:.2f})"))
+	return anomalies, granularity
@@ -0,0 +1,42 @@
+import io
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+
+# Keep the app's on-disk state out of the shared temp directory; set before api is imported
+_STATE_DIR = tempfile.mkdtemp(prefix="analysis_tests_")
+os.environ.setdefault("SESSION_DIR", os.path.join(_STATE_DIR, "sessions"))
+os.environ.setdefault("RATE_LIMIT_DB", os.path.join(_STATE_DIR, "ratelimit.sqlite"))
+os.environ.setdefault("EXPORT_CACHE_DIR", os.path.join(_STATE_DIR, "exports"))
+os.environ.setdefault("RATE_LIMIT_BURST", "1000000")
+os.environ.setdefault("RATE_LIMIT_PER_SECOND", "1000000")
+
+
+def sample_frame(rows: int = 500) -> pd.DataFrame:
+	rng = np.random.default_rng(0)
+	return pd.DataFrame({
+		"order_date": pd.date_range("2023-01-01", periods=rows, freq="6h").strftime("%Y-%m-%d %H:%M:%S"),
+		"Sales": rng.gamma(2, 50, rows).round(2),
+		"quantity": rng.integers(1, 10, rows),
+		"region": rng.choice(["North", "South", "East", "West"], rows),
+	})
+
+
+@pytest.fixture
+def client():
+	import api
+	return api.app.test_client()
+
+
+@pytest.fixture
+def session_id(client):
+	"""A server-issued session holding sample_frame(), uploaded and cleaned."""
+	data = {"file": (io.BytesIO(sample_frame().to_csv(index=False).encode()), "sales.csv")}
+	response = client.post("/api/upload", data=data, content_type="multipart/form-data")
+	assert response.status_code == 200, response.get_json()
+	sid = response.headers["X-Session-ID"]
+	response = client.post("/api/clean", headers={"X-Session-ID": sid})
+	assert response.status_code == 200, response.get_json()
+	return sid
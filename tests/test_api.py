@@ -0,0 +1,98 @@
+import io
+import json
+from conftest import sample_frame
+
+
+def _sse_events(body: str):
+	events = []
+	for block in body.strip().split("\n\n"):
+		fields = dict(line.split(": ", 1) for line in block.splitlines())
+		events.append((fields["event"], json.loads(fields["data"])))
+	return events
+
+
+def test_eda_stream_sse_takes_session_from_query(client, session_id):
+	# EventSource cannot set headers, so the session comes as ?session_id=
+	response = client.get(f"/api/eda/stream?format=sse&charts=time_series&session_id={session_id}")
+	assert response.status_code == 200
+	assert response.mimetype == "text/event-stream"
+	events = _sse_events(response.get_data(as_text=True))
+	names = [name for name, _ in events]
+	assert names[0] == "start" and names[-1] == "done"
+	steps = events[0][1]["steps"]
+	progress = [data["step"] for name, data in events if name == "progress"]
+	assert progress == steps
+	assert events[-1][1]["count"] == names.count("chart") > 0
+
+
+def test_eda_stream_without_session_is_rejected(client):
+	response = client.get("/api/eda/stream?format=sse")
+	assert response.status_code == 400
+
+
+def test_pdf_vector_charts_without_svglib_are_rejected(client, session_id, monkeypatch):
+	import api
+	monkeypatch.setattr(api, "PDF_VECTOR_CHARTS", False)
+	headers = {"X-Session-ID": session_id}
+	response = client.get("/api/export/pdf?vector=1", headers=headers)
+	assert response.status_code == 400
+	assert "svglib" in response.get_json()["error"]
+	response = client.post("/api/export/jobs", json={"kind": "pdf", "vector": True}, headers=headers)
+	assert response.status_code == 400
+
+
+def test_qa_chart_served_by_a_worker_that_did_not_answer(client, session_id):
+	import api
+	headers = {"X-Session-ID": session_id}
+	chart = client.post("/api/qa", json={"question": "total sales by region"}, headers=headers).get_json()["chart"]
+	assert chart is not None
+	# Another worker: none of this process's caches, session read back from disk
+	api.qa_charts.clear()
+	api.qa_cache.clear()
+	api.sessions._forget(session_id)
+	response = client.get(f"{chart['url']}?session_id={session_id}")
+	assert response.status_code == 200
+	assert response.mimetype == "image/png" and response.data.startswith(b"\x89PNG")
+
+
+def _upload(client, frame, headers=None):
+	data = {"file": (io.BytesIO(frame.to_csv(index=False).encode()), "sales.csv")}
+	response = client.post("/api/upload", data=data, content_type="multipart/form-data", headers=headers or {})
+	assert response.status_code == 200
+	return {"X-Session-ID": response.headers["X-Session-ID"]}
+
+
+def test_qa_chart_for_replaced_data_expires(client):
+	import api
+	headers = _upload(client, sample_frame())
+	chart = client.post("/api/qa", json={"question": "total sales by region"}, headers=headers).get_json()["chart"]
+	api.qa_charts.clear()
+	# Same session, new data: the recorded question would now draw a different chart
+	_upload(client, sample_frame(100), headers)
+	assert client.get(chart["url"], headers=headers).status_code == 404
+
+
+def test_unknown_session_ids_are_replaced_by_server_issued_ones(client):
+	import api
+	response = client.get("/api/overview", headers={"X-Session-ID": "chosen-by-client"})
+	issued = response.headers["X-Session-ID"]
+	assert issued != "chosen-by-client"
+	assert issued in api.sessions and "chosen-by-client" not in api.sessions
+
+
+def test_rate_limit_by_forwarded_address_before_creating_sessions(client, tmp_path, monkeypatch):
+	import api
+	from src.ratelimit import RateLimiter
+	monkeypatch.setattr(api, "rate_limiter", RateLimiter(str(tmp_path / "limits.sqlite"), rate=0.001, burst=2))
+	before = len(api.sessions)
+	# Rotating ids the server never issued all draw on the one address's bucket
+	codes = [
+		client.get("/api/overview", headers={"X-Session-ID": f"random-{i}", "X-Forwarded-For": "203.0.113.7"}).status_code
+		for i in range(4)
+	]
+	assert codes.count(429) == 2
+	assert len(api.sessions) == before + 2
+	# Another client behind the same proxy has its own bucket
+	response = client.get("/api/overview", headers={"X-Forwarded-For": "203.0.113.8"})
+	assert response.status_code != 429
+	assert client.get("/api/qa/stats", headers={"X-Forwarded-For": "203.0.113.7"}).status_code == 429
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.correlation import top_correlations
+
+
+def _frame(missing: bool) -> pd.DataFrame:
+	rng = np.random.default_rng(1)
+	df = pd.DataFrame(rng.normal(size=(400, 6)), columns=list("abcdef"))
+	df["b"] = df["a"] ** 3 + rng.normal(size=400) * 0.1
+	df["e"] = -df["c"] + rng.normal(size=400) * 0.5
+	if missing:
+		df.loc[df.index % 4 == 0, "b"] = np.nan
+		df.loc[df.index % 5 == 0, "c"] = np.nan
+	return df
+
+
+def _expected(corr: pd.DataFrame, k: int):
+	pairs = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1)).stack()
+	pairs = pairs.reindex(pairs.abs().sort_values(ascending=False, kind="stable").index)[:k]
+	return list(pairs.index), pairs.to_numpy()
+
+
+@pytest.mark.parametrize("block_size", [2, 256])
+@pytest.mark.parametrize("missing", [False, True])
+def test_pearson_matches_pairwise_corr(missing, block_size):
+	df = _frame(missing)
+	got = top_correlations(df, k=4, block_size=block_size)
+	pairs, values = _expected(df.corr(), 4)
+	assert [(a, b) for a, b, _ in got] == pairs
+	np.testing.assert_allclose([r for _, _, r in got], values)
+
+
+def test_spearman_without_missing_matches_pandas():
+	df = _frame(False)
+	got = top_correlations(df, k=3, method="spearman", block_size=2)
+	pairs, values = _expected(df.corr(method="spearman"), 3)
+	assert [(a, b) for a, b, _ in got] == pairs
+	np.testing.assert_allclose([r for _, _, r in got], values)
+
+
+def test_spearman_with_missing_ranks_each_column_once():
+	# Columns are ranked over all their values, then correlated pairwise
+	df = _frame(True)
+	got = top_correlations(df, k=3, method="spearman", block_size=2)
+	pairs, values = _expected(df.rank().corr(), 3)
+	assert [(a, b) for a, b, _ in got] == pairs
+	np.testing.assert_allclose([r for _, _, r in got], values)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from src.correlation import CoMomentAccumulator
+from src.insights import generate_insights, generate_insights_full
+from src.streaming import chunk_rows_for, split_chunks
+
+
+def _frame(rows: int = 2000) -> pd.DataFrame:
+	rng = np.random.default_rng(0)
+	df = pd.DataFrame(rng.normal(size=(rows, 3)), columns=["a", "b", "d"])
+	df["c"] = df["a"] * 2 + 1
+	return df
+
+
+def test_sparse_columns_keep_other_correlations():
+	df = _frame()
+	df["e"] = np.nan
+	df["f"] = np.where(np.arange(len(df)) % 100 == 0, df["b"], np.nan)
+	full = generate_insights_full(df, chunk_rows=300)
+	assert "a ~ c: corr=1.00" in full
+	assert full == generate_insights(df)
+
+
+def test_comoments_match_pairwise_corr():
+	df = _frame()
+	df.loc[df.index % 3 == 0, "b"] = np.nan
+	df.loc[df.index % 7 == 0, "d"] = np.nan
+	df["e"] = np.nan
+	acc = CoMomentAccumulator(list(df.columns))
+	for start in range(0, len(df), 250):
+		acc.update(df.iloc[start:start + 250])
+	np.testing.assert_allclose(acc.correlation(), df.corr().to_numpy(), atol=1e-9)
+	np.testing.assert_allclose(acc.covariance(), df.cov().to_numpy(), rtol=1e-9)
+
+
+def test_wide_frames_use_shorter_chunks():
+	assert chunk_rows_for(10, chunk_rows=200_000, max_cells=1_000_000) == 100_000
+	assert chunk_rows_for(5000, chunk_rows=200_000, max_cells=1_000_000) == 200
+	df = _frame()
+	seen = []
+	source = split_chunks(lambda: iter([df]), chunk_rows_for(df.shape[1], max_cells=1000))
+	for chunk in source():
+		seen.append(chunk.size)
+	assert max(seen) <= 1000 and sum(seen) == df.size
+	assert generate_insights_full(df, max_cells=1000) == generate_insights_full(df)
+
+
+def test_streamed_correlations_cover_first_columns_only():
+	df = _frame()[["b", "d", "a", "c"]]
+	assert "a ~ c" in generate_insights_full(df)
+	assert "a ~ c" not in generate_insights_full(df, max_correlation_columns=3)
@@ -0,0 +1,63 @@
+import threading
+from src.jobs import ExportJobs
+
+
+def _wait(jobs: ExportJobs, timeout: float = 5.0) -> None:
+	done = threading.Event()
+	jobs._executor.submit(done.set)
+	assert done.wait(timeout)
+
+
+def test_failed_status_write_releases_build(tmp_path):
+	jobs = ExportJobs(str(tmp_path), max_workers=1)
+	release = threading.Event()
+	started = threading.Event()
+
+	def build(path, progress):
+		started.set()
+		release.wait(5)
+		with open(path, "wb") as f:
+			f.write(b"x")
+
+	leader = jobs.submit("a", "csv", "k", ".csv", "out.csv", "text/csv", build)
+	assert started.wait(5)
+	follower = jobs.submit("b", "csv", "k", ".csv", "out.csv", "text/csv", build)
+	# The next status write fails; the slot and the follower must still be released
+	original, calls = jobs._save, []
+
+	def flaky_save(job):
+		calls.append(job["id"])
+		if len(calls) == 1:
+			raise OSError("disk full")
+		original(job)
+
+	jobs._save = flaky_save
+	release.set()
+	_wait(jobs)
+	assert jobs._pending == 0 and not jobs._building
+	assert jobs.get(follower["id"])["status"] == "done"
+	assert jobs.get(leader["id"])["status"] == "running"
+
+
+def test_failed_first_status_write_releases_build(tmp_path):
+	jobs = ExportJobs(str(tmp_path), max_workers=1)
+	gate = threading.Event()
+	jobs._executor.submit(gate.wait, 5)
+	original = jobs._save
+
+	def build(path, progress):
+		with open(path, "wb") as f:
+			f.write(b"x")
+
+	job = jobs.submit("a", "csv", "k", ".csv", "out.csv", "text/csv", build)
+
+	def failing_save(job):
+		if job["status"] == "running":
+			raise OSError("disk full")
+		original(job)
+
+	jobs._save = failing_save
+	gate.set()
+	_wait(jobs)
+	assert jobs._pending == 0 and not jobs._building
+	assert jobs.get(job["id"])["status"] == "error"
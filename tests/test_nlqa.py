@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.nlqa import answer_question, answer_questions, classify_question
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+	rng = np.random.default_rng(0)
+	return pd.DataFrame({
+		"qty": rng.integers(0, 10, 1000),
+		"region": rng.choice(["North", "South", "East"], 1000),
+		"price": rng.random(1000),
+	})
+
+
+@pytest.mark.parametrize("question", [
+	"count rows where qty > 5",
+	"how many rows where qty > 5",
+	"how many records where qty > 5",
+	"number of rows where qty > 5",
+	"count where qty > 5",
+])
+def test_filtered_row_counts(df, question):
+	intent, _ = classify_question(question)
+	assert intent.name == "filtered_aggregate"
+	assert answer_question(df, question).message == f"count of rows where qty > 5: {(df['qty'] > 5).sum()}"
+
+
+def test_count_where_with_in_list(df):
+	expected = ((df["qty"] > 5) & df["region"].isin(["North", "South"])).sum()
+	result = answer_question(df, "count where qty > 5 and region in (North, South)")
+	assert result.message.endswith(f": {expected}")
+
+
+def test_how_many_where_equals(df):
+	result = answer_question(df, "how many rows where region = North")
+	assert result.message.endswith(f": {(df['region'] == 'North').sum()}")
+
+
+def test_row_count_grouped(df):
+	intent, _ = classify_question("count rows by region")
+	assert intent.name == "filtered_aggregate"
+
+
+@pytest.mark.parametrize("question", ["how many rows", "count records", "how many rows are there?"])
+def test_plain_row_count(df, question):
+	assert answer_question(df, question).message == f"Total rows: {len(df)}"
+
+
+def test_batch_matches_single(df):
+	questions = ["how many rows where qty > 5", "number of rows where qty > 5", "how many rows"]
+	batch = [result.message for result, _ in answer_questions(df, questions)]
+	assert batch == [answer_question(df, question).message for question in questions]
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.sessions import SessionStore
+
+
+def test_frames_read_back_are_read_only(tmp_path):
+	writer = SessionStore(str(tmp_path))
+	writer["s"] = {"df": pd.DataFrame({"x": np.arange(5.0), "y": np.arange(5)})}
+	writer.settle()
+	# Another worker reads the session from disk
+	reader = SessionStore(str(tmp_path))
+	df = reader["s"]["df"]
+	with pytest.raises(ValueError):
+		df.loc[0, "x"] = 9.0
+	with pytest.raises(ValueError):
+		df["y"] += 1
+	# Assigning columns, or a copy stored back, is how session frames change
+	df["z"] = df["x"] * 2
+	changed = df.copy()
+	changed.loc[0, "x"] = 9.0
+	reader["s"]["df"] = changed
+	reader.settle()
+	assert SessionStore(str(tmp_path))["s"]["df"].loc[0, "x"] == 9.0